@@ -6,20 +6,53 @@
 - 모션블러
 - 좌우 반전
 - 색상 변화
+
+만들 변형은 레시피(augment_recipes/*.json)로 정의 → augment_recipe.py가 연산 DAG로 컴파일
+(앞부분이 같은 변형은 중간 결과 공유, 이전 실행과 원본/변형 서명이 같으면 다시 계산하지 않음)
+
+프로세스 풀로 이미지 단위 병렬 처리 (노드마다 이미지 이름 + 연산 경로로 정한 시드를 워커의 Generator에 설정 → 워커 수와 상관없이 같은 결과),
+JPEG 인코딩은 워커에서, 파일 쓰기는 크기 제한 큐를 받는 쓰기 스레드에서 처리
+
+사용법:
+    python3 augment_data.py                    # CPU 수만큼 워커, 기본 레시피
+    python3 augment_data.py --recipe blur_only # augment_recipes/blur_only.json
+    python3 augment_data.py --workers 1        # 순차 처리 (결과 비교용)
+    python3 augment_data.py --force            # 매니페스트 무시하고 전부 다시 생성
+    python3 augment_data.py --shards           # 개별 파일 대신 augmented_shards/에 train/val 샤드로 (매번 전부 생성)
 """
 
+import argparse
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 import cv2
-import numpy as np
 from pathlib import Path
 import shutil
 import json
 
+import blur_ops
+import photometric_ops
+import yolo_labels
+from augment_recipe import DEFAULT_RECIPE, compile_recipe, load_recipe
+from dataset_shards import SplitShardWriter
+
 TRAINING_DIR = Path(__file__).parent
 IMAGES_DIR = TRAINING_DIR / 'labeling_images'
 LABELS_DIR = TRAINING_DIR / 'labeling_labels'
 METADATA_FILE = LABELS_DIR / '_metadata.json'
 OUTPUT_IMAGES_DIR = TRAINING_DIR / 'augmented_images'
 OUTPUT_LABELS_DIR = TRAINING_DIR / 'augmented_labels'
+OUTPUT_SHARDS_DIR = TRAINING_DIR / 'augmented_shards'   # --shards (dataset_shards.py)
+
+MANIFEST_NAME = '_augment_manifest.json'    # OUTPUT_LABELS_DIR 안 (원본/변형 서명)
+OPS_VERSION = 3     # 연산 구현이 바뀌어 결과가 달라지면 올림 (변형 서명에 포함 → 다음 실행에서 다시 생성)
+CHUNK_SIZE = 8          # 워커 작업 하나에 넣을 이미지 수
+WRITER_THREADS = 4
+WRITE_QUEUE_SIZE = 64   # 쓰기 대기 중인 이미지 수 상한 (넘으면 작업 제출을 멈춤)
 
 def get_matched_pairs():
     """라벨링된 이미지-라벨 쌍 찾기 (비어있지 않은 라벨만)"""
@@ -39,242 +72,362 @@ def get_matched_pairs():
 
 def apply_brightness_contrast(img, alpha=1.0, beta=0):
     """밝기/대비 조절"""
-    return cv2.convertScaleAbs(img, alpha=alpha, beta=beta)
+    return photometric_ops.brightness_contrast(img, alpha, beta)
 
 def apply_motion_blur(img, size=5, direction='vertical'):
     """모션 블러 (수직/수평/대각선 방향)"""
-    kernel = np.zeros((size, size))
-    if direction == 'vertical':
-        kernel[:, size // 2] = 1 / size
-    elif direction == 'horizontal':
-        kernel[size // 2, :] = 1 / size
-    elif direction == 'diagonal':
-        np.fill_diagonal(kernel, 1 / size)
-    return cv2.filter2D(img, -1, kernel)
+    return blur_ops.motion_blur(img, size, direction)
+
+def apply_random_motion_blur(img, min_size, max_size):
+    """무작위 크기([min_size, max_size)) / 방향 모션 블러"""
+    rng = photometric_ops.rng()
+    size = int(rng.integers(min_size, max_size))
+    direction = ('vertical', 'horizontal', 'diagonal')[rng.integers(3)]
+    return apply_motion_blur(img, size=size, direction=direction)
 
 def apply_strong_motion_blur(img):
     """강한 모션 블러 (빠른 움직임 시뮬레이션)"""
-    size = np.random.randint(9, 15)
-    direction = np.random.choice(['vertical', 'horizontal', 'diagonal'])
-    return apply_motion_blur(img, size=size, direction=direction)
+    return apply_random_motion_blur(img, 9, 15)
 
 def apply_extreme_motion_blur(img):
     """극강 모션 블러 (아주 빠른 움직임)"""
-    size = np.random.randint(20, 35)
-    direction = np.random.choice(['vertical', 'horizontal', 'diagonal'])
-    return apply_motion_blur(img, size=size, direction=direction)
+    return apply_random_motion_blur(img, 20, 35)
 
 def apply_mild_motion_blur(img):
     """약한 모션 블러 (느린 움직임)"""
-    size = np.random.randint(3, 7)
-    direction = np.random.choice(['vertical', 'horizontal', 'diagonal'])
-    return apply_motion_blur(img, size=size, direction=direction)
+    return apply_random_motion_blur(img, 3, 7)
 
 def apply_zoom_blur(img, strength=0.1):
     """줌 블러 (카메라 흔들림 시뮬레이션)"""
-    h, w = img.shape[:2]
-    center_x, center_y = w // 2, h // 2
-
-    result = img.copy().astype(np.float32)
-    for i in range(1, 5):
-        scale = 1 + strength * i * 0.25
-        M = cv2.getRotationMatrix2D((center_x, center_y), 0, scale)
-        scaled = cv2.warpAffine(img, M, (w, h), borderMode=cv2.BORDER_REFLECT)
-        result = cv2.addWeighted(result, 0.8, scaled.astype(np.float32), 0.2, 0)
-    return result.astype(np.uint8)
-
-def apply_double_motion_blur(img):
-    """이중 모션 블러 (복합 움직임)"""
-    # 먼저 수직 블러
-    temp = apply_motion_blur(img, size=7, direction='vertical')
-    # 그 다음 약간의 수평 블러
-    return apply_motion_blur(temp, size=5, direction='horizontal')
+    return blur_ops.zoom_blur(img, strength)
+
+def apply_double_motion_blur(img, vertical=7, horizontal=5):
+    """이중 모션 블러 (복합 움직임: 수직 → 약간의 수평)"""
+    return blur_ops.double_motion_blur(img, vertical, horizontal)
 
 def apply_cutout(img, num_holes=2, max_size=50):
     """랜덤 영역 가리기 (부분 가림 시뮬레이션)"""
-    h, w = img.shape[:2]
-    result = img.copy()
-    for _ in range(num_holes):
-        hole_h = np.random.randint(20, max_size)
-        hole_w = np.random.randint(20, max_size)
-        y = np.random.randint(0, h - hole_h)
-        x = np.random.randint(0, w - hole_w)
-        result[y:y+hole_h, x:x+hole_w] = np.random.randint(0, 255, (hole_h, hole_w, 3))
-    return result
+    return photometric_ops.cutout(img, num_holes, max_size)
 
 def apply_horizontal_flip(img, labels):
     """좌우 반전 + 라벨 좌표 변환"""
     flipped_img = cv2.flip(img, 1)
-
-    new_labels = []
-    for label in labels:
-        parts = label.strip().split()
-        if len(parts) >= 5:
-            cls, x, y, w, h = parts[0], float(parts[1]), float(parts[2]), float(parts[3]), float(parts[4])
-            # x 좌표 반전
-            new_x = 1.0 - x
-            new_labels.append(f"{cls} {new_x:.6f} {y:.6f} {w:.6f} {h:.6f}")
-
-    return flipped_img, new_labels
+    return flipped_img, yolo_labels.to_lines(yolo_labels.hflip(yolo_labels.parse(labels)))
 
 def apply_color_jitter(img):
-    """색상 변화"""
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
-
-    # 색조 변화
-    hsv[:, :, 0] += np.random.uniform(-10, 10)
-    hsv[:, :, 0] = np.clip(hsv[:, :, 0], 0, 179)
-
-    # 채도 변화
-    hsv[:, :, 1] *= np.random.uniform(0.8, 1.2)
-    hsv[:, :, 1] = np.clip(hsv[:, :, 1], 0, 255)
-
-    # 명도 변화
-    hsv[:, :, 2] *= np.random.uniform(0.8, 1.2)
-    hsv[:, :, 2] = np.clip(hsv[:, :, 2], 0, 255)
-
-    return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
+    """색상 변화 (색조 ±10, 채도/명도 ×0.8~1.2)"""
+    return photometric_ops.color_jitter(img, 10, 0.2, 0.2)
 
 def apply_gaussian_noise(img, var=10):
     """가우시안 노이즈"""
-    noise = np.random.normal(0, var, img.shape).astype(np.float32)
-    noisy = img.astype(np.float32) + noise
-    return np.clip(noisy, 0, 255).astype(np.uint8)
-
-def main():
-    OUTPUT_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-    OUTPUT_LABELS_DIR.mkdir(parents=True, exist_ok=True)
-
-    pairs = get_matched_pairs()
-    print(f"매칭된 이미지-라벨 쌍: {len(pairs)}개")
-
-    total_generated = 0
+    return photometric_ops.gaussian_noise(img, var)
+
+def _image_op(fn):
+    """이미지만 바꾸는 연산 (라벨은 그대로)"""
+    return lambda img, labels, **params: (fn(img, **params), labels)
+
+
+# 레시피 연산 이름 → fn(img, labels, **params) → (img, labels)
+OPS = {
+    'brightness': _image_op(apply_brightness_contrast),
+    'motion_blur': _image_op(apply_motion_blur),
+    'double_motion_blur': _image_op(apply_double_motion_blur),
+    'random_motion_blur': _image_op(apply_random_motion_blur),
+    'zoom_blur': _image_op(apply_zoom_blur),
+    'color_jitter': _image_op(apply_color_jitter),
+    'gaussian_noise': _image_op(apply_gaussian_noise),
+    'cutout': _image_op(apply_cutout),
+    'hflip': apply_horizontal_flip,
+}
+
+
+def image_seed(name, seed=0):
+    """이미지 이름 → 고정 시드 (어느 워커에서 몇 번째로 처리해도 같은 난수)"""
+    digest = hashlib.blake2b(f'{seed}:{name}'.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'big')
+
+
+_plan = None    # 워커 프로세스의 컴파일된 레시피
+
+
+def augment_image(img_path, label_path, names, plan=None):
+    """레시피 변형 중 names만 계산 → [(이미지 이름, JPEG 바이트, 라벨 이름, 라벨 텍스트)] (읽기 실패 시 None)"""
+    plan = plan or _plan
+    img = cv2.imread(str(img_path))
+    if img is None:
+        return None
+
+    labels = label_path.read_text().strip().split('\n')
+    base_name = img_path.stem
+    outputs = plan.run(img, labels, image_seed(img_path.name, plan.seed), names, OPS, photometric_ops.reseed)
+
+    variants = []
+    for name in names:
+        variant_img, variant_labels = outputs[name]
+        ok, encoded = cv2.imencode('.jpg', variant_img)
+        if ok:
+            variants.append((f"{base_name}_{name}.jpg", encoded.tobytes(),
+                             f"{base_name}_{name}.txt", '\n'.join(variant_labels)))
+    return variants
+
+
+def _init_worker(plan):
+    global _plan
+    # 프로세스마다 OpenCV 내부 스레드까지 쓰면 코어 수보다 스레드가 많아짐
+    cv2.setNumThreads(1)
+    _plan = plan
+
+
+def augment_chunk(tasks):
+    """워커 작업: [(이미지 경로, 라벨 경로, 원본 복사 여부, 변형 이름)] → [(작업, 증강 결과)]"""
+    return [(task, augment_image(task[0], task[1], task[3])) for task in tasks]
+
+
+def _write_results(results, errors, written):
+    """쓰기 스레드: 큐에서 (작업, 증강 결과)를 받아 원본 복사 + 증강 파일 쓰기
+
+    쓰기 오류가 나도 큐는 계속 비움 (스레드가 죽으면 큐가 차서 제출 쪽이 멈춤)
+    """
+    while True:
+        item = results.get()
+        if item is None:
+            return
+        (img_path, label_path, copy_original, _), variants = item
+        try:
+            if copy_original:
+                shutil.copy(img_path, OUTPUT_IMAGES_DIR / img_path.name)
+                shutil.copy(label_path, OUTPUT_LABELS_DIR / label_path.name)
+            for image_name, data, label_name, label_text in variants:
+                (OUTPUT_IMAGES_DIR / image_name).write_bytes(data)
+                (OUTPUT_LABELS_DIR / label_name).write_text(label_text)
+            written.append(img_path.name)
+        except OSError as e:
+            errors.append(f'{img_path.name}: {e}')
+
+
+def _write_shards(results, sink, errors, written):
+    """쓰기 스레드 (샤드, 하나만): 원본 + 증강 결과를 작업 순서대로 train/val 샤드에 추가"""
+    while True:
+        item = results.get()
+        if item is None:
+            return
+        (img_path, label_path, copy_original, _), variants = item
+        try:
+            if copy_original:
+                sink.add(img_path.name, img_path.read_bytes(), label_path.read_text())
+            for image_name, data, _, label_text in variants:
+                sink.add(image_name, data, label_text)
+            written.append(img_path.name)
+        except (OSError, ValueError) as e:
+            errors.append(f'{img_path.name}: {e}')
+
+
+def _source_signature(img_path, label_path):
+    img_st, label_st = img_path.stat(), label_path.stat()
+    return [img_st.st_size, img_st.st_mtime_ns, label_st.st_size, label_st.st_mtime_ns]
+
+
+def load_manifest():
+    try:
+        with open(OUTPUT_LABELS_DIR / MANIFEST_NAME, encoding='utf-8') as f:
+            return json.load(f).get('sources', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    path = OUTPUT_LABELS_DIR / MANIFEST_NAME
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps({'version': 1, 'sources': manifest}))
+    tmp.replace(path)
+
+
+def _remove_outputs(stem, names, img_name=None, label_name=None):
+    """변형 출력(과 원본 복사본) 삭제 → 삭제한 변형 수"""
+    for name in names:
+        (OUTPUT_IMAGES_DIR / f"{stem}_{name}.jpg").unlink(missing_ok=True)
+        (OUTPUT_LABELS_DIR / f"{stem}_{name}.txt").unlink(missing_ok=True)
+    if img_name:
+        (OUTPUT_IMAGES_DIR / img_name).unlink(missing_ok=True)
+        (OUTPUT_LABELS_DIR / label_name).unlink(missing_ok=True)
+    return len(names)
+
+
+def plan_tasks(pairs, plan, manifest, force=False):
+    """이전 실행과 비교해서 할 일 정리 → (작업 목록, 새 매니페스트 항목, 통계)
+
+    원본(이미지/라벨)이 바뀌었으면 전부, 아니면 서명이 바뀐 변형만 다시 계산하고
+    레시피에서 빠졌거나 원본이 없어진 변형은 삭제
+    """
+    tasks, entries = [], {}
+    stats = {'reused': 0, 'removed': 0}
+    for img_path, label_path in pairs:
+        source = _source_signature(img_path, label_path)
+        expected = {name: signature for name, signature in plan.signatures.items()
+                    if plan.selected(img_path.name, name)}
+        entry = manifest.get(img_path.name)
+        if force or entry is None or entry['source'] != source:
+            names, copy_original = list(expected), True
+        else:
+            names = [name for name, signature in expected.items() if entry['outputs'].get(name) != signature]
+            copy_original = False
+            stats['reused'] += len(expected) - len(names)
+        if entry is not None:
+            stats['removed'] += _remove_outputs(img_path.stem,
+                                                [name for name in entry['outputs'] if name not in expected])
+        entries[img_path.name] = {'source': source, 'label': label_path.name, 'outputs': expected}
+        if names or copy_original:
+            tasks.append((img_path, label_path, copy_original, names))
+
+    for img_name, entry in manifest.items():
+        if img_name not in entries:
+            stats['removed'] += _remove_outputs(Path(img_name).stem, list(entry['outputs']),
+                                                img_name, entry.get('label', f"{Path(img_name).stem}.txt"))
+    return tasks, entries, stats
+
+
+def run_augmentation(pairs, recipe=DEFAULT_RECIPE, workers=None, chunk_size=CHUNK_SIZE,
+                     writers=WRITER_THREADS, queue_size=WRITE_QUEUE_SIZE, force=False, progress_every=100,
+                     shards=None):
+    """pairs 증강 → 통계 dict (images, skipped, generated, reused, removed, writeErrors, seconds)
+
+    shards: 개별 파일 대신 이 폴더에 train/val 샤드로 씀 (매니페스트 없이 전부 생성, 끝까지 성공해야 교체)
+    """
+    workers = workers or os.cpu_count() or 1
+    plan = compile_recipe(load_recipe(recipe) if isinstance(recipe, str) else recipe, OPS, OPS_VERSION)
+    if shards:
+        tasks = [(img_path, label_path, True, [name for name in plan.variants if plan.selected(img_path.name, name)])
+                 for img_path, label_path in pairs]
+        entries, plan_stats = {}, {'reused': 0, 'removed': 0}
+        sink = SplitShardWriter(shards, variants=plan.variants)
+    else:
+        manifest = load_manifest()
+        tasks, entries, plan_stats = plan_tasks(pairs, plan, manifest, force)
+        sink = None
+    print(f"레시피: 변형 {len(plan.variants)}개, 연산 노드 {len(plan.nodes)}개, "
+          f"처리할 이미지 {len(tasks)}/{len(pairs)}개", flush=True)
+
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    results = queue.Queue(maxsize=queue_size)
+    errors, written = [], []
+    if sink is not None:
+        writer_threads = [threading.Thread(target=_write_shards, args=(results, sink, errors, written), daemon=True)]
+    else:
+        writer_threads = [threading.Thread(target=_write_results, args=(results, errors, written), daemon=True)
+                          for _ in range(max(1, writers))]
+    for thread in writer_threads:
+        thread.start()
+
+    stats = {'images': 0, 'skipped': 0, 'generated': 0, **plan_stats}
+    failed = set()
+    completed = False
+    start = time.perf_counter()
+    next_report = progress_every
+
+    def collect(chunk_results):
+        nonlocal next_report
+        for task, variants in chunk_results:
+            if variants is None:
+                stats['skipped'] += 1
+                failed.add(task[0].name)
+                continue
+            results.put((task, variants))     # 쓰기가 밀리면 여기서 대기
+            stats['images'] += 1
+            stats['generated'] += int(task[2]) + len(variants)
+        done = stats['images'] + stats['skipped']
+        if done >= next_report or done == len(tasks):
+            next_report = done + progress_every
+            elapsed = time.perf_counter() - start
+            print(f"처리 중: {done}/{len(tasks)} ({done / elapsed:.1f} img/s, "
+                  f"{stats['generated'] / elapsed:.0f} 파일/s, 쓰기 대기 {results.qsize()})", flush=True)
+
+    try:
+        if workers == 1:
+            _init_worker(plan)
+            for chunk in chunks:
+                collect(augment_chunk(chunk))
+        else:
+            # 결과는 끝난 순서가 아니라 작업 순서대로 쓰기 큐에 넣음
+            # (샤드 레코드 순서/바이트가 --workers, --chunk-size와 상관없이 같게)
+            # 제출했거나 순서를 기다리는 청크 수를 워커 수의 2배로 제한 (결과가 메모리에 쌓이지 않게)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(plan,)) as pool:
+                pending, ready = {}, {}     # future → 청크 번호, 청크 번호 → 결과
+                next_chunk = 0
+
+                def drain(finished):
+                    nonlocal next_chunk
+                    for future in finished:
+                        ready[pending.pop(future)] = future.result()
+                    while next_chunk in ready:
+                        collect(ready.pop(next_chunk))
+                        next_chunk += 1
+
+                for number, chunk in enumerate(chunks):
+                    pending[pool.submit(augment_chunk, chunk)] = number
+                    while len(pending) + len(ready) >= workers * 2:
+                        drain(wait(pending, return_when=FIRST_COMPLETED)[0])
+                drain(wait(pending)[0])
+        completed = True
+    finally:
+        for _ in writer_threads:
+            results.put(None)
+        for thread in writer_threads:
+            thread.join()
+
+        if sink is not None and completed:
+            sink.close()
+        elif sink is not None:
+            sink.abort()        # 중간에 멈췄으면 이전 샤드를 그대로 둠
+        else:
+            # 끝까지 쓴 이미지와 할 일이 없던 이미지만 기록 (나머지는 다음 실행에서 다시 처리)
+            done = set(written)
+            scheduled = {task[0].name for task in tasks}
+            save_manifest({name: entry for name, entry in entries.items()
+                           if name in done or (name not in scheduled and name not in failed)})
+
+    for error in errors[:10]:
+        print(f"쓰기 실패: {error}")
+    stats['writeErrors'] = len(errors)
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    return stats
 
-    for idx, (img_path, label_path) in enumerate(pairs):
-        if idx % 100 == 0:
-            print(f"처리 중: {idx}/{len(pairs)}")
 
-        # 원본 이미지/라벨 읽기
-        img = cv2.imread(str(img_path))
-        if img is None:
-            continue
-
-        labels = label_path.read_text().strip().split('\n')
-        base_name = img_path.stem
-
-        # 1. 원본 복사
-        shutil.copy(img_path, OUTPUT_IMAGES_DIR / img_path.name)
-        shutil.copy(label_path, OUTPUT_LABELS_DIR / label_path.name)
-        total_generated += 1
-
-        # 2. 밝게
-        bright_img = apply_brightness_contrast(img, alpha=1.2, beta=20)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_bright.jpg"), bright_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_bright.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 3. 어둡게
-        dark_img = apply_brightness_contrast(img, alpha=0.8, beta=-20)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_dark.jpg"), dark_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_dark.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 4. 좌우 반전
-        flipped_img, flipped_labels = apply_horizontal_flip(img, labels)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_flip.jpg"), flipped_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_flip.txt").write_text('\n'.join(flipped_labels))
-        total_generated += 1
-
-        # 5. 모션 블러
-        blur_img = apply_motion_blur(img, size=7)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_blur.jpg"), blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_blur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 6. 색상 변화
-        color_img = apply_color_jitter(img)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_color.jpg"), color_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_color.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 7. 노이즈
-        noise_img = apply_gaussian_noise(img, var=15)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_noise.jpg"), noise_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_noise.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 8. 밝게 + 반전
-        bright_flipped, bright_flipped_labels = apply_horizontal_flip(bright_img, labels)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_bright_flip.jpg"), bright_flipped)
-        (OUTPUT_LABELS_DIR / f"{base_name}_bright_flip.txt").write_text('\n'.join(bright_flipped_labels))
-        total_generated += 1
-
-        # 9. 강한 모션 블러
-        strong_blur_img = apply_strong_motion_blur(img)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_strongblur.jpg"), strong_blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_strongblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 10. 수평 모션 블러
-        hblur_img = apply_motion_blur(img, size=9, direction='horizontal')
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_hblur.jpg"), hblur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_hblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 11. 부분 가림 (Cutout)
-        cutout_img = apply_cutout(img, num_holes=2, max_size=60)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_cutout.jpg"), cutout_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_cutout.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 12. 어둡게 + 모션 블러
-        dark_blur_img = apply_motion_blur(dark_img, size=7)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_dark_blur.jpg"), dark_blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_dark_blur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 13. 극강 모션 블러 (아주 빠른 움직임)
-        extreme_blur_img = apply_extreme_motion_blur(img)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_extremeblur.jpg"), extreme_blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_extremeblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 14. 약한 모션 블러 (느린 움직임)
-        mild_blur_img = apply_mild_motion_blur(img)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_mildblur.jpg"), mild_blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_mildblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 15. 줌 블러 (카메라 흔들림)
-        zoom_blur_img = apply_zoom_blur(img, strength=0.15)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_zoomblur.jpg"), zoom_blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_zoomblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 16. 이중 모션 블러 (복합 움직임)
-        double_blur_img = apply_double_motion_blur(img)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_doubleblur.jpg"), double_blur_img)
-        (OUTPUT_LABELS_DIR / f"{base_name}_doubleblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
-
-        # 17. 극강 블러 + 반전
-        extreme_blur_flipped, extreme_blur_flipped_labels = apply_horizontal_flip(extreme_blur_img, labels)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_extremeblur_flip.jpg"), extreme_blur_flipped)
-        (OUTPUT_LABELS_DIR / f"{base_name}_extremeblur_flip.txt").write_text('\n'.join(extreme_blur_flipped_labels))
-        total_generated += 1
-
-        # 18. 밝게 + 극강 블러
-        bright_extreme_blur = apply_extreme_motion_blur(bright_img)
-        cv2.imwrite(str(OUTPUT_IMAGES_DIR / f"{base_name}_bright_extremeblur.jpg"), bright_extreme_blur)
-        (OUTPUT_LABELS_DIR / f"{base_name}_bright_extremeblur.txt").write_text('\n'.join(labels))
-        total_generated += 1
+def main():
+    parser = argparse.ArgumentParser(description='라벨링 데이터 증강')
+    parser.add_argument('--recipe', default=DEFAULT_RECIPE, help='augment_recipes/ 안의 이름 또는 파일 경로')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='프로세스 수 (1: 순차 처리)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--writers', type=int, default=WRITER_THREADS, help='파일 쓰기 스레드 수')
+    parser.add_argument('--queue-size', type=int, default=WRITE_QUEUE_SIZE)
+    parser.add_argument('--force', action='store_true', help='이전 결과를 무시하고 전부 다시 생성')
+    parser.add_argument('--shards', action='store_true', help=f'{OUTPUT_SHARDS_DIR.name}/에 train/val 샤드로 저장')
+    args = parser.parse_args()
+
+    if not args.shards:
+        OUTPUT_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+        OUTPUT_LABELS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 이름순 정렬 (처리 순서와 상관없이 결과는 같지만 진행 로그를 재현 가능하게)
+    pairs = sorted(get_matched_pairs())
+    print(f"매칭된 이미지-라벨 쌍: {len(pairs)}개 (워커 {args.workers}개)")
+    if not pairs:
+        return
+
+    stats = run_augmentation(pairs, args.recipe, args.workers, args.chunk_size, args.writers, args.queue_size,
+                             args.force, shards=OUTPUT_SHARDS_DIR if args.shards else None)
 
     print(f"\n=== 증강 완료 ===")
-    print(f"원본 이미지: {len(pairs)}개")
-    print(f"증강 후 총: {total_generated}개 (약 {total_generated / len(pairs):.1f}배)")
+    print(f"원본 이미지: {len(pairs)}개 (읽기 실패 {stats['skipped']}개)")
+    print(f"새로 만든 파일: {stats['generated']}개, 재사용한 변형: {stats['reused']}개, "
+          f"삭제한 변형: {stats['removed']}개")
+    print(f"소요 시간: {stats['seconds']}s ({stats['images'] / max(stats['seconds'], 0.01):.1f} img/s), "
+          f"쓰기 실패 {stats['writeErrors']}개")
     print(f"저장 위치:")
-    print(f"  이미지: {OUTPUT_IMAGES_DIR}")
-    print(f"  라벨: {OUTPUT_LABELS_DIR}")
+    if args.shards:
+        print(f"  샤드: {OUTPUT_SHARDS_DIR}")
+    else:
+        print(f"  이미지: {OUTPUT_IMAGES_DIR}")
+        print(f"  라벨: {OUTPUT_LABELS_DIR}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+학습 중 증강 (augment_data.py 레시피를 샘플을 읽을 때 적용)
+- augmented_images/에 이미지당 18장을 쓰고 augmented_dataset/로 다시 링크하는 대신
+  원본 이미지/라벨만 데이터셋으로 두고, 학습 데이터셋이 (원본 번호, 변형) 샘플을 만듦
+- 샘플 목록: 원본 이미지마다 원본 1개 + 레시피에서 선택된 변형 (augment_data.py와 같은 선택)
+- 에포크별 고정 시드: 샘플마다 읽은 횟수(= 에포크)를 프로세스 공유 카운터로 세고
+  이미지 시드 = hash(이미지 이름, 레시피 시드, 에포크) → 워커 수/읽는 순서와 상관없이 같은 결과
+- 비싼 연산만 캐시: 경로에 난수 연산이 없는 노드는 에포크마다 결과가 같으므로
+  cache_ops(기본: 블러)의 결과를 워커 프로세스마다 LRU(cache_mb)로 보관,
+  난수 연산(색상/노이즈/가림/무작위 블러)은 매번 계산
+- 검증 데이터셋은 원본만 (변형 없이 평가)
+
+레시피 연산은 ultralytics가 학습 크기(imgsz)로 줄인 이미지에 적용 (블러 커널 크기도 그 해상도 기준)
+detect 라벨(클래스 + 박스)만 지원
+
+data.yaml의 train/val이 샤드 인덱스(dataset_shards.py, *.index.json)면
+이미지/라벨 파일 대신 샤드에서 읽음 (ShardYOLODataset, recipe=None이면 증강 없이 샤드만),
+레터박스 캐시 목록(letterbox_cache.py, *.cache.json)이면 디코드 없이 memmap 슬롯을 읽음 (LetterboxCacheDataset)
+
+사용법:
+    model.train(data=..., trainer=augmentation_trainer('default'))
+    model.train(data='augmented_shards/data.yaml', trainer=augmentation_trainer(None))
+    python3 train_augmented.py --on-the-fly [--shards]
+"""
+
+import math
+import multiprocessing
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import cv2
+import numpy as np
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+
+import photometric_ops
+import yolo_labels
+from augment_data import OPS, OPS_VERSION, image_seed
+from augment_recipe import DEFAULT_RECIPE, compile_recipe, load_recipe
+from dataset_shards import ShardReader, is_shard_index
+from letterbox_cache import CacheReader, is_cache_index
+
+# 노드 시드로 결과가 달라지는 연산 (경로에 하나라도 있으면 캐시하지 않음)
+RANDOM_OPS = {'random_motion_blur', 'color_jitter', 'gaussian_noise', 'cutout'}
+EXPENSIVE_OPS = ('motion_blur', 'double_motion_blur', 'zoom_blur')
+CACHE_MB = 512      # 워커 프로세스마다
+
+
+class NodeCache:
+    """(원본 번호, 연산 경로) → (img, labels) LRU (바이트 상한, 프로세스마다 하나)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.pid = os.getpid()
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        img, labels = item
+        return img.copy(), labels      # ultralytics 변환이 이미지를 제자리에서 바꾸는 경우가 있음
+
+    def put(self, key, value):
+        img, labels = value
+        if img.nbytes > self.max_bytes:
+            return
+        self.items[key] = (img.copy(), list(labels))
+        self.bytes += img.nbytes
+        while self.bytes > self.max_bytes:
+            _, (old, _) = self.items.popitem(last=False)
+            self.bytes -= old.nbytes
+
+
+class _ImageStore:
+    """RecipePlan.run의 store (이미지 하나 분, 캐시할 노드만 통과)"""
+
+    def __init__(self, cache, index, cacheable):
+        self.cache = cache
+        self.index = index
+        self.cacheable = cacheable
+
+    def get(self, node):
+        return self.cache.get((self.index, node.key)) if self.cacheable(node) else None
+
+    def put(self, node, result):
+        if self.cacheable(node):
+            self.cache.put((self.index, node.key), result)
+
+
+class AugmentedYOLODataset(YOLODataset):
+    """원본 이미지 + 레시피 변형을 샘플로 내는 YOLODataset (augment=True일 때만 변형 추가)"""
+
+    def __init__(self, *args, recipe=DEFAULT_RECIPE, cache_ops=EXPENSIVE_OPS, cache_mb=CACHE_MB, **kwargs):
+        self.plan = compile_recipe(load_recipe(recipe) if isinstance(recipe, str) else recipe, OPS, OPS_VERSION)
+        self.cache_ops = set(cache_ops)
+        self.cache_bytes = int(cache_mb * 1024 * 1024)
+        super().__init__(*args, **kwargs)
+        if self.use_segments or self.use_keypoints:
+            raise ValueError('학습 중 증강은 detect 라벨만 지원합니다')
+
+        self.samples = []       # (원본 번호, 변형 이름 또는 None)
+        self.variants_of = []   # 원본 번호 → [None, 선택된 변형 ...]
+        for index, label in enumerate(self.labels):
+            name = Path(label['im_file']).name
+            options = [None]
+            if self.augment:
+                options += [variant for variant in self.plan.variants if self.plan.selected(name, variant)]
+            self.variants_of.append(options)
+            self.samples += [(index, variant) for variant in options]
+
+        self._visits = multiprocessing.Array('I', len(self.samples))   # 샘플별 읽은 횟수 (워커 공유)
+        self._epoch = 0
+        self._sample = None     # 지금 읽는 샘플 번호 (짝 이미지 변형 선택용)
+        self._main = False      # 다음 get_image_and_label 호출이 그 샘플 자신인지
+        self._active = None
+        self._cache = None
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        with self._visits.get_lock():
+            epoch = self._visits[index]
+            self._visits[index] = epoch + 1
+        self._epoch, self._sample, self._main = epoch, index, True
+        try:
+            return super().__getitem__(index)
+        finally:
+            self._sample, self._main = None, False
+
+    def get_image_and_label(self, index):
+        # ultralytics __getitem__은 샘플 자신을 먼저 읽고, 그다음 변환(mosaic/mixup)이 짝을 읽음
+        # 짝 번호는 다른 번호 체계(버퍼의 원본 번호)라 샘플 번호와 비교하면 안 됨
+        if self._main:
+            self._main = False
+            real, variant = self.samples[index]
+        else:
+            # mosaic/mixup 짝 이미지: ultralytics가 고른 번호(버퍼의 원본 번호)의 변형 중 하나
+            real = index if index < len(self.labels) else self.samples[index][0]
+            options = self.variants_of[real]
+            variant = options[image_seed(f'{self._sample}:{index}', self._epoch) % len(options)]
+        self._active = (real, variant)
+        try:
+            return super().get_image_and_label(real)
+        finally:
+            self._active = None
+
+    def update_labels_info(self, label):
+        # get_image_and_label → (이미지 로드) → update_labels_info 순서, 여기서 박스가 Instances로 바뀜
+        if self._active is not None and self._active[1] is not None:
+            label['img'], label['cls'], label['bboxes'] = self._apply(*self._active, label)
+        return super().update_labels_info(label)
+
+    def _apply(self, real, variant, label):
+        lines = yolo_labels.to_lines(np.concatenate([label['cls'], label['bboxes']], axis=1))
+        seed = image_seed(Path(label['im_file']).name, f'{self.plan.seed}:{self._epoch}')
+        store = _ImageStore(self._node_cache(), real, self._cacheable) if self.cache_bytes else None
+        img, lines = self.plan.run(label['img'], lines, seed, [variant], OPS, photometric_ops.reseed, store)[variant]
+        rows = yolo_labels.parse(lines)
+        return img, rows[:, :1], rows[:, 1:]
+
+    def _cacheable(self, node):
+        return node.op['op'] in self.cache_ops and all(
+            op['op'] not in RANDOM_OPS and float(op.get('p', 1.0)) >= 1 for op in node.path)
+
+    def _node_cache(self):
+        # DataLoader 워커마다 따로 (fork로 넘어온 부모 캐시는 버림)
+        if self._cache is None or self._cache.pid != os.getpid():
+            self._cache = NodeCache(self.cache_bytes)
+        return self._cache
+
+
+class ShardYOLODataset(YOLODataset):
+    """샤드 인덱스 파일에서 읽는 YOLODataset (이미지/라벨 파일 목록과 라벨 캐시 없이)"""
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('cache') == 'disk':
+            kwargs['cache'] = None      # .npy를 쓸 이미지 폴더가 없음 (샤드 자체가 순차 파일)
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        self.shards = ShardReader(img_path)
+        # 로그/라벨 dict용 이름 (실제 파일은 아님), rect 정렬 후에도 레코드를 찾을 수 있게 이름 → 번호
+        im_files = [str(self.shards.root / name) for name in self.shards.names]
+        self._records = {im_file: i for i, im_file in enumerate(im_files)}
+        return _take_fraction(im_files, self.fraction)
+
+    def get_labels(self):
+        labels = []
+        for im_file in self.im_files:
+            index = self._records[im_file]
+            rows = yolo_labels.parse(self.shards.label_text(index))
+            labels.append({'im_file': im_file, 'shape': self.shards.shape(index), 'cls': rows[:, :1],
+                           'bboxes': rows[:, 1:], 'segments': [], 'keypoints': None,
+                           'normalized': True, 'bbox_format': 'xywh'})
+        return labels
+
+    def load_image(self, i, rect_mode=True, resize_short=False):
+        """ultralytics BaseDataset.load_image과 같은 크기 조정/mosaic 버퍼 (파일 대신 샤드에서 디코드)"""
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+        im = self.shards.read_image(self._records[self.im_files[i]])
+        if im is None:
+            raise FileNotFoundError(f'샤드 이미지를 디코드할 수 없습니다: {self.im_files[i]}')
+        h0, w0 = im.shape[:2]
+        if rect_mode and resize_short:
+            r = self.imgsz / min(h0, w0)
+            if r != 1:
+                w, h = (math.ceil(w0 * r), self.imgsz) if h0 < w0 else (self.imgsz, math.ceil(h0 * r))
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif rect_mode:
+            r = self.imgsz / max(h0, w0)
+            if r != 1:
+                w, h = min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz)
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif not (h0 == w0 == self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        return _remember(self, i, im, (h0, w0))
+
+
+def _take_fraction(im_files, fraction):
+    """ultralytics get_img_files의 fraction 처리 (비율, 8.4부터는 정수면 이미지 수)"""
+    count = fraction if isinstance(fraction, int) else max(1, round(len(im_files) * fraction))
+    return im_files[:count]
+
+
+def _remember(dataset, i, im, hw0):
+    """ultralytics load_image의 mosaic 버퍼 처리 (학습 중에는 최근 이미지를 보관, mosaic가 짝을 여기서 고름)
+    cache='ram'이면 cache_images가 ims를 채우므로 버퍼에 넣지 않음"""
+    if dataset.augment and dataset.cache != 'ram':
+        dataset.ims[i], dataset.im_hw0[i], dataset.im_hw[i] = im, hw0, im.shape[:2]
+        dataset.buffer.append(i)
+        if 1 < len(dataset.buffer) >= dataset.max_buffer_length:
+            j = dataset.buffer.pop(0)
+            if dataset.cache != 'ram':
+                dataset.ims[j], dataset.im_hw0[j], dataset.im_hw[j] = None, None, None
+    return im, hw0, im.shape[:2]
+
+
+class LetterboxCacheDataset(YOLODataset):
+    """레터박스 캐시 목록(*.cache.json)에서 읽는 YOLODataset (이미지는 이미 imgsz×imgsz, 라벨도 그 좌표)"""
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('cache') == 'disk':
+            kwargs['cache'] = None      # 이미 디코드된 캐시
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        self.cached = CacheReader(img_path)
+        if self.cached.imgsz != self.imgsz:
+            raise ValueError(f'캐시 해상도({self.cached.imgsz})와 학습 imgsz({self.imgsz})가 다릅니다: {img_path}')
+        im_files = [str(self.cached.path.parent / name) for name in self.cached.names]
+        self._records = {im_file: i for i, im_file in enumerate(im_files)}
+        return _take_fraction(im_files, self.fraction)
+
+    def get_labels(self):
+        labels = []
+        shape = (self.cached.imgsz, self.cached.imgsz)
+        for im_file in self.im_files:
+            rows = self.cached.labels(self._records[im_file])
+            labels.append({'im_file': im_file, 'shape': shape, 'cls': rows[:, :1], 'bboxes': rows[:, 1:],
+                           'segments': [], 'keypoints': None, 'normalized': True, 'bbox_format': 'xywh'})
+        return labels
+
+    def load_image(self, i, rect_mode=True, resize_short=False):
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+        im = self.cached.image(self._records[self.im_files[i]])
+        return _remember(self, i, im, im.shape[:2])
+
+
+class AugmentedShardDataset(AugmentedYOLODataset, ShardYOLODataset):
+    """샤드에서 읽는 원본 + 학습 중 레시피 변형"""
+
+
+class AugmentedCacheDataset(AugmentedYOLODataset, LetterboxCacheDataset):
+    """레터박스 캐시 원본 + 학습 중 레시피 변형"""
+
+
+def dataset_class(img_path, augmented=False):
+    """데이터 경로 종류(이미지 폴더 / 샤드 / 레터박스 캐시) → 데이터셋 클래스 (None: ultralytics 기본)"""
+    if is_cache_index(img_path):
+        return AugmentedCacheDataset if augmented else LetterboxCacheDataset
+    if is_shard_index(img_path):
+        return AugmentedShardDataset if augmented else ShardYOLODataset
+    return AugmentedYOLODataset if augmented else None
+
+
+def augmentation_trainer(recipe=DEFAULT_RECIPE, cache_ops=EXPENSIVE_OPS, cache_mb=CACHE_MB):
+    """model.train(trainer=...)에 넘길 DetectionTrainer
+
+    학습 데이터셋은 recipe가 있으면 레시피 변형 추가,
+    샤드 인덱스/레터박스 캐시 경로(train/val)는 그 형식에서 읽음 (dataset_class)
+    """
+
+    class AugmentationTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode='train', batch=None):
+            train = mode == 'train'
+            augmented = bool(train and recipe)
+            cls = dataset_class(img_path, augmented)
+            if cls is None:
+                return super().build_dataset(img_path, mode, batch)
+            extra = {'recipe': recipe, 'cache_ops': cache_ops, 'cache_mb': cache_mb} if augmented else {}
+            # ultralytics build_yolo_dataset과 같은 인자 (de_parallel/unwrap_model은 버전마다 이름이 달라서 직접 풂)
+            model = getattr(self.model, 'module', self.model)
+            stride = max(int(model.stride.max() if model else 0), 32)
+            return cls(
+                img_path=img_path, imgsz=self.args.imgsz, batch_size=batch, augment=train, hyp=self.args,
+                rect=self.args.rect or not train, cache=self.args.cache or None,
+                single_cls=self.args.single_cls or False, stride=stride, pad=0.0 if train else 0.5,
+                prefix=colorstr(f'{mode}: '), task=self.args.task, classes=self.args.classes, data=self.data,
+                fraction=self.args.fraction if train else 1.0, **extra)
+
+    return AugmentationTrainer
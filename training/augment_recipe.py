@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+증강 레시피 (JSON/YAML) → 연산 DAG
+- 변형(variant)마다 연산 목록(ops)과 생성 확률(p)
+- 앞부분 연산이 같은 변형끼리는 중간 결과를 공유 (bright → bright_flip, bright_extremeblur)
+- 노드마다 (이미지 시드, 연산 경로)로 정한 시드 → 다른 변형을 추가/삭제해도 나머지 결과는 그대로
+- 변형 서명(시드 + 연산 경로 + 확률)으로 이전 실행과 비교해서 바뀐 변형만 다시 계산
+  (augment_data.py 매니페스트)
+
+레시피 형식 (augment_recipes/*.json, PyYAML이 있으면 .yaml도 가능):
+    {"seed": 0,
+     "variants": [
+        {"name": "bright", "ops": [{"op": "brightness", "alpha": 1.2, "beta": 20}]},
+        {"name": "bright_flip", "from": "bright", "ops": [{"op": "hflip"}]},
+        {"name": "cutout", "p": 0.5, "ops": [{"op": "cutout", "num_holes": 2, "max_size": 60}]}]}
+
+    "from": 다른 변형의 연산 목록을 앞에 붙임 (그 변형의 결과에서 이어서 계산)
+    변형의 "p": 이미지마다 이 변형을 만들 확률
+    연산의 "p": 연산을 적용할 확률 (적용 안 하면 입력을 그대로 넘김)
+
+사용법:
+    python3 augment_recipe.py default      # 컴파일 결과 (노드 수, 공유되는 중간 결과) 출력
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+RECIPES_DIR = Path(__file__).parent / 'augment_recipes'
+DEFAULT_RECIPE = 'default'
+
+
+class RecipeError(ValueError):
+    pass
+
+
+def _hash(text, digest_size=8):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=digest_size).hexdigest()
+
+
+def _fraction(text):
+    """문자열 → [0, 1) 고정 값"""
+    return int(_hash(text), 16) / 2 ** 64
+
+
+def load_recipe(name_or_path=DEFAULT_RECIPE):
+    """레시피 파일 경로 또는 augment_recipes/ 안의 이름 → dict"""
+    path = Path(name_or_path)
+    if not path.exists():
+        for suffix in ('.json', '.yaml', '.yml'):
+            candidate = RECIPES_DIR / f'{name_or_path}{suffix}'
+            if candidate.exists():
+                path = candidate
+                break
+        else:
+            raise RecipeError(f'레시피를 찾을 수 없습니다: {name_or_path}')
+
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        if yaml is None:
+            raise RecipeError('YAML 레시피에는 PyYAML이 필요합니다. (pip install pyyaml)')
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+class RecipeNode:
+    """연산 하나 (parent 결과에 op를 적용), key는 루트부터의 연산 경로"""
+
+    def __init__(self, op, parent):
+        self.op = op
+        self.parent = parent
+        self.children = []
+        self.path = [*(parent.path if parent else []), op]
+        self.key = json.dumps(self.path, sort_keys=True)
+
+
+class RecipePlan:
+    """컴파일된 레시피 (프로세스 풀 워커로 넘길 수 있게 피클 가능한 값만 보관)"""
+
+    def __init__(self, recipe, ops, version=''):
+        """
+        Args:
+            recipe: load_recipe() 결과
+            ops: 연산 이름 → fn(img, labels, **params) → (img, labels)
+            version: 연산 구현 버전 (변형 서명에 포함)
+        """
+        self.seed = int(recipe.get('seed', 0))
+        self.nodes = {}         # key → RecipeNode (같은 연산 경로는 노드 하나)
+        self.variants = {}      # name → (마지막 노드, p)
+        self.signatures = {}    # name → 서명
+        chains = {}
+
+        for variant in recipe.get('variants', []):
+            name = variant.get('name')
+            if not name or name in chains:
+                raise RecipeError(f'변형 이름이 없거나 중복됨: {name!r}')
+            chain = []
+            if 'from' in variant:
+                if variant['from'] not in chains:
+                    raise RecipeError(f'{name}: from은 앞에 정의된 변형이어야 합니다 ({variant["from"]})')
+                chain = list(chains[variant['from']])
+            for op in variant.get('ops', []):
+                if op.get('op') not in ops:
+                    raise RecipeError(f'{name}: 알 수 없는 연산 {op.get("op")!r} (가능: {", ".join(sorted(ops))})')
+                chain.append(dict(op))
+            if not chain:
+                raise RecipeError(f'{name}: 연산이 없습니다')
+            chains[name] = chain
+
+            node = None
+            for op in chain:
+                child = RecipeNode(op, node)
+                if child.key in self.nodes:
+                    child = self.nodes[child.key]
+                else:
+                    self.nodes[child.key] = child
+                    if node is not None:
+                        node.children.append(child)
+                node = child
+
+            p = float(variant.get('p', 1.0))
+            self.variants[name] = (node, p)
+            self.signatures[name] = _hash(json.dumps({'seed': self.seed, 'ops': chain, 'p': p,
+                                                      'version': version}, sort_keys=True), 16)
+
+    @property
+    def shared(self):
+        """결과를 두 곳 이상에서 쓰는 노드 수 (자식 노드 + 변형 출력)"""
+        ends = [end for end, _ in self.variants.values()]
+        return sum(1 for node in self.nodes.values()
+                   if len(node.children) + sum(end is node for end in ends) > 1)
+
+    def selected(self, image_name, name):
+        """이 이미지에서 변형을 만들지 (변형 p, 이미지 이름으로 고정)"""
+        p = self.variants[name][1]
+        return p >= 1 or _fraction(f'{self.seed}:{image_name}:{name}') < p
+
+    def run(self, img, labels, image_seed, names, ops, reseed, store=None):
+        """필요한 변형만 계산 → {name: (img, labels)}
+
+        Args:
+            image_seed: 이미지별 시드 (노드 시드 = hash(image_seed, 연산 경로))
+            reseed: reseed(seed) - 연산 전에 난수 상태를 노드 시드로 맞추는 함수
+            store: 실행 사이에 노드 결과를 보관하는 곳 (store.get(node) → 결과 또는 None,
+                   store.put(node, result)), 어떤 노드를 보관할지는 store가 정함
+        """
+        cache = {}
+
+        def evaluate(node):
+            if node.key in cache:
+                return cache[node.key]
+            result = store.get(node) if store is not None else None
+            if result is None:
+                source = evaluate(node.parent) if node.parent is not None else (img, labels)
+                params = {k: v for k, v in node.op.items() if k not in ('op', 'p')}
+                node_seed = int(_hash(f'{image_seed}:{node.key}'), 16) & 0xFFFFFFFF
+                p = float(node.op.get('p', 1.0))
+                if p < 1 and _fraction(f'{node_seed}:p') >= p:
+                    result = source
+                else:
+                    reseed(node_seed)
+                    result = ops[node.op['op']](*source, **params)
+                if store is not None:
+                    store.put(node, result)
+            cache[node.key] = result
+            return result
+
+        return {name: evaluate(self.variants[name][0]) for name in names}
+
+
+def compile_recipe(recipe, ops, version=''):
+    return RecipePlan(recipe, ops, version)
+
+
+def main():
+    from augment_data import OPS, OPS_VERSION
+
+    name = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RECIPE
+    plan = compile_recipe(load_recipe(name), OPS, OPS_VERSION)
+    chain_ops = sum(len(node.path) for node, _ in plan.variants.values())
+    print(f'변형 {len(plan.variants)}개, 연산 노드 {len(plan.nodes)}개 '
+          f'(공유 없이 계산하면 {chain_ops}회), 공유 중간 결과 {plan.shared}개')
+    for variant, (node, p) in plan.variants.items():
+        ops = ' → '.join(op['op'] for op in node.path)
+        print(f'  {variant:<20} p={p:<4} {ops}')
+
+
+if __name__ == '__main__':
+    main()
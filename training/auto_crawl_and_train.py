@@ -9,10 +9,13 @@
 
 import subprocess
 import os
+import sys
 from pathlib import Path
 import shutil
 import random
 
+import yolo_labels
+
 TRAINING_DIR = Path(__file__).parent
 OUTPUT_DIR = TRAINING_DIR / "crawled_data"
 FRAMES_DIR = OUTPUT_DIR / "frames"
@@ -174,19 +177,16 @@ def create_pseudo_labels():
             # YOLO 형식으로 라벨 저장
             label_path = labels_dir / f"{frame.stem}.txt"
 
-            with open(label_path, "w") as f:
-                for result in results:
-                    if result.boxes is not None:
-                        for box in result.boxes:
-                            if box.conf >= 0.5:  # 신뢰도 0.5 이상만
-                                # YOLO 형식: class cx cy w h (정규화)
-                                x1, y1, x2, y2 = box.xyxyn[0].tolist()
-                                cx = (x1 + x2) / 2
-                                cy = (y1 + y2) / 2
-                                w = x2 - x1
-                                h = y2 - y1
-                                f.write(f"0 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
-                                labeled_count += 1
+            boxes = []
+            for result in results:
+                if result.boxes is not None:
+                    for box in result.boxes:
+                        if box.conf >= 0.5:  # 신뢰도 0.5 이상만
+                            # YOLO 형식: class cx cy w h (정규화)
+                            x1, y1, x2, y2 = box.xyxyn[0].tolist()
+                            boxes.append(((x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1))
+            yolo_labels.write(label_path, yolo_labels.from_boxes(boxes))
+            labeled_count += len(boxes)
 
         print(f"자동 라벨링 완료: {labeled_count}개 바운딩 박스")
         return True
@@ -236,8 +236,8 @@ def merge_datasets():
     total = len(list(train_images.glob("*.jpg"))) + len(list(train_images.glob("*.png")))
     print(f"총 학습 이미지: {total}개")
 
-def retrain():
-    """추가 데이터로 재학습"""
+def retrain(cache=False):
+    """추가 데이터로 재학습 (cache: 레터박스 캐시에서 읽음)"""
     print("\n" + "=" * 50)
     print("모델 재학습")
     print("=" * 50)
@@ -259,7 +259,11 @@ def retrain():
             model = YOLO("yolov8n.pt")
             print("새 모델 학습")
 
+        from letterbox_cache import cached_training_args
+        data_yaml, trainer = cached_training_args(data_yaml, 320, cache)
+
         results = model.train(
+            trainer=trainer,
             data=str(data_yaml),
             epochs=50,  # 추가 학습이므로 적은 에포크
             imgsz=320,
@@ -312,7 +316,7 @@ def main():
     merge_datasets()
 
     # 4. 재학습
-    retrain()
+    retrain(cache='--cache' in sys.argv)
 
     print("\n" + "=" * 60)
     print("완료!")
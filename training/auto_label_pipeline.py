@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+YOLO 자동 라벨링 파이프라인
+- 디코딩: 스레드 풀에서 이미지를 미리 읽어 둠 (prefetch)
+- 추론: 디코딩된 이미지를 고정 크기 배치로 묶어 한 번에 model() 호출
+- 쓰기: 별도 스레드에서 라벨 파일을 쓰고, 메타데이터/카탈로그 갱신은 모아서 한 번에 반영
+
+디코딩 → 추론 → 쓰기가 서로 겹쳐서 진행되므로 CPU 전용 환경에서도
+이미지 한 장씩 처리하던 방식보다 처리량이 높습니다.
+
+사용법 (처리량 측정):
+    python3 auto_label_pipeline.py --model runs/detect/barbell_endpoint/weights/best.pt
+    python3 auto_label_pipeline.py --model best.pt --images labeling_images_new --batch 16 --workers 4
+"""
+
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yolo_labels
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+BATCH_SIZE = 8
+DECODE_WORKERS = 2
+CONFIDENCE = 0.3
+WRITE_FLUSH_EVERY = 50
+
+
+def decode_image(path):
+    """BGR 이미지 (cv2가 없거나 읽기 실패 시 경로를 그대로 넘겨 모델이 디코딩)"""
+    if cv2 is None:
+        return str(path)
+    image = cv2.imread(str(path))
+    return image if image is not None else str(path)
+
+
+def result_boxes(result):
+    """ultralytics 결과 → 정규화된 (cx, cy, w, h) 목록"""
+    if result.boxes is None or len(result.boxes) == 0:
+        return []
+    return result.boxes.xywhn.cpu().numpy().tolist()
+
+
+class YoloLabelWriter:
+    """라벨 파일 쓰기 + 메타데이터/카탈로그 일괄 갱신"""
+
+    def __init__(self, labels_dir, label_meta=None, catalog=None, label_type='auto',
+                 flush_every=WRITE_FLUSH_EVERY):
+        self.labels_dir = Path(labels_dir)
+        self.labels_dir.mkdir(parents=True, exist_ok=True)
+        self.label_type = label_type
+        self.catalog = catalog
+        self.flush_every = flush_every
+        self._meta_batch = label_meta.batch(flush_every) if label_meta is not None else None
+        self._catalog_batch = []
+
+    def write(self, image_path, boxes):
+        """라벨 파일 저장 → 라벨 개수"""
+        stem = Path(image_path).stem
+        yolo_labels.write(self.labels_dir / f'{stem}.txt', yolo_labels.from_boxes(boxes))
+
+        if self._meta_batch is not None and boxes:
+            self._meta_batch.set(stem, self.label_type)
+        if self.catalog is not None:
+            self._catalog_batch.append((stem, len(boxes), self.label_type))
+            if len(self._catalog_batch) >= self.flush_every:
+                self._flush_catalog()
+        return len(boxes)
+
+    def _flush_catalog(self):
+        if self._catalog_batch:
+            self.catalog.set_labels_many(self._catalog_batch)
+            self._catalog_batch = []
+
+    def flush(self):
+        if self._meta_batch is not None:
+            self._meta_batch.flush()
+        if self.catalog is not None:
+            self._flush_catalog()
+
+
+class AutoLabelPipeline:
+    """디코딩 스레드 풀 → 배치 추론 → 쓰기 스레드"""
+
+    def __init__(self, model, batch_size=BATCH_SIZE, decode_workers=DECODE_WORKERS,
+                 conf=CONFIDENCE):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.decode_workers = max(1, decode_workers)
+        self.conf = conf
+        self.stats = {}
+
+    def _decoded(self, paths, pool, should_stop):
+        """순서를 유지하면서 batch_size * 2장까지 미리 디코딩"""
+        prefetch = self.batch_size * 2
+        pending = deque()
+        it = iter(paths)
+
+        def refill():
+            while len(pending) < prefetch:
+                try:
+                    path = next(it)
+                except StopIteration:
+                    return
+                pending.append((path, pool.submit(decode_image, path)))
+
+        refill()
+        while pending:
+            if should_stop():
+                for _, future in pending:
+                    future.cancel()
+                return
+            path, future = pending.popleft()
+            image = future.result()
+            refill()
+            yield path, image
+
+    def _batches(self, decoded):
+        batch = []
+        for item in decoded:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, image_paths, writer, on_image=None, should_stop=None):
+        """image_paths 전체 라벨링
+
+        Args:
+            writer: write(path, boxes) → 라벨 개수, flush() 를 가진 객체
+            on_image: 이미지마다 호출 on_image(path, label_count)
+            should_stop: True를 반환하면 다음 배치부터 중단
+
+        Returns:
+            dict: images, labels, seconds, imagesPerSec, inferSeconds, stopped
+        """
+        should_stop = should_stop or (lambda: False)
+        write_queue = queue.Queue(maxsize=4)
+        totals = {'images': 0, 'labels': 0}
+        write_error = []
+
+        def write_loop():
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    break
+                if write_error:
+                    continue
+                try:
+                    for path, boxes in item:
+                        count = writer.write(path, boxes)
+                        totals['images'] += 1
+                        totals['labels'] += count
+                        if on_image is not None:
+                            on_image(path, count)
+                except Exception as e:
+                    write_error.append(e)
+
+        start = time.perf_counter()
+        infer_seconds = 0.0
+        stopped = False
+        writer_thread = threading.Thread(target=write_loop, name='auto-label-writer', daemon=True)
+        writer_thread.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.decode_workers,
+                                    thread_name_prefix='auto-label-decode') as pool:
+                for batch in self._batches(self._decoded(image_paths, pool, should_stop)):
+                    if should_stop() or write_error:
+                        stopped = True
+                        break
+                    t0 = time.perf_counter()
+                    results = self.model([image for _, image in batch], verbose=False, conf=self.conf)
+                    infer_seconds += time.perf_counter() - t0
+                    write_queue.put([(path, result_boxes(result))
+                                     for (path, _), result in zip(batch, results)])
+                else:
+                    stopped = should_stop()
+        finally:
+            write_queue.put(None)
+            writer_thread.join()
+            writer.flush()
+
+        if write_error:
+            raise write_error[0]
+
+        seconds = time.perf_counter() - start
+        self.stats = {
+            'images': totals['images'],
+            'labels': totals['labels'],
+            'seconds': round(seconds, 3),
+            'imagesPerSec': round(totals['images'] / seconds, 2) if seconds > 0 else 0.0,
+            'inferSeconds': round(infer_seconds, 3),
+            'batchSize': self.batch_size,
+            'decodeWorkers': self.decode_workers,
+            'stopped': stopped,
+        }
+        return self.stats
+
+
+class _DryRunWriter:
+    """처리량 측정용 (파일을 쓰지 않음)"""
+
+    def write(self, path, boxes):
+        return len(boxes)
+
+    def flush(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='자동 라벨링 파이프라인 처리량 측정')
+    parser.add_argument('--model', required=True, help='YOLO 가중치 (.pt)')
+    parser.add_argument('--images', default=str(Path(__file__).parent / 'labeling_images_new'))
+    parser.add_argument('--limit', type=int, default=200, help='측정에 사용할 이미지 수')
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, BATCH_SIZE])
+    parser.add_argument('--workers', type=int, nargs='+', default=[DECODE_WORKERS])
+    parser.add_argument('--conf', type=float, default=CONFIDENCE)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    model = YOLO(args.model)
+
+    paths = sorted(p for p in Path(args.images).iterdir()
+                   if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:args.limit]
+    if not paths:
+        print(f'이미지가 없습니다: {args.images}')
+        return
+
+    # 첫 호출의 초기화 비용 제외
+    model([decode_image(paths[0])], verbose=False, conf=args.conf)
+
+    print(f"{'batch':>6}{'workers':>9}{'images':>8}{'img/s':>9}{'infer(s)':>10}{'total(s)':>10}")
+    for batch_size in args.batch:
+        for workers in args.workers:
+            pipeline = AutoLabelPipeline(model, batch_size, workers, args.conf)
+            stats = pipeline.run(paths, _DryRunWriter())
+            print(f"{batch_size:>6}{workers:>9}{stats['images']:>8}{stats['imagesPerSec']:>9.2f}"
+                  f"{stats['inferSeconds']:>10.2f}{stats['seconds']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
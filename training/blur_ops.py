@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+증강용 블러 연산 (augment_data.py)
+- 모션 블러 커널은 (크기, 방향)별로 한 번만 만들어서 재사용
+- 수직/수평 모션 블러와 이중 블러(수직 → 수평)는 박스 필터(cv2.blur)
+  → 누적합 기반이라 커널 크기와 상관없이 픽셀당 비용이 같음 (filter2D는 크기²)
+- 대각선 모션 블러는 테두리를 붙인 이미지를 대각선으로 밀면서 uint16 버퍼에 더함 (크기에 비례)
+- 줌 블러는 warpAffine 4회 대신 중앙 크롭 resize + accumulateWeighted, 버퍼는 크기별로 재사용
+  (확대만 하므로 테두리 처리가 필요 없음, 크롭 경계가 정수 픽셀이라 최대 0.5px 차이)
+
+모션 블러는 기존 filter2D 구현과 반올림 정도(±1)만 다르고, 줌 블러는 근사
+(벤치마크에서 기존 구현과의 최대/평균 차이 출력)
+
+사용법 (기존 구현 대비 처리량):
+    python3 blur_ops.py --widths 640 1280 --repeat 20
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+ZOOM_STEPS = 4
+ZOOM_WEIGHT = 0.2   # 단계마다 누적 이미지 0.8 + 확대 이미지 0.2
+
+
+@lru_cache(maxsize=64)
+def motion_kernel(size, direction):
+    """모션 블러 커널 (읽기 전용, (크기, 방향)별 캐시)"""
+    kernel = np.zeros((size, size), np.float32)
+    if direction == 'vertical':
+        kernel[:, size // 2] = 1 / size
+    elif direction == 'horizontal':
+        kernel[size // 2, :] = 1 / size
+    elif direction == 'diagonal':
+        np.fill_diagonal(kernel, 1 / size)
+    kernel.setflags(write=False)
+    return kernel
+
+
+def motion_blur(img, size=5, direction='vertical'):
+    """모션 블러 (수직/수평은 1차원 박스 필터, 대각선은 이동 합)"""
+    if direction == 'vertical':
+        return cv2.blur(img, (1, size))
+    if direction == 'horizontal':
+        return cv2.blur(img, (size, 1))
+    if direction == 'diagonal' and img.dtype == np.uint8 and size <= 256:
+        return _diagonal_blur(img, size)
+    return cv2.filter2D(img, -1, motion_kernel(size, direction))
+
+
+def _diagonal_blur(img, size):
+    """대각선 커널 filter2D와 같은 결과 (앵커 = 중앙, BORDER_REFLECT_101)"""
+    h, w = img.shape[:2]
+    r = size // 2
+    padded = cv2.copyMakeBorder(img, r, size - 1 - r, r, size - 1 - r, cv2.BORDER_REFLECT_101)
+    acc = _buffer('diagonal', img.shape, np.uint16)     # 256 * 255 < 65536
+    np.copyto(acc, padded[:h, :w])
+    for k in range(1, size):
+        acc += padded[k:k + h, k:k + w]
+    acc += size // 2                                     # 반올림
+    return (acc // size).astype(np.uint8)
+
+
+def double_motion_blur(img, vertical=7, horizontal=5):
+    """수직 → 수평 모션 블러 (두 박스 필터를 합친 2차원 박스 필터 한 번)"""
+    return cv2.blur(img, (horizontal, vertical))
+
+
+_buffers = {}
+
+
+def _buffer(key, shape, dtype):
+    """크기별 작업 버퍼 (프로세스마다 하나, 반환 이미지로는 쓰지 않음)"""
+    buf = _buffers.get(key)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = _buffers[key] = np.empty(shape, dtype)
+    return buf
+
+
+def zoom_blur(img, strength=0.1):
+    """줌 블러 (중앙 기준 ZOOM_STEPS 단계 확대 이미지를 지수 가중 누적)"""
+    h, w = img.shape[:2]
+    acc = _buffer('acc', img.shape, np.float32)
+    scaled = _buffer('scaled', img.shape, img.dtype)
+    np.copyto(acc, img)
+
+    for i in range(1, ZOOM_STEPS + 1):
+        scale = 1 + strength * i * 0.25
+        crop_w, crop_h = w / scale, h / scale
+        x0, y0 = int(round((w - crop_w) / 2)), int(round((h - crop_h) / 2))
+        cv2.resize(img[y0:h - y0, x0:w - x0], (w, h), dst=scaled, interpolation=cv2.INTER_LINEAR)
+        cv2.accumulateWeighted(scaled, acc, ZOOM_WEIGHT)
+    return acc.astype(img.dtype)
+
+
+# ---------- 벤치마크 ----------
+
+def _reference_motion_blur(img, size=5, direction='vertical'):
+    """기존 augment_data.apply_motion_blur"""
+    kernel = np.zeros((size, size))
+    if direction == 'vertical':
+        kernel[:, size // 2] = 1 / size
+    elif direction == 'horizontal':
+        kernel[size // 2, :] = 1 / size
+    elif direction == 'diagonal':
+        np.fill_diagonal(kernel, 1 / size)
+    return cv2.filter2D(img, -1, kernel)
+
+
+def _reference_zoom_blur(img, strength=0.1):
+    """기존 augment_data.apply_zoom_blur"""
+    h, w = img.shape[:2]
+    center_x, center_y = w // 2, h // 2
+    result = img.copy().astype(np.float32)
+    for i in range(1, 5):
+        scale = 1 + strength * i * 0.25
+        M = cv2.getRotationMatrix2D((center_x, center_y), 0, scale)
+        scaled = cv2.warpAffine(img, M, (w, h), borderMode=cv2.BORDER_REFLECT)
+        result = cv2.addWeighted(result, 0.8, scaled.astype(np.float32), 0.2, 0)
+    return result.astype(np.uint8)
+
+
+def _reference_double_motion_blur(img):
+    """기존 augment_data.apply_double_motion_blur"""
+    return _reference_motion_blur(_reference_motion_blur(img, 7, 'vertical'), 5, 'horizontal')
+
+
+BENCH_CASES = [
+    ('motion vertical 7', lambda img: _reference_motion_blur(img, 7, 'vertical'),
+     lambda img: motion_blur(img, 7, 'vertical')),
+    ('motion horizontal 9', lambda img: _reference_motion_blur(img, 9, 'horizontal'),
+     lambda img: motion_blur(img, 9, 'horizontal')),
+    ('motion vertical 30', lambda img: _reference_motion_blur(img, 30, 'vertical'),
+     lambda img: motion_blur(img, 30, 'vertical')),
+    ('motion diagonal 25', lambda img: _reference_motion_blur(img, 25, 'diagonal'),
+     lambda img: motion_blur(img, 25, 'diagonal')),
+    ('double blur', _reference_double_motion_blur, double_motion_blur),
+    ('zoom blur 0.15', lambda img: _reference_zoom_blur(img, 0.15), lambda img: zoom_blur(img, 0.15)),
+]
+
+
+def _time(fn, img, repeat):
+    fn(img)     # 워밍업 (커널/버퍼 캐시)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(img)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='블러 연산 처리량 (기존 구현 대비)')
+    parser.add_argument('--widths', type=int, nargs='+', default=[640, 1280])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--image', help='테스트 이미지 (없으면 무작위 + 그라데이션 합성)')
+    parser.add_argument('--threads', type=int, default=1, help='OpenCV 스레드 수 (증강 워커와 같은 1이 기본)')
+    args = parser.parse_args()
+
+    cv2.setNumThreads(args.threads)
+    source = cv2.imread(args.image) if args.image else None
+
+    print(f"{'width':>6}  {'op':<22}{'기존 ms':>9}{'새 ms':>9}{'배속':>7}{'최대차':>7}{'평균차':>8}")
+    for width in args.widths:
+        height = width * 9 // 16
+        if source is not None:
+            img = cv2.resize(source, (width, height))
+        else:
+            rng = np.random.default_rng(0)
+            ramp = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+            img = np.clip(rng.normal(0, 30, (height, width, 3)) + ramp, 0, 255).astype(np.uint8)
+
+        for name, reference, optimized in BENCH_CASES:
+            old = _time(reference, img, args.repeat)
+            new = _time(optimized, img, args.repeat)
+            diff = np.abs(reference(img).astype(np.int16) - optimized(img).astype(np.int16))
+            print(f'{width:>6}  {name:<22}{old * 1000:>9.2f}{new * 1000:>9.2f}{old / new:>6.1f}x'
+                  f'{int(diff.max()):>7}{diff.mean():>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
-"""Claude AI 일괄 라벨링 스크립트 (Rate limit 대응)"""
-import anthropic
-import base64
-import json
-import time
+"""Claude AI 일괄 라벨링 스크립트 (Rate limit 대응)
+
+ANTHROPIC_BASE_URL=http://localhost:8090 으로 mock_label_server.py에 연결 가능
+"""
 from pathlib import Path
-import re
+
+import yolo_labels
+from claude_label_engine import ClaudeLabelEngine, format_stats
+from label_metadata import LabelMetadataStore
+from vlm_image_prep import ImagePrep
+from vlm_response_cache import ResponseCache
 
 import os
 API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
@@ -13,14 +17,22 @@ IMAGES_DIR = Path("labeling_images")
 LABELS_DIR = Path("labeling_labels")
 META_FILE = LABELS_DIR / "_metadata.json"
 
+# 동시 요청 수 / 시작 초당 요청 수 (429가 오면 엔진이 알아서 낮춤)
+CONCURRENCY = 4
+RATE = 0.5
+
+PROMPT = "바벨 플레이트 끝단 바운딩박스. 정규화좌표(0~1). JSON만: {\"found\":bool,\"boxes\":[{\"cx\":float,\"cy\":float,\"w\":float,\"h\":float}]}"
+
 LABELS_DIR.mkdir(exist_ok=True)
 
-# 메타데이터 로드
-if META_FILE.exists():
-    with open(META_FILE) as f:
-        metadata = json.load(f)
-else:
-    metadata = {}
+# 메타데이터 로드 (저널 기반 저장소)
+metadata = LabelMetadataStore(META_FILE)
+
+# 같은 이미지+프롬프트+모델의 이전 응답은 API 호출 없이 재사용
+cache = ResponseCache()
+
+# 긴 변 1024px, JPEG quality 85로 줄여서 전송 (좌표는 원본 기준으로 되돌림)
+prep = ImagePrep()
 
 # 미라벨링 이미지 찾기
 images = set(f.stem for f in IMAGES_DIR.glob("*.jpg"))
@@ -31,8 +43,6 @@ print(f"Claude AI 일괄 라벨링 시작", flush=True)
 print(f"처리할 이미지: {len(unlabeled)}개", flush=True)
 print("=" * 50, flush=True)
 
-client = anthropic.Anthropic(api_key=API_KEY)
-
 success = 0
 failed = 0
 no_barbell = 0
@@ -41,73 +51,41 @@ no_barbell = 0
 batch_size = 100
 unlabeled = unlabeled[:batch_size]
 
-for i, img_stem in enumerate(unlabeled):
-    img_path = IMAGES_DIR / f"{img_stem}.jpg"
-    label_path = LABELS_DIR / f"{img_stem}.txt"
-    
-    if not img_path.exists():
-        continue
-    
-    print(f"[{i+1}/{len(unlabeled)}] {img_stem}...", end=" ", flush=True)
-    
-    try:
-        with open(img_path, 'rb') as f:
-            image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-        
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=512,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": image_data}},
-                    {"type": "text", "text": "바벨 플레이트 끝단 바운딩박스. 정규화좌표(0~1). JSON만: {\"found\":bool,\"boxes\":[{\"cx\":float,\"cy\":float,\"w\":float,\"h\":float}]}"}
-                ]
-            }]
-        )
-        
-        response_text = message.content[0].text
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        
-        if json_match:
-            data = json.loads(json_match.group())
-            
-            if data.get("found") and data.get("boxes"):
-                lines = []
-                for box in data["boxes"]:
-                    lines.append(f"0 {float(box['cx']):.6f} {float(box['cy']):.6f} {float(box['w']):.6f} {float(box['h']):.6f}")
-                
-                with open(label_path, 'w') as f:
-                    f.write('\n'.join(lines))
-                
-                metadata[img_stem] = "claude"
-                success += 1
-                print(f"바벨발견 ({len(lines)}개)", flush=True)
-            else:
-                with open(label_path, 'w') as f:
-                    f.write('')
-                metadata[img_stem] = "claude"
-                no_barbell += 1
-                print("바벨없음", flush=True)
-        else:
-            failed += 1
-            print("파싱실패", flush=True)
-            
-    except Exception as e:
+
+def on_result(result):
+    global success, failed, no_barbell
+    img_stem = result.key
+    done = success + failed + no_barbell + 1
+    print(f"[{done}/{len(unlabeled)}] {img_stem}...", end=" ", flush=True)
+
+    if result.error:
+        failed += 1
+        print(f"에러: {result.error[:50]}", flush=True)
+        return
+    if result.boxes is None:
         failed += 1
-        err_msg = str(e)
-        if "rate" in err_msg.lower() or "429" in err_msg:
-            print(f"Rate limit! 120초 대기...", flush=True)
-            time.sleep(120)
-        else:
-            print(f"에러: {err_msg[:50]}", flush=True)
-    
-    # 메타데이터 저장
-    with open(META_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
-    
-    # 2초 간격 (Rate limit 방지)
-    time.sleep(2)
+        print("파싱실패", flush=True)
+        return
+
+    yolo_labels.write(LABELS_DIR / f"{img_stem}.txt", yolo_labels.from_boxes(result.boxes))
+    metadata.set(img_stem, "claude")
+
+    if result.boxes:
+        success += 1
+        print(f"바벨발견 ({len(result.boxes)}개)", flush=True)
+    else:
+        no_barbell += 1
+        print("바벨없음", flush=True)
+
+
+engine = ClaudeLabelEngine(API_KEY, concurrency=CONCURRENCY, rate=RATE, max_tokens=512, cache=cache,
+                           prep=prep)
+stats = engine.run([(stem, IMAGES_DIR / f"{stem}.jpg") for stem in unlabeled], PROMPT, on_result)
+
+# 저널 컴팩션
+metadata.close()
+cache.close()
 
 print("=" * 50, flush=True)
 print(f"완료! 성공:{success} 바벨없음:{no_barbell} 실패:{failed}", flush=True)
+print(format_stats(stats), flush=True)
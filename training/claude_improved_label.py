@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
-"""Claude AI 개선된 라벨링 - 수동 라벨 예시 참조"""
-import anthropic
-import base64
-import json
-import time
+"""Claude AI 개선된 라벨링 - 수동 라벨 예시 참조
+
+라벨링 규칙 + 수동 라벨 이미지 몇 장(정답 박스 포함)을 모든 요청 앞에 같은 내용으로 붙이고
+prompt cache로 표시 → 두 번째 요청부터 예시 부분은 캐시에서 읽음
+"""
 from pathlib import Path
-import re
+
+import yolo_labels
+from claude_label_engine import ClaudeLabelEngine, FewShotContext, format_stats, pick_examples
+from label_catalog import meta_label_type
+from label_metadata import LabelMetadataStore
+from vlm_image_prep import ImagePrep
+from vlm_response_cache import ResponseCache
 
 import os
 API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
@@ -13,14 +19,23 @@ IMAGES_DIR = Path("labeling_images")
 LABELS_DIR = Path("labeling_labels")
 META_FILE = LABELS_DIR / "_metadata.json"
 
+# 동시 요청 수 / 시작 초당 요청 수 (429가 오면 엔진이 알아서 낮춤)
+CONCURRENCY = 4
+RATE = 0.7
+
+# few-shot 예시 이미지 수 (수동 라벨 중에서 고르게 선택)
+FEW_SHOT_EXAMPLES = 3
+
 LABELS_DIR.mkdir(exist_ok=True)
 
-# 메타데이터 로드
-if META_FILE.exists():
-    with open(META_FILE) as f:
-        metadata = json.load(f)
-else:
-    metadata = {}
+# 메타데이터 로드 (저널 기반 저장소)
+metadata = LabelMetadataStore(META_FILE)
+
+# 같은 이미지+프롬프트+모델의 이전 응답은 API 호출 없이 재사용
+cache = ResponseCache()
+
+# 긴 변 1024px, JPEG quality 85로 줄여서 전송 (좌표는 원본 기준으로 되돌림)
+prep = ImagePrep()
 
 # 수동 라벨 예시 준비
 def get_example_context():
@@ -39,6 +54,15 @@ def get_example_context():
 
 박스는 원판 끝단의 작은 영역만 감싸야 합니다 (전체 원판 아님)."""
 
+
+# 수동 라벨 이미지 예시 (박스가 있는 것만)
+def get_example_images():
+    snapshot = metadata.snapshot()
+    stems = [f.stem for f in LABELS_DIR.glob("*.txt")
+             if f.stem != "classes" and meta_label_type(snapshot.get(f.stem)) == "manual"
+             and f.read_text().strip() and (IMAGES_DIR / f"{f.stem}.jpg").exists()]
+    return [IMAGES_DIR / f"{stem}.jpg" for stem in pick_examples(stems, FEW_SHOT_EXAMPLES)]
+
 # 미라벨링 이미지 찾기
 images = set(f.stem for f in IMAGES_DIR.glob("*.jpg"))
 labeled = set(f.stem for f in LABELS_DIR.glob("*.txt") if f.stem != "classes")
@@ -48,8 +72,6 @@ print(f"Claude AI 개선된 라벨링 시작", flush=True)
 print(f"처리할 이미지: {len(unlabeled)}개", flush=True)
 print("=" * 50, flush=True)
 
-client = anthropic.Anthropic(api_key=API_KEY)
-
 success = 0
 failed = 0
 no_barbell = 0
@@ -58,24 +80,11 @@ no_barbell = 0
 batch_size = 200
 unlabeled = unlabeled[:batch_size]
 
-example_context = get_example_context()
-
-for i, img_stem in enumerate(unlabeled):
-    img_path = IMAGES_DIR / f"{img_stem}.jpg"
-    label_path = LABELS_DIR / f"{img_stem}.txt"
-    
-    if not img_path.exists():
-        continue
-    
-    print(f"[{i+1}/{len(unlabeled)}] {img_stem[:40]}...", end=" ", flush=True)
-    
-    try:
-        with open(img_path, 'rb') as f:
-            image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-        
-        prompt = f"""{example_context}
-
-이 이미지에서 바벨 플레이트(원판)의 끝단(가장자리)을 찾아 바운딩 박스로 표시해주세요.
+example_images = get_example_images()
+context = FewShotContext.from_labels(example_images, LABELS_DIR, get_example_context(), prep)
+print(f"few-shot 예시 이미지: {len(example_images)}장", flush=True)
+
+prompt = f"""이 이미지에서 바벨 플레이트(원판)의 끝단(가장자리)을 찾아 바운딩 박스로 표시해주세요.
 
 규칙:
 1. 바벨이 보이면 원판의 양쪽 끝 위치를 표시 (보통 2개)
@@ -85,69 +94,49 @@ for i, img_stem in enumerate(unlabeled):
 
 JSON만 응답: {{"found":bool,"boxes":[{{"cx":float,"cy":float,"w":float,"h":float}}]}}"""
 
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=512,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": image_data}},
-                    {"type": "text", "text": prompt}
-                ]
-            }]
-        )
-        
-        response_text = message.content[0].text
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        
-        if json_match:
-            data = json.loads(json_match.group())
-            
-            if data.get("found") and data.get("boxes"):
-                lines = []
-                for box in data["boxes"]:
-                    cx = max(0, min(1, float(box['cx'])))
-                    cy = max(0, min(1, float(box['cy'])))
-                    w = max(0.005, min(0.2, float(box['w'])))
-                    h = max(0.01, min(0.3, float(box['h'])))
-                    lines.append(f"0 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}")
-                
-                with open(label_path, 'w') as f:
-                    f.write('\n'.join(lines))
-                
-                metadata[img_stem] = "claude"
-                success += 1
-                print(f"바벨 {len(lines)}개", flush=True)
-            else:
-                with open(label_path, 'w') as f:
-                    f.write('')
-                metadata[img_stem] = "claude"
-                no_barbell += 1
-                print("없음", flush=True)
-        else:
-            failed += 1
-            print("파싱실패", flush=True)
-            
-    except Exception as e:
+
+def on_result(result):
+    global success, failed, no_barbell
+    img_stem = result.key
+    done = success + failed + no_barbell + 1
+    print(f"[{done}/{len(unlabeled)}] {img_stem[:40]}...", end=" ", flush=True)
+
+    if result.error:
+        failed += 1
+        print(f"에러", flush=True)
+        return
+    if result.boxes is None:
         failed += 1
-        err_msg = str(e)
-        if "rate" in err_msg.lower() or "429" in err_msg:
-            print(f"Rate limit! 60초 대기...", flush=True)
-            time.sleep(60)
-        else:
-            print(f"에러", flush=True)
-    
-    # 메타데이터 저장 (10개마다)
-    if (i + 1) % 10 == 0:
-        with open(META_FILE, 'w') as f:
-            json.dump(metadata, f, indent=2)
-    
-    # 1.5초 간격
-    time.sleep(1.5)
-
-# 최종 저장
-with open(META_FILE, 'w') as f:
-    json.dump(metadata, f, indent=2)
+        print("파싱실패", flush=True)
+        return
+
+    boxes = []
+    for cx, cy, w, h in result.boxes:
+        cx = max(0, min(1, cx))
+        cy = max(0, min(1, cy))
+        w = max(0.005, min(0.2, w))
+        h = max(0.01, min(0.3, h))
+        boxes.append((cx, cy, w, h))
+
+    yolo_labels.write(LABELS_DIR / f"{img_stem}.txt", yolo_labels.from_boxes(boxes))
+    metadata.set(img_stem, "claude")
+
+    if lines:
+        success += 1
+        print(f"바벨 {len(lines)}개", flush=True)
+    else:
+        no_barbell += 1
+        print("없음", flush=True)
+
+
+engine = ClaudeLabelEngine(API_KEY, concurrency=CONCURRENCY, rate=RATE, max_tokens=512, cache=cache,
+                           prep=prep, context=context)
+stats = engine.run([(stem, IMAGES_DIR / f"{stem}.jpg") for stem in unlabeled], prompt, on_result)
+
+# 저널 컴팩션
+metadata.close()
+cache.close()
 
 print("=" * 50, flush=True)
 print(f"완료! 성공:{success} 바벨없음:{no_barbell} 실패:{failed}", flush=True)
+print(format_stats(stats), flush=True)
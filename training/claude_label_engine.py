@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Claude 라벨링 엔진 (일괄 라벨링 스크립트 / 라벨링 서버 공용)
+- asyncio 워커 풀로 여러 이미지를 동시에 요청
+- 토큰 버킷으로 초당 요청 수 제한, 429/529 응답의 retry-after에 맞춰 대기하고 속도를 절반으로
+  (성공이 이어지면 조금씩 다시 올림)
+- 완료한 이미지를 체크포인트 파일(JSONL)에 기록 → 중단 후 다시 실행하면 이어서 처리
+- base_url 변경 가능 (mock_label_server.py로 오프라인 테스트/벤치마크)
+- cache(vlm_response_cache.ResponseCache)를 주면 같은 이미지+프롬프트+모델은 API를 호출하지 않음
+- prep(vlm_image_prep.ImagePrep)을 주면 축소/재인코딩/ROI 크롭한 이미지를 보내고
+  응답 좌표를 원본 프레임 기준으로 되돌림
+- context(FewShotContext)를 주면 설명 + 라벨된 예시 이미지를 모든 요청 앞에 똑같이 붙이고
+  cache_control로 표시 → 두 번째 요청부터 prompt cache에서 읽음 (입력 토큰 비용/지연 감소)
+
+Messages API를 표준 라이브러리 HTTP로 직접 호출하므로 anthropic 패키지가 필요 없습니다.
+
+사용법 (처리량/백오프 측정):
+    python3 mock_label_server.py --port 8090 --rpm 60 &
+    python3 claude_label_engine.py --base-url http://localhost:8090 --concurrency 8 --rate 2
+"""
+
+import argparse
+import asyncio
+import base64
+import email.utils
+import io
+import json
+import os
+import random
+import re
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import yolo_labels
+from label_catalog import content_hasher
+
+DEFAULT_BASE_URL = os.environ.get('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')
+DEFAULT_MODEL = 'claude-sonnet-4-20250514'
+API_VERSION = '2023-06-01'
+
+CONCURRENCY = 4
+RATE = 1.0              # 시작 초당 요청 수
+MAX_RATE = 8.0
+MIN_RATE = 0.05
+BURST = 2
+RATE_INCREASE = 0.05    # 성공 1회당 증가량 (req/s)
+MAX_RETRIES = 5
+REQUEST_TIMEOUT = 120
+
+# 재시도 대상 응답 코드 (429: rate limit, 529: overloaded)
+RETRY_STATUS = {429, 500, 502, 503, 504, 529}
+
+# prompt caching 표시 (5분 동안 같은 앞부분을 다시 보내면 캐시에서 읽음)
+CACHE_CONTROL = {'type': 'ephemeral'}
+FEW_SHOT_EXAMPLES = 3
+
+
+class APIError(Exception):
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f'HTTP {status}: {message}')
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers):
+    """retry-after (초 또는 HTTP 날짜) → 초, 없으면 None"""
+    value = headers.get('retry-after') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_boxes(text):
+    """응답 텍스트의 JSON → [(cx, cy, w, h)] (JSON이 없으면 None)
+
+    {"found": bool, "boxes": [...]} 와 {"labels": [...]} 형식 모두 지원
+    """
+    match = re.search(r'\{.*\}', text or '', re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+
+    if 'labels' in data:
+        items = data.get('labels') or []
+    elif data.get('found'):
+        items = data.get('boxes') or []
+    else:
+        items = []
+
+    boxes = []
+    for item in items:
+        try:
+            boxes.append((float(item.get('cx', 0)), float(item.get('cy', 0)),
+                          float(item.get('w', 0.05)), float(item.get('h', 0.05))))
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return boxes
+
+
+def media_type_for(path):
+    suffix = Path(path).suffix.lower()
+    return 'image/png' if suffix == '.png' else 'image/jpeg'
+
+
+class AdaptiveTokenBucket:
+    """초당 요청 수 제한 (AIMD: 성공 시 조금씩 증가, 429 시 절반 + retry-after 동안 정지)"""
+
+    def __init__(self, rate=RATE, burst=BURST, max_rate=MAX_RATE, min_rate=MIN_RATE,
+                 increase=RATE_INCREASE):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max(max_rate, rate)
+        self.min_rate = min_rate
+        self.increase = increase
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # 잠금을 잡은 채 기다리므로 요청 순서대로 토큰을 받음
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after):
+        now = time.monotonic()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self._updated = now
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class LabelCheckpoint:
+    """완료한 이미지 기록 (JSONL, 한 줄에 한 이미지)"""
+
+    def __init__(self, path):
+        self.path = Path(path) if path else None
+        self.done = {}
+        if self.path and self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue        # 중단 중 잘린 마지막 줄
+                    self.done[record['key']] = record
+        self._file = None
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def record(self, key, boxes):
+        if self.path is None:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        record = {'key': key, 'boxes': boxes, 'ts': time.time()}
+        self.done[key] = record
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LabelResult:
+    """이미지 하나의 라벨링 결과 (boxes가 None이면 파싱 실패, error가 있으면 요청 실패)"""
+
+    def __init__(self, key, image_path, boxes=None, text=None, error=None, usage=None, cached=False):
+        self.key = key
+        self.image_path = image_path
+        self.boxes = boxes
+        self.text = text
+        self.error = error
+        self.usage = usage or {}
+        self.cached = cached
+
+    @property
+    def ok(self):
+        return self.error is None and self.boxes is not None
+
+
+class PreparedRequest:
+    """캐시에 없어서 API로 보낼 요청 (배치 모드에서는 to_record()로 저장했다가 결과 반영에 사용)"""
+
+    def __init__(self, key, image_path, image_hash=None, variant='', transform=None):
+        self.key = key
+        self.image_path = image_path
+        self.image_hash = image_hash
+        self.variant = variant
+        self.transform = transform
+        self.content = None
+        self.bytes_saved = 0
+
+    def to_record(self):
+        return {
+            'key': self.key,
+            'imagePath': str(self.image_path),
+            'imageHash': self.image_hash,
+            'variant': self.variant,
+            'transform': self.transform.to_record() if self.transform is not None else None,
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        from vlm_image_prep import ImageTransform
+
+        transform = record.get('transform')
+        return cls(record['key'], Path(record['imagePath']), record.get('imageHash'),
+                   record.get('variant', ''),
+                   ImageTransform.from_record(transform) if transform else None)
+
+
+class FewShotContext:
+    """모든 요청 앞에 붙는 고정 content 블록 (설명 텍스트 + 라벨된 예시 이미지)
+
+    prompt cache는 앞부분이 바이트 단위로 같아야 적중하므로 예시 이미지는 만들 때 한 번만
+    인코딩하고 마지막 블록에 cache_control을 붙임
+    (모델별 최소 길이 - Sonnet은 1024 토큰 - 보다 짧으면 캐시되지 않음, 예시 이미지 1장이면 충분)
+    """
+
+    def __init__(self, text=None, examples=(), prep=None, answer_key='boxes'):
+        """
+        Args:
+            text: 예시 앞에 붙일 설명 (라벨링 규칙 등)
+            examples: [(이미지 경로, [(cx, cy, w, h)])] - 정답 박스는 원본 프레임 기준 정규화 좌표
+            prep: ImagePrep (예시 이미지도 대상 이미지와 같은 크기로 줄여서 전송)
+            answer_key: 정답 JSON 형식 - 'boxes'는 {"found", "boxes"}, 'labels'는 {"labels"}
+                        (프롬프트가 요구하는 형식과 맞춤)
+        """
+        blocks = [{'type': 'text', 'text': text}] if text else []
+        for i, (image_path, boxes) in enumerate(examples, 1):
+            data = Path(image_path).read_bytes()
+            media_type = None
+            if prep is not None and prep.enabled:
+                data, media_type = prep.render(image_path, prep.plan(io.BytesIO(data)), data)
+            items = [{'cx': round(cx, 4), 'cy': round(cy, 4), 'w': round(w, 4), 'h': round(h, 4)}
+                     for cx, cy, w, h in boxes]
+            answer = {'labels': items} if answer_key == 'labels' else {'found': bool(items), 'boxes': items}
+            blocks.append({'type': 'text', 'text': f'예시 {i}:'})
+            blocks.append({'type': 'image', 'source': {
+                'type': 'base64', 'media_type': media_type or media_type_for(image_path),
+                'data': base64.standard_b64encode(data).decode('utf-8')}})
+            blocks.append({'type': 'text', 'text': f'예시 {i} 정답: {json.dumps(answer)}'})
+        if blocks:
+            blocks[-1] = {**blocks[-1], 'cache_control': CACHE_CONTROL}
+
+        self.blocks = blocks
+        self.examples = len(examples)
+        # 응답 캐시 키에 포함 (예시가 바뀌면 응답도 달라질 수 있음)
+        hasher = content_hasher()
+        hasher.update(json.dumps(blocks, sort_keys=True).encode('utf-8'))
+        self.signature = hasher.hexdigest()
+
+    @classmethod
+    def from_labels(cls, image_paths, labels_dir, text=None, prep=None, answer_key='boxes'):
+        """YOLO 라벨 파일(labels_dir/{stem}.txt)이 있는 이미지로 예시 구성"""
+        examples = []
+        for image_path in image_paths:
+            rows = yolo_labels.read(Path(labels_dir) / f'{Path(image_path).stem}.txt')
+            examples.append((image_path, [tuple(box) for box in yolo_labels.to_list(rows[:, 1:])]))
+        return cls(text, examples, prep, answer_key)
+
+
+def pick_examples(candidates, count=FEW_SHOT_EXAMPLES):
+    """정렬된 후보에서 고르게 count개 선택 (실행마다 같은 예시 → 같은 prompt cache 앞부분)"""
+    candidates = sorted(candidates)
+    if len(candidates) <= count:
+        return candidates
+    step = len(candidates) / count
+    return [candidates[int(i * step + step / 2)] for i in range(count)]
+
+
+def _to_original(boxes, transform):
+    if boxes is None or transform is None:
+        return boxes
+    return transform.to_original(boxes)
+
+
+class ClaudeLabelEngine:
+    """동시 요청 + 적응형 rate limit Claude 라벨링"""
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL,
+                 concurrency=CONCURRENCY, rate=RATE, max_rate=MAX_RATE, burst=BURST,
+                 max_tokens=512, max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT,
+                 checkpoint_path=None, cache=None, prep=None, context=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.checkpoint = LabelCheckpoint(checkpoint_path)
+        self.cache = cache
+        self.prep = prep
+        self.context = context
+        self.stats = {}
+        self._warm = None           # few-shot 첫 요청 완료 이벤트 (label_all 실행 중에만)
+        self._warming = False
+
+    # ---------- 요청 ----------
+
+    def build_content(self, image_path, prompt, data=None, media_type=None):
+        """user 메시지 content (이미지 + 프롬프트)"""
+        if data is None:
+            data = Path(image_path).read_bytes()
+        image_data = base64.standard_b64encode(data).decode('utf-8')
+        return [
+            {'type': 'image', 'source': {'type': 'base64',
+                                         'media_type': media_type or media_type_for(image_path),
+                                         'data': image_data}},
+            {'type': 'text', 'text': prompt},
+        ]
+
+    def open(self, method, path, payload=None):
+        """API 요청 → 응답 객체 (with로 닫아야 함, HTTP 오류는 APIError)
+
+        path가 http로 시작하면 그대로 사용 (배치 results_url 등)
+        """
+        req = urllib.request.Request(
+            path if path.startswith('http') else f'{self.base_url}{path}',
+            data=json.dumps(payload).encode('utf-8') if payload is not None else None,
+            method=method,
+            headers={
+                'content-type': 'application/json',
+                'x-api-key': self.api_key,
+                'anthropic-version': API_VERSION,
+            },
+        )
+        try:
+            return urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            body = e.read().decode('utf-8', errors='replace')
+            try:
+                message = json.loads(body)['error']['message']
+            except (ValueError, KeyError, TypeError):
+                message = body[:200]
+            raise APIError(e.code, message, parse_retry_after(e.headers))
+
+    def call(self, method, path, payload=None):
+        """API 요청 → 응답 JSON"""
+        with self.open(method, path, payload) as res:
+            return json.loads(res.read())
+
+    def _post(self, payload):
+        """Messages API 호출 (스레드에서 실행) → 응답 JSON"""
+        return self.call('POST', '/v1/messages', payload)
+
+    async def _request(self, bucket, payload):
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            self.stats['requests'] += 1
+            try:
+                response = await asyncio.to_thread(self._post, payload)
+                bucket.on_success()
+                return response
+            except APIError as e:
+                if e.status not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                if e.status == 429:
+                    self.stats['rateLimited'] += 1
+                wait = e.retry_after if e.retry_after is not None else min(60, 2 ** attempt)
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if attempt == self.max_retries:
+                    raise
+                wait = min(60, 2 ** attempt)
+
+            self.stats['retries'] += 1
+            bucket.on_throttled(wait + random.uniform(0, 0.25))
+
+    def cache_prompt(self, prompt):
+        """응답 캐시 키용 프롬프트 (few-shot 예시가 있으면 그 서명 포함)"""
+        if self.context is None:
+            return prompt
+        return f'{prompt}\n[few-shot:{self.context.signature}]'
+
+    def prepare(self, key, image_path, prompt, roi=None):
+        """캐시 확인 + 전송 이미지 준비 → 캐시 적중 시 LabelResult, 아니면 PreparedRequest"""
+        prompt = self.cache_prompt(prompt)
+        data = Path(image_path).read_bytes()
+        image_hash = None
+        transform = None
+        variant = ''
+        if self.prep is not None and self.prep.enabled:
+            transform = self.prep.plan(io.BytesIO(data), roi)
+            variant = self.prep.signature(transform)
+        if self.cache is not None:
+            # 카탈로그와 같은 내용 해시 (파일명이 달라도 같은 프레임이면 재사용)
+            hasher = content_hasher()
+            hasher.update(data)
+            image_hash = hasher.hexdigest()
+            cached = self.cache.get(image_hash, prompt, self.model, variant)
+            if cached is not None:
+                return LabelResult(key, image_path, _to_original(cached['boxes'], transform),
+                                   cached['raw'], usage=cached['usage'], cached=True)
+
+        media_type = None
+        sent = len(data)
+        if transform is not None:
+            data, media_type = self.prep.render(image_path, transform, data)
+        request = PreparedRequest(key, image_path, image_hash, variant, transform)
+        request.content = self.build_content(image_path, prompt, data, media_type)
+        request.bytes_saved = sent - len(data)
+        return request
+
+    def message_params(self, request):
+        """Messages API 요청 본문 (배치 요청의 params와 같은 형식)
+
+        few-shot 블록을 맨 앞에 두어야 요청마다 다른 대상 이미지 앞까지가 캐시됨
+        """
+        content = request.content
+        if self.context is not None:
+            content = self.context.blocks + content
+        return {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'messages': [{'role': 'user', 'content': content}],
+        }
+
+    def finish(self, request, prompt, response):
+        """응답 메시지 → 파싱/캐시 저장/원본 좌표 변환 → LabelResult"""
+        text = ''.join(block.get('text', '') for block in response.get('content', [])
+                       if block.get('type') == 'text')
+        boxes = parse_boxes(text)
+        usage = response.get('usage') or {}
+        if self.cache is not None and request.image_hash is not None:
+            self.cache.put(request.image_hash, self.cache_prompt(prompt), self.model, text, boxes, usage,
+                           request.variant)
+        return LabelResult(request.key, request.image_path, _to_original(boxes, request.transform),
+                           text, usage=usage)
+
+    async def _send(self, bucket, payload):
+        """few-shot 앞부분이 있으면 첫 요청이 캐시를 쓸 때까지 나머지는 대기
+
+        동시에 보낸 요청은 서로의 캐시 쓰기를 볼 수 없어서 각자 캐시 쓰기 비용을 냄
+        """
+        if self._warm is None or self._warm.is_set():
+            return await self._request(bucket, payload)
+        if self._warming:
+            await self._warm.wait()
+            return await self._request(bucket, payload)
+
+        self._warming = True
+        try:
+            return await self._request(bucket, payload)
+        finally:
+            self._warm.set()
+
+    async def label_image(self, bucket, key, image_path, prompt, roi=None):
+        try:
+            prepared = await asyncio.to_thread(self.prepare, key, image_path, prompt, roi)
+            if isinstance(prepared, LabelResult):
+                self.stats['cacheHits'] += 1
+                return prepared
+            if self.cache is not None:
+                self.stats['cacheMisses'] += 1
+            self.stats['bytesSaved'] += prepared.bytes_saved
+            response = await self._send(bucket, self.message_params(prepared))
+        except Exception as e:
+            return LabelResult(key, image_path, error=str(e))
+        return self.finish(prepared, prompt, response)
+
+    # ---------- 일괄 처리 ----------
+
+    async def label_all(self, images, prompt, on_result=None, should_stop=None):
+        """(key, 이미지 경로) 또는 (key, 이미지 경로, roi) 목록 라벨링
+
+        Args:
+            images: roi는 prep 사용 시 크롭할 정규화 박스 목록 (이전 YOLO 검출 등)
+            prompt: 문자열 또는 prompt(image_path) 함수
+            on_result: 이미지마다 on_result(LabelResult) (이벤트 루프 스레드에서 호출)
+            should_stop: True를 반환하면 새 요청을 멈춤
+
+        Returns:
+            dict: 처리 통계
+        """
+        should_stop = should_stop or (lambda: False)
+        bucket = AdaptiveTokenBucket(self.rate, self.burst, self.max_rate)
+        pending = [item for item in images if item[0] not in self.checkpoint]
+        queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+
+        self.stats = {
+            'images': len(pending), 'skipped': len(images) - len(pending),
+            'ok': 0, 'parseFailed': 0, 'failed': 0,
+            'requests': 0, 'retries': 0, 'rateLimited': 0, 'cacheHits': 0, 'cacheMisses': 0,
+            'bytesSaved': 0, 'inputTokens': 0, 'outputTokens': 0,
+            'cacheReadTokens': 0, 'cacheWriteTokens': 0, 'stopped': False,
+        }
+        if self.context is not None:
+            self._warm = asyncio.Event()
+            self._warming = False
+        start = time.perf_counter()
+
+        async def worker():
+            while not queue.empty():
+                if should_stop():
+                    self.stats['stopped'] = True
+                    return
+                key, path, *roi = queue.get_nowait()
+                text = prompt(path) if callable(prompt) else prompt
+                result = await self.label_image(bucket, key, path, text, roi[0] if roi else None)
+
+                if result.error:
+                    self.stats['failed'] += 1
+                elif result.boxes is None:
+                    self.stats['parseFailed'] += 1
+                else:
+                    self.stats['ok'] += 1
+                    self.checkpoint.record(key, result.boxes)
+                if not result.cached:
+                    self.stats['inputTokens'] += result.usage.get('input_tokens', 0)
+                    self.stats['outputTokens'] += result.usage.get('output_tokens', 0)
+                    self.stats['cacheReadTokens'] += result.usage.get('cache_read_input_tokens') or 0
+                    self.stats['cacheWriteTokens'] += result.usage.get('cache_creation_input_tokens') or 0
+                if on_result is not None:
+                    on_result(result)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(pending)) or 1)))
+        finally:
+            self.checkpoint.close()
+            self._warm = None
+
+        seconds = time.perf_counter() - start
+        done = self.stats['ok'] + self.stats['parseFailed'] + self.stats['failed']
+        self.stats.update({
+            'seconds': round(seconds, 2),
+            'imagesPerSec': round(done / seconds, 3) if seconds > 0 else 0.0,
+            'finalRate': round(bucket.rate, 3),
+        })
+        return self.stats
+
+    def run(self, images, prompt, on_result=None, should_stop=None):
+        """동기 호출용 (스크립트/백그라운드 스레드)"""
+        return asyncio.run(self.label_all(images, prompt, on_result, should_stop))
+
+    def label_one(self, image_path, prompt):
+        """이미지 한 장 라벨링 (동기, 429는 retry-after만큼 기다렸다 재시도) → LabelResult"""
+        async def label():
+            bucket = AdaptiveTokenBucket(self.rate, self.burst, self.max_rate)
+            return await self.label_image(bucket, Path(image_path).stem, image_path, prompt)
+
+        self.stats = {'requests': 0, 'retries': 0, 'rateLimited': 0, 'cacheHits': 0, 'cacheMisses': 0,
+                      'bytesSaved': 0}
+        return asyncio.run(label())
+
+
+def format_stats(stats):
+    return (f"성공 {stats['ok']} / 파싱실패 {stats['parseFailed']} / 실패 {stats['failed']} "
+            f"(건너뜀 {stats['skipped']}), {stats['imagesPerSec']:.2f} img/s, "
+            f"요청 {stats['requests']}회, 재시도 {stats['retries']}회, 429 {stats['rateLimited']}회, "
+            f"캐시 적중 {stats['cacheHits']}/{stats['cacheHits'] + stats['cacheMisses']}, "
+            f"전송 절감 {stats['bytesSaved'] / 1024:.0f}KB, "
+            f"입력 토큰 {stats['inputTokens']} (prompt cache 읽기 {stats['cacheReadTokens']}, "
+            f"쓰기 {stats['cacheWriteTokens']}), "
+            f"최종 속도 {stats['finalRate']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Claude 라벨링 엔진 처리량 측정 (라벨 파일은 쓰지 않음)')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--images', default=str(Path(__file__).parent / 'labeling_images_new'))
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=RATE, help='시작 초당 요청 수')
+    parser.add_argument('--max-rate', type=float, default=MAX_RATE)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    paths = sorted(p for p in Path(args.images).iterdir()
+                   if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:args.limit]
+    if not paths:
+        print(f'이미지가 없습니다: {args.images}')
+        return
+
+    engine = ClaudeLabelEngine(os.environ.get('ANTHROPIC_API_KEY', 'test'), args.base_url, args.model,
+                               concurrency=args.concurrency, rate=args.rate, max_rate=args.max_rate)
+    prompt = '바벨 플레이트 끝단 바운딩박스. JSON만: {"found":bool,"boxes":[{"cx":float,"cy":float,"w":float,"h":float}]}'
+    stats = engine.run([(p.stem, p) for p in paths], prompt)
+    print(format_stats(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Claude Message Batches 대량 라벨링
+- 요청을 배치(최대 MAX_BATCH_REQUESTS개 / MAX_BATCH_BYTES)로 묶어 비동기로 제출
+- 배치 ID와 요청별 정보(이미지 경로, 내용 해시, 크롭 변환)를 상태 파일(JSON)에 저장
+  → 중간에 종료돼도 다시 실행하면 이미 제출한 이미지는 건너뛰고 상태 조회부터 이어서 진행
+- 끝난 배치의 결과(JSONL)를 받아 라벨 파일/메타데이터에 반영
+  요청(custom_id)별로 반영 여부를 기록하므로 여러 번 실행해도 한 번만 반영
+- 캐시(ResponseCache)에 있는 이미지는 제출하지 않고 바로 반영
+
+사용법:
+    python3 claude_message_batches.py submit --limit 5000
+    python3 claude_message_batches.py wait          # 끝날 때까지 조회 + 결과 반영
+    python3 claude_message_batches.py status
+    python3 claude_message_batches.py cancel
+    (ANTHROPIC_BASE_URL=http://localhost:8090 으로 mock_label_server.py 사용)
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from claude_label_engine import (RETRY_STATUS, APIError, ClaudeLabelEngine, LabelResult,
+                                 PreparedRequest)
+
+# 배치 하나의 상한 (API 상한은 100,000개 / 256MB, 메모리에 요청 본문을 만들어야 하므로 낮게)
+MAX_BATCH_REQUESTS = 2000
+MAX_BATCH_BYTES = 64 * 1024 * 1024
+POLL_INTERVAL_SEC = 30
+PREPARE_WORKERS = 4
+SAVE_EVERY = 50
+
+BATCH_PROMPT = "바벨 플레이트 끝단 바운딩박스. 정규화좌표(0~1). JSON만: {\"found\":bool,\"boxes\":[{\"cx\":float,\"cy\":float,\"w\":float,\"h\":float}]}"
+
+
+def _result_error(result):
+    """errored/expired/canceled 결과 → 오류 문자열"""
+    error = result.get('error') or {}
+    message = error.get('error', error).get('message')
+    return f"{result['type']}: {message}" if message else result['type']
+
+
+class MessageBatchLabeler:
+    """배치 제출 → 상태 조회 → 결과 반영 (상태는 state_path에 저장)"""
+
+    def __init__(self, engine, state_path, max_requests=MAX_BATCH_REQUESTS, max_bytes=MAX_BATCH_BYTES,
+                 prepare_workers=PREPARE_WORKERS, log=print):
+        self.engine = engine
+        self.state_path = Path(state_path)
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.prepare_workers = max(1, prepare_workers)
+        self.log = log
+        self.batches = self._load()
+
+    # ---------- 상태 파일 ----------
+
+    def _load(self):
+        if not self.state_path.exists():
+            return []
+        return json.loads(self.state_path.read_text()).get('batches', [])
+
+    def save(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        tmp_path.write_text(json.dumps({'batches': self.batches}, ensure_ascii=False, indent=1))
+        os.replace(tmp_path, self.state_path)
+
+    def submitted_keys(self):
+        """이미 제출했거나 반영한 key (errored/expired/canceled 결과는 다시 제출 가능)"""
+        keys = set()
+        for batch in self.batches:
+            failed = set(batch.get('failed', []))
+            keys.update(record['key'] for custom_id, record in batch['requests'].items()
+                        if custom_id not in failed)
+        return keys
+
+    @property
+    def pending(self):
+        """결과를 아직 모두 반영하지 않은 배치"""
+        return [batch for batch in self.batches if not batch.get('ingestedAll')]
+
+    # ---------- API ----------
+
+    def _call(self, method, path, payload=None):
+        """배치 API 호출 (429/5xx는 retry-after만큼 기다렸다 재시도)"""
+        for attempt in range(self.engine.max_retries + 1):
+            try:
+                return self.engine.call(method, path, payload)
+            except APIError as e:
+                if e.status not in RETRY_STATUS or attempt == self.engine.max_retries:
+                    raise
+                wait = e.retry_after if e.retry_after is not None else min(60, 2 ** attempt)
+            time.sleep(wait)
+
+    # ---------- 제출 ----------
+
+    def submit(self, images, prompt, on_result=None, should_stop=None):
+        """(key, 이미지 경로[, roi]) 목록을 배치로 제출 → 새 배치 ID 목록
+
+        이미 제출한 key는 건너뛰고, 캐시에 있는 이미지는 on_result로 바로 전달
+        """
+        should_stop = should_stop or (lambda: False)
+        taken = self.submitted_keys()
+        todo = [item for item in images if item[0] not in taken]
+        batch_ids = []
+        requests, records, size = [], {}, 0
+
+        def flush():
+            nonlocal requests, records, size
+            if requests:
+                batch_ids.append(self._create(requests, records, prompt))
+            requests, records, size = [], {}, 0
+
+        def prepare(item):
+            key, path, *roi = item
+            try:
+                return item, self.engine.prepare(key, path, prompt, roi[0] if roi else None)
+            except Exception as e:
+                return item, LabelResult(key, path, error=str(e))
+
+        chunk = self.prepare_workers * 8
+        with ThreadPoolExecutor(max_workers=self.prepare_workers,
+                                thread_name_prefix='batch-prepare') as pool:
+            for start in range(0, len(todo), chunk):
+                if should_stop():
+                    break
+                for item, prepared in pool.map(prepare, todo[start:start + chunk]):
+                    if isinstance(prepared, LabelResult):
+                        # 캐시 적중 또는 이미지 읽기 실패
+                        if on_result is not None:
+                            on_result(prepared)
+                        continue
+
+                    params = self.engine.message_params(prepared)
+                    request_size = len(json.dumps(params))
+                    if requests and (len(requests) >= self.max_requests
+                                     or size + request_size > self.max_bytes):
+                        flush()
+                    custom_id = f'req-{len(requests):06d}'
+                    requests.append({'custom_id': custom_id, 'params': params})
+                    records[custom_id] = prepared.to_record()
+                    size += request_size
+            flush()
+        return batch_ids
+
+    def _create(self, requests, records, prompt):
+        info = self._call('POST', '/v1/messages/batches', {'requests': requests})
+        batch = {
+            'id': info['id'],
+            'status': info.get('processing_status', 'in_progress'),
+            'submittedAt': time.time(),
+            'prompt': prompt,
+            'model': self.engine.model,
+            'counts': info.get('request_counts', {}),
+            'resultsUrl': info.get('results_url'),
+            'requests': records,
+            'ingested': [],
+            'failed': [],
+        }
+        self.batches.append(batch)
+        # 제출 직후 저장 (다시 실행해도 같은 이미지를 두 번 제출하지 않음)
+        self.save()
+        self.log(f"배치 제출: {batch['id']} ({len(requests)}개 요청)")
+        return batch['id']
+
+    # ---------- 조회 / 반영 ----------
+
+    def refresh(self):
+        """끝나지 않은 배치의 상태 갱신"""
+        changed = False
+        for batch in self.pending:
+            if batch['status'] == 'ended':
+                continue
+            info = self._call('GET', f"/v1/messages/batches/{batch['id']}")
+            status = info.get('processing_status', batch['status'])
+            if status != batch['status']:
+                self.log(f"배치 {batch['id']}: {batch['status']} → {status}")
+            batch.update(status=status, counts=info.get('request_counts', {}),
+                         resultsUrl=info.get('results_url'))
+            changed = True
+        if changed:
+            self.save()
+
+    def ingest(self, on_result, flush=None):
+        """끝난 배치의 결과를 on_result(LabelResult)로 전달 → 이번에 반영한 수
+
+        flush: 상태 파일에 반영 완료를 기록하기 전에 호출 (라벨/메타데이터를 먼저 디스크에 씀)
+        """
+        count = 0
+        for batch in self.pending:
+            if batch['status'] != 'ended' or not batch.get('resultsUrl'):
+                continue
+
+            ingested = set(batch['ingested'])
+            failed = set(batch['failed'])
+            unsaved = 0
+            with self.engine.open('GET', batch['resultsUrl']) as res:
+                for line in res:
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    custom_id = item['custom_id']
+                    record = batch['requests'].get(custom_id)
+                    if record is None or custom_id in ingested:
+                        continue
+
+                    request = PreparedRequest.from_record(record)
+                    result = item['result']
+                    if result['type'] == 'succeeded':
+                        label = self.engine.finish(request, batch['prompt'], result['message'])
+                    else:
+                        label = LabelResult(request.key, request.image_path, error=_result_error(result))
+                        failed.add(custom_id)
+                    on_result(label)
+
+                    ingested.add(custom_id)
+                    count += 1
+                    unsaved += 1
+                    if unsaved >= SAVE_EVERY:
+                        self._checkpoint(batch, ingested, failed, flush)
+                        unsaved = 0
+
+            batch['ingestedAll'] = len(ingested) >= len(batch['requests'])
+            self._checkpoint(batch, ingested, failed, flush)
+        return count
+
+    def _checkpoint(self, batch, ingested, failed, flush):
+        if flush is not None:
+            flush()
+        batch['ingested'] = sorted(ingested)
+        batch['failed'] = sorted(failed)
+        self.save()
+
+    def wait(self, on_result, flush=None, poll_interval=POLL_INTERVAL_SEC, should_stop=None):
+        """모든 배치의 결과를 반영할 때까지 조회 → 끝까지 기다렸으면 True"""
+        should_stop = should_stop or (lambda: False)
+        while True:
+            self.refresh()
+            self.ingest(on_result, flush)
+            if not self.pending:
+                return True
+            deadline = time.monotonic() + poll_interval
+            while time.monotonic() < deadline:
+                if should_stop():
+                    return False
+                time.sleep(min(1.0, poll_interval))
+
+    def cancel(self):
+        """진행 중인 배치 취소 요청 (이미 처리된 결과는 이후 ingest로 반영 가능)"""
+        for batch in self.pending:
+            if batch['status'] == 'in_progress':
+                info = self._call('POST', f"/v1/messages/batches/{batch['id']}/cancel")
+                batch['status'] = info.get('processing_status', 'canceling')
+                self.log(f"배치 취소 요청: {batch['id']}")
+        self.save()
+
+    def summary(self):
+        totals = {'batches': len(self.batches), 'pending': len(self.pending),
+                  'requests': 0, 'ingested': 0, 'failed': 0}
+        for batch in self.batches:
+            totals['requests'] += len(batch['requests'])
+            totals['ingested'] += len(batch['ingested'])
+            totals['failed'] += len(batch['failed'])
+        return totals
+
+
+def main():
+    from auto_label_pipeline import YoloLabelWriter
+    from label_metadata import LabelMetadataStore
+    from vlm_image_prep import ImagePrep
+    from vlm_response_cache import ResponseCache
+
+    parser = argparse.ArgumentParser(description='Claude Message Batches 대량 라벨링')
+    parser.add_argument('command', choices=['submit', 'wait', 'status', 'cancel'])
+    parser.add_argument('--images', default='labeling_images')
+    parser.add_argument('--labels', default='labeling_labels')
+    parser.add_argument('--state', default=str(Path(__file__).parent / 'labeling_cache' / 'claude_batches.json'))
+    parser.add_argument('--limit', type=int, default=5000)
+    parser.add_argument('--poll', type=float, default=POLL_INTERVAL_SEC)
+    args = parser.parse_args()
+
+    images_dir, labels_dir = Path(args.images), Path(args.labels)
+    cache = ResponseCache()
+    engine = ClaudeLabelEngine(os.environ.get('ANTHROPIC_API_KEY', ''), cache=cache, prep=ImagePrep())
+    labeler = MessageBatchLabeler(engine, args.state)
+
+    if args.command in ('submit', 'wait'):
+        metadata = LabelMetadataStore(labels_dir / '_metadata.json')
+        writer = YoloLabelWriter(labels_dir, metadata, label_type='claude')
+        counts = {'ok': 0, 'failed': 0}
+
+        def on_result(result):
+            if result.ok:
+                writer.write(result.image_path, result.boxes)
+                counts['ok'] += 1
+            else:
+                counts['failed'] += 1
+
+        if args.command == 'submit':
+            images = set(f.stem for f in images_dir.glob('*.jpg'))
+            labeled = set(f.stem for f in labels_dir.glob('*.txt') if f.stem != 'classes')
+            unlabeled = sorted(images - labeled)[:args.limit]
+            batch_ids = labeler.submit([(stem, images_dir / f'{stem}.jpg') for stem in unlabeled],
+                                       BATCH_PROMPT, on_result)
+            print(f'미라벨링 {len(unlabeled)}개 → 새 배치 {len(batch_ids)}개, 캐시에서 바로 반영 {counts["ok"]}개')
+        else:
+            labeler.wait(on_result, writer.flush, args.poll)
+            print(f'결과 반영: 성공 {counts["ok"]}, 실패 {counts["failed"]}')
+
+        writer.flush()
+        metadata.close()
+
+    elif args.command == 'cancel':
+        labeler.refresh()
+        labeler.cancel()
+    else:
+        labeler.refresh()
+
+    print(json.dumps(labeler.summary(), ensure_ascii=False))
+    for batch in labeler.batches:
+        print(f"  {batch['id']}  {batch['status']:<12} 요청 {len(batch['requests'])}  "
+              f"반영 {len(batch['ingested'])}  실패 {len(batch['failed'])}")
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
-"""Claude AI 느린 라벨링 (Rate limit 대응)"""
-import anthropic
-import base64
-import json
-import time
+"""Claude AI 느린 라벨링 (Rate limit 대응)
+
+동시 요청 1개, 초당 0.2회로 시작 (429가 오면 retry-after만큼 대기 후 더 느리게)
+"""
 from pathlib import Path
-import re
+
+import yolo_labels
+from claude_label_engine import ClaudeLabelEngine, format_stats
+from label_metadata import LabelMetadataStore
+from vlm_image_prep import ImagePrep
+from vlm_response_cache import ResponseCache
 
 import os
 API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
@@ -13,12 +17,16 @@ IMAGES_DIR = Path("labeling_images")
 LABELS_DIR = Path("labeling_labels")
 META_FILE = LABELS_DIR / "_metadata.json"
 
-# 메타데이터 로드
-if META_FILE.exists():
-    with open(META_FILE) as f:
-        metadata = json.load(f)
-else:
-    metadata = {}
+PROMPT = "바벨 원판 끝단 위치를 JSON으로. 박스크기 w,h는 0.01~0.1 정도. {\"found\":bool,\"boxes\":[{\"cx\":float,\"cy\":float,\"w\":float,\"h\":float}]}"
+
+# 메타데이터 로드 (저널 기반 저장소)
+metadata = LabelMetadataStore(META_FILE)
+
+# 같은 이미지+프롬프트+모델의 이전 응답은 API 호출 없이 재사용
+cache = ResponseCache()
+
+# 긴 변 1024px, JPEG quality 85로 줄여서 전송 (좌표는 원본 기준으로 되돌림)
+prep = ImagePrep()
 
 # 미라벨링 이미지 중 바벨 포커스 영상만 선택
 images = set(f.stem for f in IMAGES_DIR.glob("focused_*.jpg"))
@@ -28,61 +36,42 @@ unlabeled = sorted(list(images - labeled))[:50]  # 50개만
 print(f"바벨 포커스 이미지 라벨링", flush=True)
 print(f"처리할 이미지: {len(unlabeled)}개", flush=True)
 
-client = anthropic.Anthropic(api_key=API_KEY)
 success = 0
 no_barbell = 0
+done = 0
+
+
+def on_result(result):
+    global success, no_barbell, done
+    img_stem = result.key
+    done += 1
+    print(f"[{done}/{len(unlabeled)}] {img_stem[-30:]}...", end=" ", flush=True)
+
+    if result.error:
+        print("err", flush=True)
+        return
+    if result.boxes is None:
+        print("?", flush=True)
+        return
+
+    yolo_labels.write(LABELS_DIR / f"{img_stem}.txt", yolo_labels.from_boxes(result.boxes))
+    metadata.set(img_stem, "claude")
+
+    if result.boxes:
+        success += 1
+        print(f"O ({len(result.boxes)})", flush=True)
+    else:
+        no_barbell += 1
+        print("X", flush=True)
+
+
+engine = ClaudeLabelEngine(API_KEY, concurrency=1, rate=0.2, max_rate=0.5, burst=1, max_tokens=256, cache=cache,
+                           prep=prep)
+stats = engine.run([(stem, IMAGES_DIR / f"{stem}.jpg") for stem in unlabeled], PROMPT, on_result)
 
-for i, img_stem in enumerate(unlabeled):
-    img_path = IMAGES_DIR / f"{img_stem}.jpg"
-    label_path = LABELS_DIR / f"{img_stem}.txt"
-    
-    print(f"[{i+1}/{len(unlabeled)}] {img_stem[-30:]}...", end=" ", flush=True)
-    
-    try:
-        with open(img_path, 'rb') as f:
-            image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-        
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=256,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": image_data}},
-                    {"type": "text", "text": "바벨 원판 끝단 위치를 JSON으로. 박스크기 w,h는 0.01~0.1 정도. {\"found\":bool,\"boxes\":[{\"cx\":float,\"cy\":float,\"w\":float,\"h\":float}]}"}
-                ]
-            }]
-        )
-        
-        response = message.content[0].text
-        match = re.search(r'\{.*\}', response, re.DOTALL)
-        
-        if match:
-            data = json.loads(match.group())
-            if data.get("found") and data.get("boxes"):
-                lines = [f"0 {b['cx']:.4f} {b['cy']:.4f} {b['w']:.4f} {b['h']:.4f}" for b in data["boxes"]]
-                with open(label_path, 'w') as f:
-                    f.write('\n'.join(lines))
-                metadata[img_stem] = "claude"
-                success += 1
-                print(f"O ({len(lines)})", flush=True)
-            else:
-                with open(label_path, 'w') as f:
-                    f.write('')
-                metadata[img_stem] = "claude"
-                no_barbell += 1
-                print("X", flush=True)
-                
-    except Exception as e:
-        if "rate" in str(e).lower():
-            print("대기(2분)...", flush=True)
-            time.sleep(120)
-        else:
-            print(f"err", flush=True)
-    
-    time.sleep(5)  # 5초 간격
-
-with open(META_FILE, 'w') as f:
-    json.dump(metadata, f, indent=2)
+# 저널 컴팩션
+metadata.close()
+cache.close()
 
 print(f"\n완료: 바벨발견 {success}개, 없음 {no_barbell}개", flush=True)
+print(format_stats(stats), flush=True)
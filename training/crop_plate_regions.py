@@ -7,8 +7,11 @@
 import os
 from pathlib import Path
 from PIL import Image
+import numpy as np
 import shutil
 
+import yolo_labels
+
 TRAINING_DIR = Path(__file__).parent
 ORIGINAL_DATASET = TRAINING_DIR / "barbell_dataset"
 NEW_DATASET = TRAINING_DIR / "barbell_plate_dataset"
@@ -43,14 +46,13 @@ def process_images_with_crop():
             continue
 
         print(f"\n=== Processing {split} ===")
+        labels = yolo_labels.load_dir(labels_dir)
 
         for img_path in images_dir.glob("*"):
             if img_path.suffix.lower() not in [".jpg", ".jpeg", ".png"]:
                 continue
 
-            label_path = labels_dir / f"{img_path.stem}.txt"
-
-            if not label_path.exists():
+            if img_path.stem not in labels:
                 # Background 이미지 - 그대로 복사
                 shutil.copy(img_path, NEW_DATASET / split / "images" / img_path.name)
                 # 빈 레이블 파일
@@ -65,41 +67,26 @@ def process_images_with_crop():
                 print(f"  이미지 로드 실패: {img_path.name} - {e}")
                 continue
 
-            # 레이블 파싱
-            labels = label_path.read_text().strip().split("\n")
-            new_labels = []
-
-            for label in labels:
-                if not label.strip():
-                    continue
-
-                parts = label.split()
-                if len(parts) < 5:
-                    continue
-
-                # YOLO 형식: class_id, cx, cy, w, h (정규화)
-                class_id = 0  # barbell_plate_side
-                cx, cy, w, h = map(float, parts[1:5])
-
-                # 바벨의 좌우 끝 영역을 플레이트로 추출
-                # 바벨 bounding box의 좌우 25% 영역
-                plate_w = w * 0.25
-
-                # 왼쪽 플레이트
-                left_cx = cx - w/2 + plate_w/2
-                left_cy = cy
-                new_labels.append(f"{class_id} {left_cx:.6f} {left_cy:.6f} {plate_w:.6f} {h:.6f}")
-
-                # 오른쪽 플레이트
-                right_cx = cx + w/2 - plate_w/2
-                right_cy = cy
-                new_labels.append(f"{class_id} {right_cx:.6f} {right_cy:.6f} {plate_w:.6f} {h:.6f}")
+            # YOLO 형식: class_id, cx, cy, w, h (정규화)
+            rows = labels.get(img_path.stem)
+
+            # 바벨의 좌우 끝 영역을 플레이트로 추출
+            # 바벨 bounding box의 좌우 25% 영역
+            plate_w = rows[:, 3] * 0.25
+            left = rows.copy()
+            left[:, 0] = 0  # barbell_plate_side
+            left[:, 1] = rows[:, 1] - rows[:, 3] / 2 + plate_w / 2
+            left[:, 3] = plate_w
+            right = left.copy()
+            right[:, 1] = rows[:, 1] + rows[:, 3] / 2 - plate_w / 2
+            # 바벨마다 왼쪽, 오른쪽 순서
+            new_labels = np.stack([left, right], axis=1).reshape(-1, 5)
 
             # 이미지 복사
             shutil.copy(img_path, NEW_DATASET / split / "images" / img_path.name)
 
             # 새 레이블 저장
-            (NEW_DATASET / split / "labels" / f"{img_path.stem}.txt").write_text("\n".join(new_labels))
+            yolo_labels.write(NEW_DATASET / split / "labels" / f"{img_path.stem}.txt", new_labels)
 
         # 이미지 수 출력
         img_count = len(list((NEW_DATASET / split / "images").glob("*")))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+데이터셋 폴더 증분 생성 (export / 학습 데이터 준비 공용)
+- 이미지는 하드링크 (다른 파일시스템이라 실패하면 복사)
+- 라벨(.txt)은 복사 (라벨링 서버가 원본 라벨 파일을 제자리에서 고쳐 쓰므로 링크하면 데이터셋도 바뀜)
+- 이전 결과의 매니페스트(원본 경로, 크기, mtime)와 비교해서 바뀐 파일만 다시 만들고
+  목록에서 빠진 파일은 삭제 → 폴더를 지우고 전부 다시 복사하지 않음
+
+ultralytics는 이미지 경로의 /images/를 /labels/로 바꿔 라벨을 찾으므로
+원본 폴더(labeling_images, labeling_labels)를 파일 목록(.txt)으로 바로 넘길 수는 없고,
+대신 링크로 images/labels 구조를 만듭니다.
+
+사용법:
+    files = {'train/images/a.jpg': IMAGES_DIR / 'a.jpg', 'train/labels/a.txt': LABELS_DIR / 'a.txt'}
+    stats = materialize(DATASET_DIR, files)
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+MANIFEST_NAME = '.manifest.json'
+COPY_SUFFIXES = ('.txt',)
+
+
+def _signature(st):
+    return [st.st_size, st.st_mtime_ns]
+
+
+def link_or_copy(src, dst):
+    """하드링크, 안 되면 복사 → 'linked' / 'copied'"""
+    try:
+        os.link(src, dst)
+        return 'linked'
+    except OSError:
+        # EXDEV(다른 파일시스템), EPERM(링크 미지원 FS) 등
+        shutil.copy2(src, dst)
+        return 'copied'
+
+
+def load_manifest(root):
+    try:
+        with open(Path(root) / MANIFEST_NAME, encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def materialize(root, files, dirs=(), copy_suffixes=COPY_SUFFIXES):
+    """root 아래를 files({상대 경로: 원본 경로})와 같게 맞춤
+
+    Args:
+        dirs: 파일이 없어도 만들고 정리할 하위 폴더 (예: 'valid/images')
+
+    Returns:
+        dict: linked, copied, unchanged, removed, seconds
+    """
+    start = time.perf_counter()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(root)
+    stats = {'linked': 0, 'copied': 0, 'unchanged': 0, 'removed': 0}
+
+    manifest = {}
+    dirs = {root / d for d in dirs}
+    for directory in dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+    for rel, src in files.items():
+        src = str(src)
+        signature = _signature(os.stat(src))
+        manifest[rel] = [src, *signature]
+        dst = root / rel
+        if dst.parent not in dirs:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            dirs.add(dst.parent)
+
+        if previous.get(rel) == manifest[rel] and os.path.lexists(dst):
+            stats['unchanged'] += 1
+            continue
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        if dst.suffix.lower() in copy_suffixes:
+            shutil.copy2(src, dst)
+            stats['copied'] += 1
+        else:
+            stats[link_or_copy(src, dst)] += 1
+
+    # 목록에 없는 파일 삭제 (이전 매니페스트 항목 + 매니페스트 없이 만들어진 예전 폴더의 파일)
+    stale = {rel for rel in previous if rel not in manifest}
+    for directory in dirs | {(root / rel).parent for rel in stale}:
+        # root 바로 아래 파일(data.yaml, 매니페스트)은 건드리지 않음
+        if directory == root or not directory.is_dir():
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    rel = Path(entry.path).relative_to(root).as_posix()
+                    if rel not in manifest:
+                        os.unlink(entry.path)
+                        stats['removed'] += 1
+
+    tmp = root / (MANIFEST_NAME + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'files': manifest}, f)
+    os.replace(tmp, root / MANIFEST_NAME)
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def write_if_changed(path, text):
+    """내용이 같으면 쓰지 않음 (data.yaml mtime 유지)"""
+    path = Path(path)
+    if path.exists() and path.read_text() == text:
+        return False
+    path.write_text(text)
+    return True
+
+
+def format_stats(stats):
+    return (f"링크 {stats['linked']}, 복사 {stats['copied']}, 그대로 {stats['unchanged']}, "
+            f"삭제 {stats['removed']} ({stats['seconds']:.2f}s)")
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+샤드 데이터셋 (이미지 + YOLO 라벨을 큰 파일 몇 개로 묶음)
+- {prefix}-{세대}-{번호}.shard: 레코드(JPEG 바이트 + 라벨 텍스트)를 이어 붙인 파일 (shard_bytes마다 새 파일)
+- {prefix}.index.json: 레코드별 (이름, 샤드 번호, 오프셋, 이미지 길이, 라벨 길이, 높이, 너비)
+  → 작은 파일 수만 개를 나열/열기 하지 않고 순차 쓰기, rsync도 파일 몇 개
+- 읽기는 mmap (레코드 하나 = 슬라이스, 복사 없이 디코드)
+  ShardReader는 만들 때(DataLoader 워커로 넘어가면 워커에서 다시) 인덱스의 샤드를 모두 매핑
+  → 매핑한 뒤에는 파일이 지워져도 계속 읽힘
+- 다시 쓸 때는 새 세대 이름으로 쓰고 인덱스를 원자적으로 바꾼 뒤 그 전전 세대 삭제
+  (바로 이전 세대는 다음에 다시 쓸 때까지 남김 → 이전 인덱스를 가진 읽는 쪽이 새로 매핑해도 있음)
+
+ultralytics 학습은 data.yaml의 train/val에 인덱스 파일을 지정하고
+augment_dataset.augmentation_trainer()로 학습 (ShardYOLODataset)
+
+사용법:
+    with ShardWriter(root, 'train') as writer:
+        writer.add('a.jpg', jpeg_bytes, label_text)
+    reader = ShardReader(root / 'train.index.json')
+    img, labels = reader.read_image(0), reader.label_text(0)
+
+    python3 dataset_shards.py pack augmented_images augmented_labels augmented_shards
+    python3 dataset_shards.py info augmented_shards
+"""
+
+import argparse
+import io
+import json
+import mmap
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from dataset_split import SplitIndex, VAL_RATIO
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SHARD_SUFFIX = '.shard'
+INDEX_SUFFIX = '.index.json'
+SHARD_BYTES = 256 * 1024 * 1024
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def is_shard_index(path):
+    return isinstance(path, (str, Path)) and str(path).endswith(INDEX_SUFFIX)
+
+
+def image_shape(data):
+    """인코딩된 이미지 → (높이, 너비) (Pillow가 있으면 헤더만 읽음)"""
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(data)) as im:
+                return im.height, im.width
+        except OSError:
+            pass
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError('이미지를 디코드할 수 없습니다')
+    return img.shape[:2]
+
+
+def _index_shards(path):
+    """인덱스 파일의 샤드 이름 목록 (없거나 깨졌으면 빈 목록)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['shards']
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+class ShardWriter:
+    """prefix의 샤드를 새로 씀 (close에서 인덱스 저장, 예외로 끝나면 쓰던 샤드 삭제)"""
+
+    def __init__(self, root, prefix, shard_bytes=SHARD_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.shard_bytes = shard_bytes
+        self.generation = f'{time.time_ns():x}'
+        self.shards = []
+        self.records = []
+        self.bytes = 0
+        self._file = None
+        self._offset = 0
+
+    def add(self, name, image_bytes, label_text='', shape=None):
+        if self._file is None or self._offset >= self.shard_bytes:
+            self._next_shard()
+        label = label_text.encode('utf-8')
+        height, width = shape or image_shape(image_bytes)
+        self._file.write(image_bytes)
+        self._file.write(label)
+        self.records.append([name, len(self.shards) - 1, self._offset, len(image_bytes), len(label),
+                             int(height), int(width)])
+        self._offset += len(image_bytes) + len(label)
+        self.bytes += len(image_bytes) + len(label)
+
+    def _next_shard(self):
+        if self._file is not None:
+            self._file.close()
+        name = f'{self.prefix}-{self.generation}-{len(self.shards):05d}{SHARD_SUFFIX}'
+        self._file = open(self.root / name, 'wb')
+        self.shards.append(name)
+        self._offset = 0
+
+    def close(self):
+        """인덱스 저장 후 현재/바로 이전 세대가 아닌 샤드 삭제 → 인덱스 경로"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        path = self.root / f'{self.prefix}{INDEX_SUFFIX}'
+        keep = set(self.shards) | set(_index_shards(path))
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'shards': self.shards, 'records': self.records}, f)
+        os.replace(tmp, path)
+
+        for shard in self.root.glob(f'{self.prefix}-*{SHARD_SUFFIX}'):
+            if shard.name not in keep:
+                shard.unlink()
+        return path
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for name in self.shards:
+            (self.root / name).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ShardReader:
+    """인덱스 파일 → 레코드 단위 읽기 (map-style: len / reader[i] → dict)"""
+
+    def __init__(self, index_path):
+        self.path = Path(index_path)
+        self.root = self.path.parent
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.shards = data['shards']
+        self.records = data['records']
+        self.names = [record[0] for record in self.records]
+        self._positions = None
+        self._maps = []
+        self._open()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return {'name': self.names[index], 'img': self.read_image(index), 'labels': self.label_text(index)}
+
+    def __getstate__(self):
+        # mmap은 피클 불가 → DataLoader 워커에서 다시 매핑
+        state = self.__dict__.copy()
+        state['_maps'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def _open(self):
+        """인덱스의 샤드를 모두 매핑 (나중에 다시 쓰기로 파일이 지워져도 매핑은 유지됨)"""
+        for name in self.shards:
+            with open(self.root / name, 'rb') as f:
+                self._maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _map(self, shard):
+        return self._maps[shard]
+
+    def find(self, name):
+        """이름 → 레코드 번호 (없으면 KeyError)"""
+        if self._positions is None:
+            self._positions = {name: i for i, name in enumerate(self.names)}
+        return self._positions[name]
+
+    def image_bytes(self, index):
+        _, shard, offset, image_len, _, _, _ = self.records[index]
+        return memoryview(self._map(shard))[offset:offset + image_len]
+
+    def label_text(self, index):
+        _, shard, offset, image_len, label_len, _, _ = self.records[index]
+        start = offset + image_len
+        return self._map(shard)[start:start + label_len].decode('utf-8')
+
+    def shape(self, index):
+        return tuple(self.records[index][5:7])
+
+    def read_image(self, index, flags=cv2.IMREAD_COLOR):
+        _, shard, offset, image_len, _, _, _ = self.records[index]
+        return cv2.imdecode(np.frombuffer(self._map(shard), np.uint8, image_len, offset), flags)
+
+    def close(self):
+        for mapped in self._maps:
+            mapped.close()
+        self._maps.clear()
+
+    def stats(self):
+        return {'records': len(self.records), 'shards': len(self.shards),
+                'bytes': sum(record[3] + record[4] for record in self.records)}
+
+
+class SplitShardWriter:
+    """레코드를 도착 순서대로 train/val 샤드에 추가 (dataset_split.py 그룹으로 나눔)"""
+
+    def __init__(self, root, val_ratio=VAL_RATIO, shard_bytes=SHARD_BYTES, variants=()):
+        self.split_index = SplitIndex(variants=variants)
+        self.val_ratio = val_ratio
+        self.writers = {split: ShardWriter(root, split, shard_bytes) for split in ('train', 'val')}
+
+    def add(self, name, image_bytes, label_text='', shape=None):
+        split = self.split_index.split_of(Path(name).stem, self.val_ratio)
+        self.writers[split].add(name, image_bytes, label_text, shape)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.split_index.save()
+
+    def abort(self):
+        for writer in self.writers.values():
+            writer.abort()
+
+    def stats(self):
+        return {'records': sum(len(w.records) for w in self.writers.values()),
+                'shards': sum(len(w.shards) for w in self.writers.values()),
+                'bytes': sum(w.bytes for w in self.writers.values())}
+
+
+def write_split_shards(root, splits, shard_bytes=SHARD_BYTES):
+    """{prefix: [(이미지 경로, 라벨 경로)]} → prefix별 샤드 (라벨 파일이 없으면 빈 라벨)
+
+    Returns:
+        dict: records, shards, bytes, seconds
+    """
+    start = time.perf_counter()
+    stats = {'records': 0, 'shards': 0, 'bytes': 0}
+    for prefix, pairs in splits.items():
+        with ShardWriter(root, prefix, shard_bytes) as writer:
+            for img_path, label_path in pairs:
+                try:
+                    label_text = Path(label_path).read_text()
+                except FileNotFoundError:
+                    label_text = ''
+                writer.add(Path(img_path).name, Path(img_path).read_bytes(), label_text)
+        stats['records'] += len(writer.records)
+        stats['shards'] += len(writer.shards)
+        stats['bytes'] += writer.bytes
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def pack_pairs(root, pairs, val_ratio=VAL_RATIO, shard_bytes=SHARD_BYTES):
+    """이미지-라벨 쌍 → train/val 샤드 (dataset_split.py 그룹 단위 고정 분할)"""
+    train, val = SplitIndex().partition(pairs, val_ratio, key=lambda pair: Path(pair[0]).stem)
+    return write_split_shards(root, {'train': train, 'val': val}, shard_bytes)
+
+
+def shard_yaml(root, names, train='train', val='val'):
+    """샤드 폴더용 data.yaml 내용 (names: 클래스 이름 목록)"""
+    lines = [f'path: {Path(root).absolute()}', f'train: {train}{INDEX_SUFFIX}', f'val: {val}{INDEX_SUFFIX}',
+             '', 'names:']
+    lines += [f'  {i}: {name}' for i, name in enumerate(names)]
+    return '\n'.join(lines) + '\n'
+
+
+def format_stats(stats):
+    return (f"레코드 {stats['records']}개, 샤드 {stats['shards']}개, "
+            f"{stats['bytes'] / 1024 / 1024:.1f}MB ({stats['seconds']:.2f}s)")
+
+
+def _pairs_in(images_dir, labels_dir):
+    pairs = []
+    for img_path in sorted(Path(images_dir).iterdir()):
+        if img_path.suffix.lower() in IMAGE_SUFFIXES:
+            label_path = Path(labels_dir) / f'{img_path.stem}.txt'
+            if label_path.exists():
+                pairs.append((img_path, label_path))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='이미지 + YOLO 라벨 샤드')
+    sub = parser.add_subparsers(dest='command')
+    pack = sub.add_parser('pack', help='이미지/라벨 폴더 → train/val 샤드')
+    pack.add_argument('images')
+    pack.add_argument('labels')
+    pack.add_argument('output')
+    pack.add_argument('--val-ratio', type=float, default=VAL_RATIO)
+    pack.add_argument('--shard-mb', type=int, default=SHARD_BYTES // 1024 // 1024)
+    pack.add_argument('--names', nargs='+', default=['barbell_endpoint'], help='data.yaml 클래스 이름')
+    info = sub.add_parser('info', help='샤드 폴더 또는 인덱스 파일 통계')
+    info.add_argument('path')
+    bench = sub.add_parser('bench', help='무작위 순서 읽기+디코드 처리량')
+    bench.add_argument('index')
+    bench.add_argument('--count', type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        stats = pack_pairs(args.output, _pairs_in(args.images, args.labels), args.val_ratio,
+                           args.shard_mb * 1024 * 1024)
+        (Path(args.output) / 'data.yaml').write_text(shard_yaml(args.output, args.names))
+        print(f'샤드 생성: {format_stats(stats)} → {args.output}')
+    elif args.command == 'info':
+        path = Path(args.path)
+        for index in ([path] if is_shard_index(path) else sorted(path.glob(f'*{INDEX_SUFFIX}'))):
+            print(f'{index.name}: {json.dumps(ShardReader(index).stats())}')
+    elif args.command == 'bench':
+        reader = ShardReader(args.index)
+        order = np.random.default_rng(0).permutation(len(reader))[:args.count]
+        start = time.perf_counter()
+        for i in order:
+            reader.read_image(int(i))
+            reader.label_text(int(i))
+        elapsed = time.perf_counter() - start
+        print(f'{len(order)}개 읽기+디코드: {elapsed:.2f}s ({len(order) / elapsed:.0f} img/s)')
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+그룹 단위 고정 train/val 분할 (export / 학습 데이터 준비 공용)
+- 같은 원본에서 나온 증강 이미지(foo, foo_bright, foo_flip ...)와
+  (변형 이름은 augment_recipes/의 레시피와 augment_data.py 매니페스트에서 읽음 → 새 변형도 코드 수정 없이)
+  같은 영상에서 뽑은 프레임(hq_{영상}_00012, hq_{영상}_00013 ...)은 같은 그룹 → 항상 같은 쪽
+  (val에 train 프레임의 변형이 섞이면 val mAP가 부풀려짐)
+  프레임 규칙은 크롤러/프레임 추출 스크립트의 접두사(FRAME_PREFIXES)에만 적용
+  (IMG_1234, DSC_0001 같은 카메라 사진은 사진마다 따로)
+- 그룹의 분할은 그룹 이름 해시로 정하고 dataset_split.json에 기록
+  → 이미지가 추가돼도 기존 이미지는 옮겨지지 않음 (ultralytics 라벨/이미지 캐시 유지)
+- 그룹이 2개 이상인데 한쪽이 비면 그룹 하나를 반대쪽으로 옮김 (작은 데이터셋에서 val이 비지 않게),
+  실제 val 비율이 val_ratio와 많이 다르면 경고
+
+사용법:
+    index = SplitIndex()
+    train, val = index.partition(paths, val_ratio=0.2)   # 새 그룹이 있으면 기록 파일 갱신
+    python3 dataset_split.py stats
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+from augment_recipe import RECIPES_DIR, RecipeError, load_recipe
+
+SPLIT_INDEX = Path(__file__).parent / 'dataset_split.json'
+VAL_RATIO = 0.2
+
+# augment_data.py 매니페스트 (원본 이미지 → 만든 변형 이름, augment_data.MANIFEST_NAME)
+AUGMENT_MANIFEST = Path(__file__).parent / 'augmented_labels' / '_augment_manifest.json'
+# 레시피를 읽지 못해도 떼는 기본 접미사 (예전 augment_data.py 변형 이름, foo_bright_flip → foo)
+AUGMENT_SUFFIXES = {
+    'bright', 'dark', 'flip', 'blur', 'color', 'noise', 'strongblur', 'hblur', 'cutout',
+    'extremeblur', 'mildblur', 'zoomblur', 'doubleblur',
+}
+# 영상 프레임 번호 (크롤러/프레임 추출 스크립트의 {prefix}_%04d ~ %06d)
+FRAME_PATTERN = re.compile(r'^(.+)_\d{4,6}$')
+# 프레임 이름을 쓰는 스크립트의 접두사 (crawl_hq_barbell, crawl_barbell_exercises, crawl_shorts,
+# crawl_side_view, crawl_new_barbell, 라벨링 폴더로 복사할 때 crawled_ / crawled_v2_를 붙이는 크롤러)
+FRAME_PREFIXES = ('hq_', 'barbell_', 'shorts_', 'side_', 'new_', 'crawled_')
+RATIO_WARN = 0.1        # 실제 val 비율이 이만큼 넘게 벗어나면 경고
+
+
+def recipe_variants(recipes_dir=RECIPES_DIR):
+    """레시피 파일들의 변형 이름 + 기본 접미사"""
+    names = set(AUGMENT_SUFFIXES)
+    for path in sorted(Path(recipes_dir).glob('*')):
+        if path.suffix.lower() not in ('.json', '.yaml', '.yml'):
+            continue
+        try:
+            recipe = load_recipe(path)
+        except (RecipeError, OSError, ValueError):
+            continue
+        names.update(variant['name'] for variant in recipe.get('variants', []) if variant.get('name'))
+    return names
+
+
+def manifest_sources(path=AUGMENT_MANIFEST):
+    """augment_data.py 출력 이름 → 원본 이름 (매니페스트에 기록된 변형 그대로)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            sources = json.load(f).get('sources', {})
+    except (OSError, ValueError):
+        return {}
+    return {f'{Path(img_name).stem}_{name}': Path(img_name).stem
+            for img_name, entry in sources.items() for name in entry.get('outputs', {})}
+
+
+def base_stem(stem, variants=AUGMENT_SUFFIXES, sources=None):
+    """증강 접미사를 뗀 원본 이미지 이름 (매니페스트에 있으면 그 원본, 없으면 변형 이름을 뒤에서부터 뗌)"""
+    if sources and stem in sources:
+        return sources[stem]
+    stripped = True
+    while stripped:
+        stripped = False
+        for name in variants:
+            if len(stem) > len(name) + 1 and stem.endswith('_' + name):
+                stem, stripped = stem[:-len(name) - 1], True
+                break
+    return stem
+
+
+def group_key(stem, variants=AUGMENT_SUFFIXES, sources=None):
+    """분할 그룹 (크롤러 영상 프레임이면 영상, 아니면 원본 이미지)"""
+    base = base_stem(stem, variants, sources)
+    if not base.startswith(FRAME_PREFIXES):
+        return base
+    match = FRAME_PATTERN.match(base)
+    return match.group(1) if match else base
+
+
+def hash_fraction(key):
+    """그룹 이름 → [0, 1) 고정 값"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+class SplitIndex:
+    """그룹 → 'train'/'val' 기록 (한 번 정해진 그룹은 비율을 바꿔도 그대로)"""
+
+    def __init__(self, path=SPLIT_INDEX, variants=()):
+        """variants: 레시피 파일 밖의 레시피로 만든 변형 이름 (augment_data.py --recipe 경로)"""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.variants = recipe_variants() | set(variants)
+        self.sources = manifest_sources()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.groups = json.load(f).get('groups', {})
+        except (OSError, ValueError):
+            self.groups = {}
+
+    def _assign(self, group, val_ratio):
+        split = self.groups.get(group)
+        if split is None:
+            split = self.groups[group] = 'val' if hash_fraction(group) < val_ratio else 'train'
+        return split
+
+    def group_of(self, stem):
+        return group_key(stem, self.variants, self.sources)
+
+    def split_of(self, stem, val_ratio=VAL_RATIO):
+        """이미지 이름 → 'train'/'val' (처음 보는 그룹이면 해시로 정해서 기록, 저장은 save)"""
+        with self._lock:
+            return self._assign(self.group_of(stem), val_ratio)
+
+    def partition(self, items, val_ratio=VAL_RATIO, key=lambda item: Path(item).stem):
+        """items → (train 목록, val 목록) (이름순, 기록이 바뀌면 저장)
+
+        그룹이 2개 이상이면 양쪽에 최소 한 그룹 (한쪽이 비면 해시가 반대쪽에 가장 가까운 그룹을 옮겨 기록)
+        """
+        items = sorted(items, key=key)
+        groups = [self.group_of(key(item)) for item in items]
+        with self._lock:
+            before = dict(self.groups)
+            present = sorted(set(groups))
+            sides = {self._assign(group, val_ratio) for group in present}
+            if len(present) >= 2 and len(sides) == 1:
+                other = 'train' if sides.pop() == 'val' else 'val'
+                moved = (min if other == 'val' else max)(present, key=hash_fraction)
+                self.groups[moved] = other
+            splits = [self.groups[group] for group in groups]
+            changed = self.groups != before
+        if changed:
+            self.save()
+
+        train = [item for item, split in zip(items, splits) if split == 'train']
+        val = [item for item, split in zip(items, splits) if split == 'val']
+        if items and abs(len(val) / len(items) - val_ratio) > RATIO_WARN:
+            print(f'분할 경고: val {len(val)}/{len(items)}장 ({len(val) / len(items):.0%}), '
+                  f'목표 {val_ratio:.0%} - 그룹 {len(present)}개 단위로 나눠서 비율이 맞지 않음')
+        return train, val
+
+    def save(self):
+        with self._lock:
+            data = {'version': 1, 'groups': dict(sorted(self.groups.items()))}
+            tmp = self.path.with_suffix('.json.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=0, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def stats(self):
+        with self._lock:
+            val = sum(1 for split in self.groups.values() if split == 'val')
+            return {'groups': len(self.groups), 'train': len(self.groups) - val, 'val': val}
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    index = SplitIndex()
+    if command == 'stats':
+        print(json.dumps(index.stats(), indent=2))
+    elif command == 'group' and len(sys.argv) > 2:
+        for stem in sys.argv[2:]:
+            print(f'{stem}: {index.group_of(stem)} → {index.split_of(stem)}')
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,74 +6,79 @@
 """
 
 import os
-import shutil
-import random
 from pathlib import Path
 from ultralytics import YOLO
 
+from augment_data import OUTPUT_SHARDS_DIR, get_matched_pairs
+from augment_recipe import DEFAULT_RECIPE
+from dataset_materializer import format_stats, materialize, write_if_changed
+from dataset_shards import format_stats as format_shard_stats, pack_pairs, shard_yaml
+from dataset_split import SplitIndex
+from letterbox_cache import cached_training_args
+
+from model_registry import ModelRegistry
+
 TRAINING_DIR = Path(__file__).parent
 AUGMENTED_IMAGES = TRAINING_DIR / 'augmented_images'
 AUGMENTED_LABELS = TRAINING_DIR / 'augmented_labels'
 DATASET_DIR = TRAINING_DIR / 'augmented_dataset'
+SOURCE_DATASET_DIR = TRAINING_DIR / 'source_dataset'  # --on-the-fly: 원본 라벨링 이미지만 (변형은 학습 중 생성)
+SOURCE_SHARDS_DIR = TRAINING_DIR / 'source_shards'    # --on-the-fly --shards
+CLASS_NAMES = ['barbell_endpoint', 'barbell_collar']
 
 def find_best_model():
-    """가장 최근 학습된 best.pt 찾기"""
-    runs_dir = TRAINING_DIR / 'runs' / 'detect'
-    if not runs_dir.exists():
-        return None
-
-    # barbell 관련 폴더 중 가장 최근 것
-    barbell_dirs = sorted(
-        [d for d in runs_dir.iterdir() if d.is_dir() and d.name.startswith('barbell')],
-        key=lambda x: x.stat().st_mtime,
-        reverse=True
-    )
-
-    for d in barbell_dirs:
-        best_pt = d / 'weights' / 'best.pt'
-        if best_pt.exists():
-            return best_pt
-    return None
-
-def prepare_dataset(train_ratio=0.85):
-    """데이터셋 준비 (train/val 분할)"""
-    for split in ['train', 'val']:
-        (DATASET_DIR / 'images' / split).mkdir(parents=True, exist_ok=True)
-        (DATASET_DIR / 'labels' / split).mkdir(parents=True, exist_ok=True)
-
-    # 기존 파일 삭제
-    for split in ['train', 'val']:
-        for f in (DATASET_DIR / 'images' / split).glob('*'):
-            f.unlink()
-        for f in (DATASET_DIR / 'labels' / split).glob('*'):
-            f.unlink()
-
-    pairs = []
-    for img_path in AUGMENTED_IMAGES.glob('*'):
-        if img_path.suffix.lower() not in ['.jpg', '.jpeg', '.png']:
-            continue
-        label_path = AUGMENTED_LABELS / f"{img_path.stem}.txt"
-        if label_path.exists():
-            pairs.append((img_path, label_path))
+    """가장 최근 학습된 best.pt 찾기 (barbell 관련 run 중)"""
+    return ModelRegistry(TRAINING_DIR / 'runs' / 'detect').latest('barbell')
+
+def prepare_dataset(train_ratio=0.85, on_the_fly=False, shards=False):
+    """데이터셋 준비 (train/val 분할, 이전 준비 결과와 달라진 파일만 링크/복사)
+
+    on_the_fly: augment_data.py 결과 대신 원본 라벨링 이미지로 준비 (augment_dataset.py가 학습 중 증강)
+    shards: 폴더 대신 샤드(dataset_shards.py) - 증강 결과는 augment_data.py --shards가 쓴 샤드를 그대로 사용,
+            on_the_fly면 원본 라벨링 이미지를 샤드로 묶음
+    """
+    if shards and not on_the_fly:
+        if not (OUTPUT_SHARDS_DIR / 'train.index.json').exists():
+            raise SystemExit(f"증강 샤드가 없습니다: {OUTPUT_SHARDS_DIR} (먼저 python3 augment_data.py --shards)")
+        write_if_changed(OUTPUT_SHARDS_DIR / 'data.yaml', shard_yaml(OUTPUT_SHARDS_DIR, CLASS_NAMES))
+        return OUTPUT_SHARDS_DIR / 'data.yaml'
+
+    if on_the_fly:
+        pairs = get_matched_pairs()
+        dataset_dir = SOURCE_DATASET_DIR
+    else:
+        pairs = []
+        for img_path in AUGMENTED_IMAGES.glob('*'):
+            if img_path.suffix.lower() not in ['.jpg', '.jpeg', '.png']:
+                continue
+            label_path = AUGMENTED_LABELS / f"{img_path.stem}.txt"
+            if label_path.exists():
+                pairs.append((img_path, label_path))
+        dataset_dir = DATASET_DIR
 
     print(f"총 이미지-라벨 쌍: {len(pairs)}개")
 
-    random.shuffle(pairs)
-    split_idx = int(len(pairs) * train_ratio)
-    train_pairs = pairs[:split_idx]
-    val_pairs = pairs[split_idx:]
+    if shards:
+        stats = pack_pairs(SOURCE_SHARDS_DIR, pairs, 1 - train_ratio)
+        print(f"샤드 생성: {format_shard_stats(stats)}")
+        write_if_changed(SOURCE_SHARDS_DIR / 'data.yaml', shard_yaml(SOURCE_SHARDS_DIR, CLASS_NAMES))
+        return SOURCE_SHARDS_DIR / 'data.yaml'
 
-    print(f"Train: {len(train_pairs)}개, Val: {len(val_pairs)}개")
+    # 그룹 단위 고정 분할 (foo, foo_bright, foo_flip은 같은 쪽 - dataset_split.json에 기록)
+    train_pairs, val_pairs = SplitIndex().partition(pairs, 1 - train_ratio, key=lambda pair: pair[0].stem)
 
-    for img_path, label_path in train_pairs:
-        shutil.copy(img_path, DATASET_DIR / 'images' / 'train' / img_path.name)
-        shutil.copy(label_path, DATASET_DIR / 'labels' / 'train' / label_path.name)
+    print(f"Train: {len(train_pairs)}개, Val: {len(val_pairs)}개")
 
-    for img_path, label_path in val_pairs:
-        shutil.copy(img_path, DATASET_DIR / 'images' / 'val' / img_path.name)
-        shutil.copy(label_path, DATASET_DIR / 'labels' / 'val' / label_path.name)
+    # 이미지는 하드링크, 라벨은 복사 (목록에서 빠진 이전 파일은 삭제)
+    files = {}
+    for split, split_pairs in (('train', train_pairs), ('val', val_pairs)):
+        for img_path, label_path in split_pairs:
+            files[f'images/{split}/{img_path.name}'] = img_path
+            files[f'labels/{split}/{label_path.name}'] = label_path
+    stats = materialize(dataset_dir, files, dirs=('images/train', 'images/val', 'labels/train', 'labels/val'))
+    print(f"데이터셋 동기화: {format_stats(stats)}")
 
-    yaml_content = f"""path: {DATASET_DIR}
+    yaml_content = f"""path: {dataset_dir}
 train: images/train
 val: images/val
 
@@ -81,12 +86,14 @@ names:
   0: barbell_endpoint
   1: barbell_collar
 """
-    (DATASET_DIR / 'data.yaml').write_text(yaml_content)
+    write_if_changed(dataset_dir / 'data.yaml', yaml_content)
 
-    return DATASET_DIR / 'data.yaml'
+    return dataset_dir / 'data.yaml'
 
-def finetune_model(data_yaml, base_model, use_yolov8s=False, high_res=False):
-    """Fine-tuning: 기존 모델에서 이어서 학습"""
+def finetune_model(data_yaml, base_model, use_yolov8s=False, high_res=False, on_the_fly=False, shards=False,
+                   cache=False):
+    """Fine-tuning: 기존 모델에서 이어서 학습 (on_the_fly: 레시피 변형을 학습 중에 생성, shards: 샤드 데이터셋,
+    cache: 학습 해상도 레터박스 캐시에서 읽음 - letterbox_cache.py)"""
 
     # YOLOv8s로 업그레이드 시 새 모델에서 시작
     if use_yolov8s:
@@ -101,8 +108,11 @@ def finetune_model(data_yaml, base_model, use_yolov8s=False, high_res=False):
     batch_size = 8 if high_res else 16  # 고해상도 시 배치 줄임
 
     print(f"해상도: {img_size}, 배치: {batch_size}")
+    data_yaml, trainer = cached_training_args(data_yaml, img_size, cache,
+                                              DEFAULT_RECIPE if on_the_fly else None, shards)
 
     results = model.train(
+        trainer=trainer,
         data=str(data_yaml),
         epochs=50,  # 새 모델이므로 에포크 증가
         imgsz=img_size,
@@ -135,13 +145,18 @@ def export_model():
 if __name__ == '__main__':
     import sys
 
-    # 옵션: --upgrade (YOLOv8s 사용), --hires (1280 해상도)
+    # 옵션: --upgrade (YOLOv8s 사용), --hires (1280 해상도), --on-the-fly (학습 중 증강), --shards (폴더 대신 샤드),
+    #       --cache (디코드/레터박스 결과 캐시에서 읽음)
     use_yolov8s = '--upgrade' in sys.argv
     high_res = '--hires' in sys.argv
+    on_the_fly = '--on-the-fly' in sys.argv
+    shards = '--shards' in sys.argv
+    cache = '--cache' in sys.argv
 
     print("=== 1. 설정 확인 ===")
     print(f"  모델: {'YOLOv8s (업그레이드)' if use_yolov8s else 'Fine-tuning'}")
     print(f"  해상도: {'1280 (고해상도)' if high_res else '640'}")
+    print(f"  증강: {'학습 중 (레시피)' if on_the_fly else 'augment_data.py 결과'}")
 
     print("\n=== 2. 기존 모델 찾기 ===")
     base_model = find_best_model()
@@ -153,10 +168,11 @@ if __name__ == '__main__':
         base_model = None
 
     print("\n=== 3. 데이터셋 준비 ===")
-    data_yaml = prepare_dataset()
+    data_yaml = prepare_dataset(on_the_fly=on_the_fly, shards=shards)
 
     print("\n=== 4. 학습 시작 ===")
-    finetune_model(data_yaml, base_model, use_yolov8s=use_yolov8s, high_res=high_res)
+    finetune_model(data_yaml, base_model, use_yolov8s=use_yolov8s, high_res=high_res, on_the_fly=on_the_fly,
+                   shards=shards, cache=cache)
 
     print("\n=== 5. CoreML 내보내기 ===")
     mlpackage = export_model()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+라벨링 서버용 썸네일/미리보기 캐시
+- 크기별 렌디션(thumb, preview)을 필요할 때 생성
+- 디스크 캐시 키: 원본 내용 해시 + 렌디션 크기 (같은 내용이면 파일명이 달라도 재사용)
+- 전체 용량 상한을 넘으면 가장 오래 안 쓴 파일부터 삭제 (LRU)
+- 생성은 백그라운드 스레드 풀에서 수행, 같은 렌디션 동시 요청은 한 번만 생성
+
+Pillow가 없으면 렌디션 없이 원본을 그대로 제공합니다.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 렌디션 이름 -> 긴 변 최대 픽셀
+RENDITION_SIZES = {
+    'thumb': 96,
+    'preview': 640,
+}
+RENDITION_QUALITY = 80
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def render(source_path, dest_path, max_edge, quality=RENDITION_QUALITY):
+    """원본을 긴 변 max_edge 이하로 줄여 JPEG로 저장"""
+    with Image.open(source_path) as img:
+        # JPEG는 디코딩 단계에서 1/2, 1/4, 1/8 축소 (전체 해상도 디코딩 생략)
+        img.draft('RGB', (max_edge, max_edge))
+        img = img.convert('RGB')
+        img.thumbnail((max_edge, max_edge), Image.BILINEAR)
+
+        tmp_path = dest_path.with_name(dest_path.name + '.tmp')
+        img.save(tmp_path, 'JPEG', quality=quality, optimize=False)
+        os.replace(tmp_path, dest_path)
+
+
+class RenditionCache:
+    """내용 해시 기반 렌디션 디스크 캐시 (용량 제한 LRU)"""
+
+    def __init__(self, cache_dir, max_bytes=CACHE_MAX_BYTES, sizes=None, workers=2):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.sizes = dict(sizes or RENDITION_SIZES)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # 파일명 -> 바이트 (앞쪽이 오래된 것)
+        self._total = 0
+        self._pending = {}              # 파일명 -> Future
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rendition')
+
+        self._load_index()
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def _load_index(self):
+        """기존 캐시 파일을 마지막 사용 시각 순으로 인덱싱"""
+        files = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp'):
+                    os.unlink(entry.path)
+                    continue
+                st = entry.stat()
+                files.append((max(st.st_atime, st.st_mtime), entry.name, st.st_size))
+
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total += size
+
+    def _key(self, content_hash, size_name):
+        return f'{content_hash}_{size_name}.jpg'
+
+    def _touch(self, key):
+        self._entries.move_to_end(key)
+
+    def _add(self, key):
+        size = (self.cache_dir / key).stat().st_size
+        with self._lock:
+            self._entries[key] = size
+            self._total += size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.unlink(self.cache_dir / key)
+            except FileNotFoundError:
+                pass
+
+    def _generate(self, source_path, key, max_edge):
+        try:
+            render(source_path, self.cache_dir / key, max_edge)
+            self._add(key)
+            return self.cache_dir / key
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def submit(self, source_path, content_hash, size_name):
+        """렌디션 생성 요청 (이미 있으면 완료된 경로 반환, 없으면 Future 반환)"""
+        key = self._key(content_hash, size_name)
+        with self._lock:
+            if key in self._entries:
+                self._touch(key)
+                return self.cache_dir / key
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pool.submit(self._generate, Path(source_path), key, self.sizes[size_name])
+                self._pending[key] = future
+        return future
+
+    def get(self, source_path, content_hash, size_name, timeout=10):
+        """렌디션 파일 경로 (생성 실패 시 None)"""
+        if not self.enabled or size_name not in self.sizes:
+            return None
+
+        result = self.submit(source_path, content_hash, size_name)
+        if isinstance(result, Path):
+            return result
+        try:
+            return result.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def forget(self, content_hash, size_name):
+        """인덱스에서 렌디션 제거 (파일이 이미 지워진 경우 - 다음 get에서 다시 생성)"""
+        key = self._key(content_hash, size_name)
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total -= size
+
+    def warm(self, items, size_name='thumb'):
+        """(원본 경로, 해시) 목록의 렌디션을 백그라운드에서 미리 생성"""
+        if not self.enabled:
+            return
+        for source_path, content_hash in items:
+            self.submit(source_path, content_hash, size_name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': len(self._entries),
+                'bytes': self._total,
+                'maxBytes': self.max_bytes,
+                'pending': len(self._pending),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
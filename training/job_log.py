@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+백그라운드 작업(학습, 자동 라벨링, Claude 라벨링) 로그 링 버퍼
+- 로그 조각을 (시작 오프셋, 텍스트)로 보관하고 최대 글자 수를 넘으면 앞에서부터 버림
+- 오프셋은 작업을 다시 시작해도 계속 증가 → 클라이언트는 since=<오프셋>으로 새 부분만 받음
+- 로그 추가/상태 변경 시 대기 중인 SSE 스트림을 깨움
+
+사용법:
+    log = JobLog()
+    log.append('학습 시작\\n')
+    text, offset, reset = log.read(since=0)
+"""
+
+import threading
+from collections import deque
+
+LOG_MAX_CHARS = 50000
+
+
+class JobLog:
+    """오프셋 기반 증분 조회가 가능한 작업 로그"""
+
+    def __init__(self, max_chars=LOG_MAX_CHARS):
+        self.max_chars = max_chars
+        self._cond = threading.Condition()
+        self._chunks = deque()      # (시작 오프셋, 텍스트)
+        self._size = 0              # 보관 중인 글자 수
+        self._end = 0               # 다음에 추가될 오프셋
+        self._version = 0           # 로그/상태가 바뀔 때마다 증가
+
+    def reset(self, text=''):
+        """새 작업 시작: 이전 로그를 비우고 오프셋은 이어서 사용"""
+        with self._cond:
+            self._chunks.clear()
+            self._size = 0
+            self._append_locked(text)
+
+    def append(self, text):
+        with self._cond:
+            self._append_locked(text)
+
+    def _append_locked(self, text):
+        if text:
+            self._chunks.append((self._end, text))
+            self._end += len(text)
+            self._size += len(text)
+            while self._size > self.max_chars and len(self._chunks) > 1:
+                _, old = self._chunks.popleft()
+                self._size -= len(old)
+        self._version += 1
+        self._cond.notify_all()
+
+    def touch(self):
+        """로그 외 상태(진행 카운터 등)가 바뀌었음을 알림"""
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    @property
+    def offset(self):
+        with self._cond:
+            return self._end
+
+    @property
+    def version(self):
+        with self._cond:
+            return self._version
+
+    def read(self, since=None):
+        """since 이후 로그 → (텍스트, 다음 오프셋, reset)
+
+        reset이 True면 클라이언트는 기존 로그를 지우고 텍스트로 대체해야 함
+        (since가 없거나, 이전 작업의 오프셋이거나, 이미 버려진 구간인 경우.
+        since가 현재 로그의 시작과 같으면 전체 로그를 reset으로 반환)
+        """
+        with self._cond:
+            first = self._chunks[0][0] if self._chunks else self._end
+            reset = since is None or since <= first or since > self._end
+            if reset:
+                since = first
+
+            parts = []
+            for start, text in self._chunks:
+                end = start + len(text)
+                if end <= since:
+                    continue
+                parts.append(text[max(0, since - start):])
+            return ''.join(parts), self._end, reset
+
+    def text(self):
+        return self.read()[0]
+
+    def wait(self, version, timeout):
+        """version 이후 변경이 있을 때까지 대기 → 현재 version"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version, timeout)
+            return self._version
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+라벨링 서버 백그라운드 작업 스케줄러
+- 작업 큐: 우선순위가 높은 것부터, 같으면 먼저 들어온 순서대로 실행
+- 자원 종류별 동시 실행 수 제한 (cpu 추론 / subprocess 학습 / network 라벨링)
+- 작업 간 의존성: export → train → auto-label 처럼 앞 작업이 성공해야 실행
+- 작업 기록을 JSON 파일에 저장 → 서버 재시작 후 대기/실행 중이던 작업을 이어서 실행
+- 취소: 대기 중이면 바로 취소, 실행 중이면 state['running']을 내리고 on_cancel 호출
+
+작업 함수는 runner(job)이며 job.state에 진행 상황을 기록합니다.
+job.state는 기존 상태 dict와 같은 형태('running', 'completed', 'log' 등)라서
+labeling_server의 append_log / update_state / incr_state를 그대로 사용할 수 있습니다.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from job_log import JobLog
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+# 자원 종류별 기본 동시 실행 수
+DEFAULT_LIMITS = {
+    'cpu': 1,
+    'subprocess': 1,
+    'network': 2,
+}
+
+# 저장할 때 남길 로그 끝부분 (재시작 후 기록 확인용)
+PERSIST_LOG_CHARS = 4000
+# 진행 상황 저장 최소 간격 (초)
+CHECKPOINT_INTERVAL_SEC = 2.0
+# 보관할 완료 작업 수
+MAX_FINISHED_JOBS = 200
+
+
+def parse_limits(text, defaults=DEFAULT_LIMITS):
+    """'cpu=1,subprocess=1,network=4' 형식 문자열을 동시 실행 수 dict로 변환"""
+    limits = dict(defaults)
+    for item in (text or '').split(','):
+        name, sep, value = item.partition('=')
+        if sep and value.strip().isdigit():
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+class JobKind:
+    """등록된 작업 종류"""
+
+    def __init__(self, name, runner, resource, defaults=None, on_cancel=None, secret_params=()):
+        self.name = name
+        self.runner = runner
+        self.resource = resource
+        self.defaults = dict(defaults or {})
+        self.on_cancel = on_cancel
+        # 파일에 저장하지 않을 파라미터 (API 키 등)
+        self.secret_params = set(secret_params)
+
+
+class Job:
+    """작업 하나의 기록과 실행 상태"""
+
+    def __init__(self, kind, params=None, priority=0, depends_on=(), job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind.name
+        self.resource = kind.resource
+        self.params = dict(params or {})
+        self.priority = priority
+        self.depends_on = list(depends_on)
+        self.status = QUEUED
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.attempts = 0
+        # 재시작 후 이어서 실행할 때 참고할 값 (runner가 checkpoint()로 기록)
+        self.checkpoint_data = {}
+
+        self.state = {'running': False, 'completed': False, **kind.defaults, 'log': JobLog()}
+        self._scheduler = None
+        self._secret_params = kind.secret_params
+
+    @property
+    def resumed(self):
+        return self.attempts > 1
+
+    def checkpoint(self, **values):
+        """이어서 실행하는 데 필요한 값 기록 (일정 간격으로 파일에 저장)"""
+        self.checkpoint_data.update(values)
+        if self._scheduler is not None:
+            self._scheduler._save(throttle=True)
+
+    def to_record(self):
+        """파일 저장용 dict"""
+        progress = {k: v for k, v in self.state.items()
+                    if k != 'log' and isinstance(v, (str, int, float, bool, type(None)))}
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': {k: v for k, v in self.params.items() if k not in self._secret_params},
+            'priority': self.priority,
+            'dependsOn': self.depends_on,
+            'status': self.status,
+            'error': self.error,
+            'result': self.result,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at,
+            'attempts': self.attempts,
+            'checkpoint': self.checkpoint_data,
+            'progress': progress,
+            'logTail': self.state['log'].text()[-PERSIST_LOG_CHARS:],
+        }
+
+    @classmethod
+    def from_record(cls, kind, record):
+        job = cls(kind, record.get('params'), record.get('priority', 0),
+                  record.get('dependsOn', ()), job_id=record['id'])
+        job.status = record.get('status', QUEUED)
+        job.error = record.get('error')
+        job.result = record.get('result')
+        job.created_at = record.get('createdAt', job.created_at)
+        job.started_at = record.get('startedAt')
+        job.finished_at = record.get('finishedAt')
+        job.attempts = record.get('attempts', 0)
+        job.checkpoint_data = record.get('checkpoint') or {}
+        job.state.update(record.get('progress') or {})
+        job.state['log'].reset(record.get('logTail', ''))
+        return job
+
+    def to_dict(self, since=None):
+        """API 응답용 dict (since 이후 로그 포함)"""
+        record = self.to_record()
+        del record['logTail']
+        text, offset, reset = self.state['log'].read(since)
+        record.update({'log': text, 'logOffset': offset, 'logReset': reset})
+        return record
+
+
+class JobScheduler:
+    """우선순위 큐 + 자원별 동시 실행 제한 스케줄러"""
+
+    def __init__(self, store_path, limits=None, state_lock=None):
+        self.store_path = Path(store_path)
+        self.limits = dict(limits or DEFAULT_LIMITS)
+        self.kinds = {}
+        # job.state 변경에 쓰는 잠금 (서버의 state_lock과 공유)
+        self.state_lock = state_lock or threading.RLock()
+
+        self._lock = threading.RLock()
+        self._jobs = {}                 # id -> Job (생성 순서 유지)
+        self._queue = []                # (-priority, seq, id)
+        self._seq = itertools.count()
+        self._running = {}              # 자원 종류 -> 실행 중인 작업 수
+        self._last_save = 0.0
+        self._stopped = False
+
+    def register(self, name, runner, resource, defaults=None, on_cancel=None, secret_params=()):
+        if resource not in self.limits:
+            self.limits[resource] = 1
+        self.kinds[name] = JobKind(name, runner, resource, defaults, on_cancel, secret_params)
+
+    # ---------- 저장 / 복구 ----------
+
+    def load(self):
+        """저장된 작업 기록 복구 (실행 중이던 작업은 다시 대기열로)"""
+        if not self.store_path.exists():
+            return 0
+        try:
+            records = json.loads(self.store_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return 0
+
+        resumed = 0
+        with self._lock:
+            for record in records:
+                kind = self.kinds.get(record.get('kind'))
+                if kind is None:
+                    continue
+                job = Job.from_record(kind, record)
+                job._scheduler = self
+                if job.status == RUNNING:
+                    job.status = QUEUED
+                    job.state['running'] = False
+                    job.state['log'].append('\n↻ 서버 재시작 후 이어서 실행 대기\n')
+                if job.status == QUEUED:
+                    heapq.heappush(self._queue, (-job.priority, next(self._seq), job.id))
+                    resumed += 1
+                self._jobs[job.id] = job
+        return resumed
+
+    def _save(self, throttle=False):
+        with self._lock:
+            now = time.monotonic()
+            if throttle and now - self._last_save < CHECKPOINT_INTERVAL_SEC:
+                return
+            self._last_save = now
+            records = [job.to_record() for job in self._jobs.values()]
+
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.store_path.with_name(self.store_path.name + '.tmp')
+            tmp_path.write_text(json.dumps(records, ensure_ascii=False, indent=1))
+            os.replace(tmp_path, self.store_path)
+
+    def _prune_locked(self):
+        finished = [job for job in self._jobs.values() if job.status in FINISHED]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    # ---------- 제출 / 조회 / 취소 ----------
+
+    def submit(self, kind, params=None, priority=0, depends_on=()):
+        if kind not in self.kinds:
+            raise KeyError(kind)
+        with self._lock:
+            missing = [job_id for job_id in depends_on if job_id not in self._jobs]
+            if missing:
+                raise KeyError(missing[0])
+            job = Job(self.kinds[kind], params, priority, depends_on)
+            job._scheduler = self
+            self._jobs[job.id] = job
+            heapq.heappush(self._queue, (-priority, next(self._seq), job.id))
+            self._prune_locked()
+            self._save()
+        self._dispatch()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, kind=None):
+        """최근 작업부터"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if kind is None or job.kind == kind]
+
+    def latest(self, kind):
+        """해당 종류의 가장 최근 작업 (대기 중 작업보다 실행 중인 작업 우선)"""
+        jobs = self.list(kind)
+        for job in jobs:
+            if job.status == RUNNING:
+                return job
+        return jobs[0] if jobs else None
+
+    def active(self, kind):
+        """대기 중이거나 실행 중인 작업"""
+        return [job for job in self.list(kind) if job.status not in FINISHED]
+
+    def cancel(self, job_id, reason='사용자에 의해 취소됨'):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            if job.status == QUEUED:
+                self._finish_locked(job, CANCELLED, reason)
+                self._save()
+                job.state['log'].append(f'\n⏹ {reason}\n')
+                return True
+            job.status = CANCELLED
+            job.error = reason
+
+        # 실행 중: runner가 state['running']을 보고 스스로 멈춤
+        with self.state_lock:
+            job.state['running'] = False
+        job.state['log'].touch()
+        on_cancel = self.kinds[job.kind].on_cancel
+        if on_cancel is not None:
+            try:
+                on_cancel(job)
+            except Exception:
+                pass
+        return True
+
+    # ---------- 실행 ----------
+
+    def _finish_locked(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        with self.state_lock:
+            job.state['running'] = False
+            job.state['completed'] = True
+        job.state['log'].touch()
+
+    def _dispatch(self):
+        """실행 가능한 작업을 자원 한도 안에서 시작"""
+        to_start = []
+        with self._lock:
+            if self._stopped:
+                return
+            waiting = []
+            changed = False
+            while self._queue:
+                item = heapq.heappop(self._queue)
+                job = self._jobs.get(item[2])
+                if job is None or job.status != QUEUED:
+                    continue
+
+                deps = [self._jobs.get(job_id) for job_id in job.depends_on]
+                failed = [dep for dep in deps if dep is None or dep.status in (FAILED, CANCELLED)]
+                if failed:
+                    self._finish_locked(job, CANCELLED, '선행 작업이 실패하거나 취소됨')
+                    job.state['log'].append('\n⏹ 선행 작업이 실패하거나 취소되어 실행하지 않음\n')
+                    changed = True
+                    continue
+                if any(dep.status != COMPLETED for dep in deps):
+                    waiting.append(item)
+                    continue
+
+                if self._running.get(job.resource, 0) >= self.limits[job.resource]:
+                    waiting.append(item)
+                    continue
+
+                self._running[job.resource] = self._running.get(job.resource, 0) + 1
+                job.status = RUNNING
+                job.attempts += 1
+                job.started_at = time.time()
+                job.error = None
+                with self.state_lock:
+                    job.state['running'] = True
+                    job.state['completed'] = False
+                to_start.append(job)
+
+            for item in waiting:
+                heapq.heappush(self._queue, item)
+            if to_start or changed:
+                self._save()
+
+        for job in to_start:
+            thread = threading.Thread(target=self._run, args=(job,), name=f'job-{job.kind}-{job.id}')
+            thread.daemon = True
+            thread.start()
+
+    def _run(self, job):
+        kind = self.kinds[job.kind]
+        try:
+            job.result = kind.runner(job)
+        except Exception as e:
+            job.state['log'].append(f'\n\n❌ 오류: {e}\n')
+            with self._lock:
+                if job.status == RUNNING:
+                    self._finish_locked(job, FAILED, str(e))
+        finally:
+            with self._lock:
+                if job.status == RUNNING:
+                    self._finish_locked(job, COMPLETED)
+                elif job.status == CANCELLED and job.finished_at is None:
+                    self._finish_locked(job, CANCELLED, job.error)
+                self._running[job.resource] -= 1
+                self._save()
+            self._dispatch()
+
+    def start(self):
+        self._dispatch()
+
+    def shutdown(self):
+        """새 작업 시작을 멈추고 현재 상태 저장 (실행 중 작업은 재시작 후 이어서 실행)"""
+        with self._lock:
+            self._stopped = True
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'limits': self.limits, 'running': dict(self._running), 'jobs': counts}
+
@@ -25,6 +25,8 @@ from pathlib import Path
 import sys
 import json
 
+import yolo_labels
+
 # 설정
 BOX_SIZE = 50  # 기본 바운딩 박스 크기 (픽셀)
 CLASS_ID = 0   # barbell_plate_side 클래스 ID
@@ -73,19 +75,10 @@ class BarbellLabeler:
 
     def load_labels(self):
         """현재 이미지의 라벨 로드"""
-        self.current_labels = []
         label_path = self.labels_dir / f"{self.images[self.current_idx].stem}.txt"
 
-        if label_path.exists():
-            with open(label_path, "r") as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) >= 5:
-                        # class_id cx cy w h
-                        _, cx, cy, w, h = parts[:5]
-                        self.current_labels.append((
-                            float(cx), float(cy), float(w), float(h)
-                        ))
+        # class_id cx cy w h → (cx, cy, w, h)
+        self.current_labels = [tuple(box) for box in yolo_labels.to_list(yolo_labels.read(label_path)[:, 1:])]
 
         self.modified = False
 
@@ -93,9 +86,7 @@ class BarbellLabeler:
         """현재 이미지의 라벨 저장"""
         label_path = self.labels_dir / f"{self.images[self.current_idx].stem}.txt"
 
-        with open(label_path, "w") as f:
-            for cx, cy, w, h in self.current_labels:
-                f.write(f"{CLASS_ID} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
+        yolo_labels.write(label_path, yolo_labels.from_boxes(self.current_labels, CLASS_ID))
 
         self.modified = False
         print(f"저장됨: {label_path.name} ({len(self.current_labels)}개 라벨)")
@@ -336,16 +327,10 @@ class BarbellLabeler:
         cv2.destroyAllWindows()
 
         # 통계 출력
-        labeled_count = 0
-        total_labels = 0
-        for img in self.images:
-            label_path = self.labels_dir / f"{img.stem}.txt"
-            if label_path.exists():
-                with open(label_path) as f:
-                    lines = [l for l in f.readlines() if l.strip()]
-                    if lines:
-                        labeled_count += 1
-                        total_labels += len(lines)
+        labels = yolo_labels.load_dir(self.labels_dir)
+        counts = np.array([len(labels.get(img.stem)) for img in self.images], dtype=int)
+        labeled_count = int((counts > 0).sum())
+        total_labels = int(counts.sum())
 
         print(f"\n{'='*50}")
         print("라벨링 완료!")
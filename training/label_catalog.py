@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+라벨링 이미지 카탈로그 (SQLite)
+- 이미지별 이름/크기/해시/라벨 수/라벨 타입/수정 시각을 인덱스로 보관
+- 라벨 저장/삭제, 자동/Claude 라벨링, 업로드 시점에 갱신
+- 서버 시작 시 mtime만 비교해서 변경된 파일만 다시 읽음
+
+사용법:
+    python3 label_catalog.py          # 카탈로그 재동기화 후 통계 출력
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS images (
+    name TEXT PRIMARY KEY,
+    stem TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT,
+    label_count INTEGER NOT NULL DEFAULT 0,
+    label_type TEXT,
+    label_mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_images_stem ON images(stem);
+CREATE INDEX IF NOT EXISTS idx_images_hash ON images(hash);
+CREATE INDEX IF NOT EXISTS idx_images_label ON images(label_count, label_type);
+'''
+
+
+def content_hasher():
+    """카탈로그와 같은 방식의 해시 객체 (업로드 중 스트리밍 계산용)"""
+    return hashlib.blake2b(digest_size=16)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """파일 내용 해시 (blake2b 128bit)"""
+    h = content_hasher()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def count_label_lines(label_path):
+    """라벨 파일의 비어있지 않은 줄 수"""
+    with open(label_path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+def meta_label_type(meta_val):
+    """메타데이터 값(문자열 또는 dict)에서 라벨 타입 추출"""
+    if isinstance(meta_val, dict):
+        return meta_val.get('type', 'manual')
+    return meta_val or 'manual'
+
+
+class LabelCatalog:
+    """이미지/라벨 상태를 SQLite에 보관하는 카탈로그 (스레드 안전)"""
+
+    def __init__(self, db_path, images_dir, labels_dir):
+        self.db_path = Path(db_path)
+        self.images_dir = Path(images_dir)
+        self.labels_dir = Path(labels_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _label_path(self, stem):
+        return self.labels_dir / f'{stem}.txt'
+
+    def _label_state(self, stem, meta):
+        """라벨 파일 상태 (label_count, label_type, label_mtime_ns)"""
+        label_path = self._label_path(stem)
+        try:
+            label_mtime_ns = label_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0, None, None
+
+        label_count = count_label_lines(label_path)
+        label_type = meta_label_type(meta.get(stem)) if label_count > 0 else None
+        return label_count, label_type, label_mtime_ns
+
+    # ------------------------------------------------------------------
+    # 재동기화
+    # ------------------------------------------------------------------
+
+    def reconcile(self, meta=None):
+        """디스크와 카탈로그 동기화 (mtime이 바뀐 항목만 다시 읽음)
+
+        Returns:
+            dict: added / updated / removed / relabeled 개수
+        """
+        meta = meta or {}
+        self.images_dir.mkdir(exist_ok=True)
+        self.labels_dir.mkdir(exist_ok=True)
+
+        label_mtimes = {}
+        with os.scandir(self.labels_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.txt') and entry.is_file():
+                    label_mtimes[entry.name[:-4]] = entry.stat().st_mtime_ns
+
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'relabeled': 0}
+
+        with self._lock, self._conn:
+            known = {
+                row[0]: row[1:]
+                for row in self._conn.execute(
+                    'SELECT name, size, mtime_ns, label_mtime_ns FROM images')
+            }
+            seen = set()
+
+            with os.scandir(self.images_dir) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext.lower() not in IMAGE_EXTS or not entry.is_file():
+                        continue
+                    seen.add(entry.name)
+                    st = entry.stat()
+                    label_mtime_ns = label_mtimes.get(stem)
+                    prev = known.get(entry.name)
+
+                    changed = prev is None or prev[0] != st.st_size or prev[1] != st.st_mtime_ns
+                    if changed:
+                        self._conn.execute(
+                            'INSERT OR REPLACE INTO images '
+                            '(name, stem, size, mtime_ns, hash, label_count, label_type, label_mtime_ns) '
+                            'VALUES (?, ?, ?, ?, ?, 0, NULL, NULL)',
+                            (entry.name, stem, st.st_size, st.st_mtime_ns, file_hash(entry.path)))
+                        stats['added' if prev is None else 'updated'] += 1
+
+                    if changed or prev[2] != label_mtime_ns:
+                        label_count, label_type, label_mtime_ns = self._label_state(stem, meta)
+                        self._conn.execute(
+                            'UPDATE images SET label_count = ?, label_type = ?, label_mtime_ns = ? '
+                            'WHERE name = ?',
+                            (label_count, label_type, label_mtime_ns, entry.name))
+                        stats['relabeled'] += 1
+
+            removed = [(name,) for name in known if name not in seen]
+            if removed:
+                self._conn.executemany('DELETE FROM images WHERE name = ?', removed)
+                stats['removed'] = len(removed)
+
+        return stats
+
+    # ------------------------------------------------------------------
+    # 쓰기 경로
+    # ------------------------------------------------------------------
+
+    def add_image(self, image_path, content_hash=None, meta=None):
+        """새로 추가되거나 덮어쓴 이미지 등록
+
+        meta: stem → 메타데이터 조회용 (.get(stem)만 씀 - dict 또는 LabelMetadataStore를 그대로 넘김)
+        """
+        image_path = Path(image_path)
+        st = image_path.stat()
+        content_hash = content_hash or file_hash(image_path)
+        label_count, label_type, label_mtime_ns = self._label_state(image_path.stem, meta or {})
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO images '
+                '(name, stem, size, mtime_ns, hash, label_count, label_type, label_mtime_ns) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (image_path.name, image_path.stem, st.st_size, st.st_mtime_ns, content_hash,
+                 label_count, label_type, label_mtime_ns))
+        return content_hash
+
+    def set_labels(self, stem, label_count, label_type):
+        """라벨 파일을 쓴 직후 호출 (라벨 수/타입/mtime 갱신)"""
+        self.set_labels_many([(stem, label_count, label_type)])
+
+    def set_labels_many(self, entries):
+        """여러 이미지의 라벨 상태를 한 트랜잭션으로 갱신
+
+        Args:
+            entries: (stem, label_count, label_type) 목록
+        """
+        rows = []
+        for stem, label_count, label_type in entries:
+            try:
+                label_mtime_ns = self._label_path(stem).stat().st_mtime_ns
+            except FileNotFoundError:
+                label_mtime_ns = None
+            rows.append((label_count, label_type if label_count > 0 else None, label_mtime_ns, stem))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE images SET label_count = ?, label_type = ?, label_mtime_ns = ? '
+                'WHERE stem = ?', rows)
+
+    def clear_labels(self, stems):
+        """라벨 파일이 삭제된 이미지 표시"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE images SET label_count = 0, label_type = NULL, label_mtime_ns = NULL '
+                'WHERE stem = ?', [(stem,) for stem in stems])
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def list_images(self):
+        """이름순 이미지 목록 [(name, label_count, label_type, hash), ...]"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT name, label_count, label_type, hash FROM images ORDER BY name').fetchall()
+
+    def image_hash(self, image_path, st=None):
+        """이미지 내용 해시 (카탈로그 이후 파일이 바뀌었으면 다시 계산해서 갱신)"""
+        image_path = Path(image_path)
+        st = st or image_path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT hash, size, mtime_ns FROM images WHERE name = ?', (image_path.name,)).fetchone()
+        if row and row[0] and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+            return row[0]
+        return self.add_image(image_path)
+
+    def counts(self):
+        """이미지/라벨 통계"""
+        with self._lock:
+            row = self._conn.execute('''
+                SELECT COUNT(*),
+                       COALESCE(SUM(label_count > 0), 0),
+                       COALESCE(SUM(label_count > 0 AND label_type = 'auto'), 0),
+                       COALESCE(SUM(label_count > 0 AND label_type = 'claude'), 0),
+                       COALESCE(SUM(label_count), 0)
+                FROM images
+            ''').fetchone()
+
+        total, labeled, auto, claude, total_labels = row
+        return {
+            'total': total,
+            'labeled': labeled,
+            'manualLabeled': labeled - auto - claude,
+            'autoLabeled': auto,
+            'claudeLabeled': claude,
+            'totalLabels': total_labels
+        }
+
+    def unlabeled_images(self, exts=('.jpg', '.jpeg', '.png')):
+        """라벨 파일이 없는 이미지 이름 목록"""
+        with self._lock:
+            names = [row[0] for row in self._conn.execute(
+                'SELECT name FROM images WHERE label_mtime_ns IS NULL ORDER BY name')]
+        return [name for name in names if os.path.splitext(name)[1].lower() in exts]
+
+    def find_by_hash(self, content_hash):
+        """같은 내용의 이미지 이름 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT name FROM images WHERE hash = ? LIMIT 1', (content_hash,)).fetchone()
+        return row[0] if row else None
+
+
+def main():
+    import json
+    import time
+
+    from label_metadata import LabelMetadataStore
+
+    training_dir = Path(__file__).parent
+    images_dir = training_dir / 'labeling_images_new'
+    labels_dir = training_dir / 'labeling_labels'
+
+    # _metadata.json은 마지막 compact 시점 스냅샷 → 그 뒤 저널에 쓴 타입까지 스토어로 읽음
+    label_meta = LabelMetadataStore(labels_dir / '_metadata.json')
+    meta = label_meta.snapshot()
+    label_meta.close()
+    catalog = LabelCatalog(labels_dir / '_catalog.db', images_dir, labels_dir)
+
+    start = time.time()
+    stats = catalog.reconcile(meta)
+    print(f'재동기화 완료 ({time.time() - start:.2f}s): {stats}')
+    print(json.dumps(catalog.counts(), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
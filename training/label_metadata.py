@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+라벨 메타데이터 저장소 (append-only 저널 + 주기적 컴팩션)
+- _metadata.json: 컴팩션된 전체 스냅샷 (기존 스크립트 호환 형식 그대로)
+- _metadata.journal: 변경분만 한 줄씩 추가하는 JSON Lines 로그
+- 저널이 일정 크기를 넘으면 스냅샷으로 합친 뒤 저널 비움
+- 스레드 간에는 RLock, 프로세스 간에는 _metadata.lock 파일 flock으로 보호
+- 컴팩션은 새 저널 파일로 교체하므로 다른 프로세스는 inode 변화로 감지
+
+사용법:
+    store = LabelMetadataStore(LABELS_DIR / '_metadata.json')
+    store.set('img_001', 'manual')
+
+    with store.batch() as batch:      # 라벨링 루프용 일괄 쓰기
+        for stem in stems:
+            batch.set(stem, 'auto')
+
+    store.close()                     # 종료 시 컴팩션
+"""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+COMPACT_EVERY = 2000  # 저널 레코드 수가 이 값을 넘으면 컴팩션
+
+
+class MetadataBatch:
+    """일괄 쓰기 버퍼 (flush_every개마다, 그리고 종료 시 저널에 기록)"""
+
+    def __init__(self, store, flush_every):
+        self.store = store
+        self.flush_every = flush_every
+        self._records = []
+
+    def set(self, stem, value):
+        self._records.append({'k': stem, 'v': value})
+        if len(self._records) >= self.flush_every:
+            self.flush()
+
+    def delete(self, stem):
+        self._records.append({'k': stem, 'del': 1})
+        if len(self._records) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._records:
+            records, self._records = self._records, []
+            self.store._append(records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+class LabelMetadataStore:
+    """stem -> 라벨 타입('manual'/'auto'/'claude' 또는 dict) 저장소"""
+
+    def __init__(self, meta_file, journal_file=None, compact_every=COMPACT_EVERY):
+        self.meta_file = Path(meta_file)
+        self.journal_file = Path(journal_file) if journal_file else self.meta_file.with_suffix('.journal')
+        self.lock_file = self.journal_file.with_suffix('.lock')
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._data = {}
+        self._offset = 0        # 저널에서 이미 반영한 바이트 위치
+        self._records = 0       # 현재 저널의 레코드 수
+        self._journal = None
+        self._lock_fd = None
+
+        with self._lock:
+            self.meta_file.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+            with self._flock():
+                self._reload()
+
+    # ------------------------------------------------------------------
+    # 내부
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _flock(self):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _reload(self):
+        """스냅샷을 다시 읽고 저널 전체를 재적용"""
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_file, 'a+b')
+
+        self._data = {}
+        if self.meta_file.exists():
+            try:
+                with open(self.meta_file) as f:
+                    self._data = json.load(f)
+            except json.JSONDecodeError:
+                # 컴팩션 도중 중단된 경우: 저널만으로 복구
+                self._data = {}
+        self._offset = 0
+        self._records = 0
+        self._catch_up()
+
+    def _catch_up(self):
+        """다른 프로세스가 추가한 저널 레코드 반영"""
+        try:
+            current_ino = os.stat(self.journal_file).st_ino
+        except FileNotFoundError:
+            current_ino = None
+        if current_ino != os.fstat(self._journal.fileno()).st_ino:
+            # 다른 프로세스가 컴팩션해서 저널이 교체됨
+            self._reload()
+            return
+
+        size = os.fstat(self._journal.fileno()).st_size
+        if size == self._offset:
+            return
+
+        self._journal.seek(self._offset)
+        chunk = self._journal.read(size - self._offset)
+        end = chunk.rfind(b'\n') + 1   # 완성된 줄까지만 반영
+        for line in chunk[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(record)
+            self._records += 1
+        self._offset += end
+
+    def _apply(self, record):
+        if record.get('del'):
+            self._data.pop(record['k'], None)
+        else:
+            self._data[record['k']] = record['v']
+
+    def _append(self, records):
+        payload = b''.join(
+            json.dumps(r, ensure_ascii=False).encode('utf-8') + b'\n' for r in records)
+
+        with self._lock:
+            with self._flock():
+                self._catch_up()
+                self._journal.seek(0, os.SEEK_END)
+                self._journal.write(payload)
+                self._journal.flush()
+                self._offset = self._journal.tell()
+                self._records += len(records)
+                for record in records:
+                    self._apply(record)
+
+                if self._records >= self.compact_every:
+                    self._compact_locked()
+
+    def _compact_locked(self):
+        tmp = self.meta_file.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self._data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.meta_file)
+
+        # 빈 저널로 교체 (기존 파일을 열고 있는 프로세스는 inode로 감지)
+        tmp_journal = self.journal_file.with_suffix('.journal.tmp')
+        open(tmp_journal, 'wb').close()
+        os.replace(tmp_journal, self.journal_file)
+        self._journal.close()
+        self._journal = open(self.journal_file, 'a+b')
+        self._offset = 0
+        self._records = 0
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+
+    def get(self, stem, default=None):
+        with self._lock:
+            return self._data.get(stem, default)
+
+    def snapshot(self):
+        """현재 메타데이터 사본 (dict)"""
+        with self._lock:
+            return dict(self._data)
+
+    def refresh(self):
+        """다른 프로세스의 변경분 반영"""
+        with self._lock:
+            with self._flock():
+                self._catch_up()
+
+    def set(self, stem, value):
+        self._append([{'k': stem, 'v': value}])
+
+    def set_many(self, mapping):
+        if mapping:
+            self._append([{'k': k, 'v': v} for k, v in mapping.items()])
+
+    def delete_many(self, stems):
+        if stems:
+            self._append([{'k': stem, 'del': 1} for stem in stems])
+
+    def batch(self, flush_every=50):
+        """라벨링 루프용 일괄 쓰기 컨텍스트"""
+        return MetadataBatch(self, flush_every)
+
+    def compact(self):
+        """저널을 _metadata.json 스냅샷으로 합치고 비움"""
+        with self._lock:
+            with self._flock():
+                self._catch_up()
+                if self._records:
+                    self._compact_locked()
+
+    def close(self):
+        with self._lock:
+            if self._journal is None:
+                return
+            self.compact()
+            self._journal.close()
+            self._journal = None
+            os.close(self._lock_fd)
+
+
+if __name__ == '__main__':
+    import sys
+
+    # 수동 컴팩션: python3 label_metadata.py [메타데이터 파일]
+    meta_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / 'labeling_labels' / '_metadata.json'
+    store = LabelMetadataStore(meta_path)
+    print(f'레코드: {len(store.snapshot())}개')
+    store.close()
+    print(f'컴팩션 완료: {meta_path}')
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+라벨링 서버 부하 테스트
+- 실제 라벨링 세션을 재현: 목록 조회 → 이미지 로드 → 라벨 조회 → 저장
+- 동시 클라이언트 수(기본 1, 4, 16)별로 요청 종류마다 p50/p99 지연 시간 출력
+
+저장 단계는 이미 수동 라벨('manual')이 있는 이미지에 대해서만,
+방금 읽은 라벨을 그대로 다시 저장하므로 라벨 내용/타입이 바뀌지 않습니다.
+
+사용법:
+    python3 labeling_server.py &            # 서버 먼저 실행
+    python3 labeling_loadtest.py
+    python3 labeling_loadtest.py --url http://localhost:8085 --sessions 20 --clients 1 4 16
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = max(0, math.ceil(pct / 100 * len(values)) - 1)
+    return values[idx]
+
+
+class SessionClient:
+    """한 명의 라벨러 세션을 재현하는 클라이언트"""
+
+    def __init__(self, base_url, timings, images_per_session, save, seed):
+        self.base_url = base_url.rstrip('/')
+        self.timings = timings
+        self.images_per_session = images_per_session
+        self.save = save
+        self.rng = random.Random(seed)
+
+    def _request(self, op, path, data=None):
+        url = self.base_url + urllib.parse.quote(path)
+        req = urllib.request.Request(url, data=data, method='POST' if data is not None else 'GET')
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+
+        start = time.perf_counter()
+        with urllib.request.urlopen(req, timeout=60) as res:
+            body = res.read()
+        self.timings[op].append(time.perf_counter() - start)
+        return body
+
+    def run(self):
+        listing = json.loads(self._request('list', '/api/images'))
+        images = listing['images']
+        if not images:
+            return
+
+        start = self.rng.randrange(len(images))
+        for offset in range(self.images_per_session):
+            img = images[(start + offset) % len(images)]
+            self._request('image', f"/images/{img['name']}")
+            labels = json.loads(self._request('labels', f"/api/labels/{img['name']}"))
+
+            if self.save and img['labelType'] == 'manual':
+                payload = json.dumps(labels).encode('utf-8')
+                self._request('save', f"/api/labels/{img['name']}", payload)
+
+
+def run_level(base_url, clients, sessions, images_per_session, save):
+    timings = defaultdict(list)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [
+            pool.submit(SessionClient(base_url, timings, images_per_session, save, seed).run)
+            for seed in range(sessions)
+        ]
+        errors = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors += 1
+                print(f'  세션 오류: {e}')
+
+    elapsed = time.perf_counter() - start
+    return timings, elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='라벨링 서버 부하 테스트')
+    parser.add_argument('--url', default='http://localhost:8085')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--sessions', type=int, default=16, help='동시성 단계별 세션 수')
+    parser.add_argument('--images', type=int, default=10, help='세션당 넘겨볼 이미지 수')
+    parser.add_argument('--no-save', action='store_true', help='저장 단계 생략')
+    args = parser.parse_args()
+
+    print(f"{'='*72}")
+    print(f'라벨링 서버 부하 테스트: {args.url}')
+    print(f'세션 {args.sessions}개 x 이미지 {args.images}장, 동시 클라이언트 {args.clients}')
+    print(f"{'='*72}")
+
+    for clients in args.clients:
+        timings, elapsed, errors = run_level(
+            args.url, clients, max(args.sessions, clients), args.images, not args.no_save)
+        total_requests = sum(len(v) for v in timings.values())
+
+        print(f'\n[동시 {clients}명] {total_requests}개 요청, {elapsed:.2f}s, '
+              f'{total_requests / elapsed:.1f} req/s, 오류 {errors}')
+        print(f"  {'요청':<8}{'개수':>8}{'p50(ms)':>12}{'p99(ms)':>12}{'평균(ms)':>12}")
+        for op in ['list', 'image', 'labels', 'save']:
+            values = timings.get(op)
+            if not values:
+                continue
+            print(f'  {op:<8}{len(values):>8}'
+                  f'{percentile(values, 50) * 1000:>12.1f}'
+                  f'{percentile(values, 99) * 1000:>12.1f}'
+                  f'{statistics.mean(values) * 1000:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -13,19 +13,36 @@
 """
 
 import http.server
-import socketserver
 import json
 import os
 import urllib.parse
 from pathlib import Path
 import shutil
-import base64
+
+import static_files
+import yolo_labels
+from auto_label_pipeline import AutoLabelPipeline, YoloLabelWriter
+from claude_label_engine import ClaudeLabelEngine, FewShotContext, format_stats, parse_boxes, pick_examples
+from claude_message_batches import MessageBatchLabeler
+from dataset_materializer import format_stats as format_sync_stats, materialize, write_if_changed
+from dataset_shards import format_stats as format_shard_stats, shard_yaml, write_split_shards
+from letterbox_cache import build_cache, format_stats as format_cache_stats
+from dataset_split import SplitIndex
+from image_renditions import RenditionCache
+from job_scheduler import JobScheduler, parse_limits
+from label_catalog import IMAGE_EXTS, LabelCatalog, content_hasher
+from label_metadata import LabelMetadataStore
+from model_registry import ModelRegistry
+from multipart_upload import FileTooLarge, MultipartError, MultipartStreamParser, parse_boundary, stream_to_file
+from vlm_image_prep import ImagePrep, detect_rois
+from vlm_response_cache import ResponseCache
 
 # 설정
 PORT = 8085
 TRAINING_DIR = Path(__file__).parent
 IMAGES_DIR = TRAINING_DIR / "labeling_images_new"
 LABELS_DIR = TRAINING_DIR / "labeling_labels"
+VIDEOS_DIR = TRAINING_DIR / "crawled_data" / "videos"
 
 # 멀티 클래스 지원
 CLASS_NAMES = {
@@ -34,52 +51,141 @@ CLASS_NAMES = {
 }
 CLASS_NAME = "barbell_endpoint"  # 기본값 (하위 호환)
 
-# 학습 상태 (전역)
+# 백그라운드 작업 (학습, 자동 라벨링, Claude 라벨링, export)
 import subprocess
 import threading
 
-training_state = {
-    'running': False,
+# 작업 종류별 진행 상태 기본값 (job.state)
+TRAIN_DEFAULTS = {
     'process': None,
-    'log': '',
-    'completed': False,
     'success': False,
     'model_path': None
 }
-
-# 자동 라벨링 상태
-auto_label_state = {
-    'running': False,
-    'completed': False,
+LABEL_JOB_DEFAULTS = {
     'total': 0,
     'processed': 0,
-    'labeled': 0,
-    'log': ''
+    'labeled': 0
 }
-
-# Claude 라벨링 상태
-claude_label_state = {
-    'running': False,
-    'completed': False,
-    'total': 0,
-    'processed': 0,
-    'labeled': 0,
-    'log': ''
+AUTO_LABEL_DEFAULTS = {
+    **LABEL_JOB_DEFAULTS,
+    'images_per_sec': 0.0
 }
+CLAUDE_BATCH_MAX_IMAGES = 50
+# mode='batch' (Message Batches) 작업의 최대 이미지 수 / 상태 조회 간격
+CLAUDE_BULK_MAX_IMAGES = 5000
+CLAUDE_BULK_POLL_SEC = 30
+
+# Claude 라벨링 동시 요청 수 / 시작 초당 요청 수 (작업 params의 concurrency, rate로 변경 가능)
+# ANTHROPIC_BASE_URL로 API 주소 변경 (mock_label_server.py로 오프라인 테스트)
+CLAUDE_BASE_URL = os.environ.get('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')
+CLAUDE_CONCURRENCY = 4
+CLAUDE_RATE = 1.0
+CLAUDE_CHECKPOINT_DIR = TRAINING_DIR / 'labeling_cache' / 'claude'
+# 전송 전 축소/재인코딩 (작업 params의 maxEdge, quality로 변경, roi=true면 YOLO 검출 주변만 크롭)
+CLAUDE_IMAGE_MAX_EDGE = 1024
+CLAUDE_IMAGE_QUALITY = 85
+CLAUDE_BATCH_PROMPT = """바벨 플레이트 끝단(원형 옆면)의 바운딩 박스 좌표를 JSON으로 반환하세요.
+형식: {"labels": [{"cx": 0.2, "cy": 0.5, "w": 0.1, "h": 0.15}]}
+바벨이 없으면: {"labels": []}
+JSON만 응답하세요."""
+# 수동 라벨 이미지를 few-shot 예시로 붙일 장수 (작업 params의 fewShot, 0이면 사용 안 함)
+# 모든 요청에 같은 내용이라 prompt cache로 읽음
+CLAUDE_FEW_SHOT_EXAMPLES = 3
+CLAUDE_FEW_SHOT_TEXT = """다음은 사람이 직접 라벨링한 예시와 정답입니다. 마지막 이미지도 같은 기준으로 라벨링하세요."""
+CLAUDE_SINGLE_PROMPT = """이 이미지에서 바벨(barbell) 플레이트의 끝단(옆면, 원형 부분)을 찾아주세요.
+
+바벨 플레이트 끝단은 바벨의 양쪽 끝에 있는 원형 무게판의 옆면입니다.
+
+각 끝단에 대해 바운딩 박스 좌표를 다음 형식으로 반환해주세요:
+- cx: 중심 x좌표 (0~1, 이미지 너비 기준)
+- cy: 중심 y좌표 (0~1, 이미지 높이 기준)
+- w: 너비 (0~1)
+- h: 높이 (0~1)
+
+JSON 형식으로만 응답해주세요:
+{"labels": [{"cx": 0.2, "cy": 0.5, "w": 0.1, "h": 0.15}, ...]}
+
+바벨이 보이지 않으면: {"labels": []}"""
 
-# 라벨 메타데이터 (수동/자동 구분)
+# 자동 라벨링 배치 크기 / 디코딩 스레드 수 (작업 params의 batchSize, decodeWorkers로 변경 가능)
+AUTO_LABEL_BATCH_SIZE = 8
+AUTO_LABEL_DECODE_WORKERS = 2
+
+# 작업 스케줄러 (main()에서 생성)
+# 동시 실행 수는 LABELING_JOB_CONCURRENCY="cpu=1,subprocess=1,network=2" 로 변경
+JOBS_FILE = TRAINING_DIR / 'labeling_cache' / 'jobs.json'
+JOB_CONCURRENCY = parse_limits(os.environ.get('LABELING_JOB_CONCURRENCY'))
+scheduler = None
+
+# 학습된 모델 색인 + 로드된 모델 캐시 (main()에서 생성)
+RUNS_DIR = TRAINING_DIR / 'runs' / 'detect'
+MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+models = None
+
+# 상태 dict는 HTTP 핸들러 스레드와 백그라운드 작업 스레드가 함께 접근하므로
+# 변경과 조회는 모두 state_lock 안에서 수행
+state_lock = threading.RLock()
+
+def append_log(state, text):
+    # 로그는 링 버퍼(JobLog)에 쌓이고 오래된 부분은 자동으로 버려짐
+    state['log'].append(text)
+
+def update_state(state, **fields):
+    with state_lock:
+        state.update(fields)
+    state['log'].touch()
+
+def incr_state(state, key, n=1):
+    with state_lock:
+        state[key] += n
+    state['log'].touch()
+
+def _camel(key):
+    head, *rest = key.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+def job_status(job, since=None, with_log=True):
+    """작업 상태 API 응답 (진행 필드는 최상위에 camelCase로 펼침)"""
+    if job is None:
+        return {'status': None, 'running': False, 'completed': False,
+                'log': '', 'logOffset': 0, 'logReset': True}
+    with state_lock:
+        status = job.to_dict(since)
+        for key, value in status.pop('progress').items():
+            status[_camel(key)] = value
+    status['jobId'] = status['id']
+    if not with_log:
+        for key in ('log', 'logOffset', 'logReset'):
+            status.pop(key)
+    return status
+
+# SSE 스트림 하트비트 간격 (초)
+EVENT_HEARTBEAT_SEC = 15
+
+# export는 데이터셋 폴더를 지우고 다시 만들기 때문에 동시 요청은 순서대로 처리
+export_lock = threading.Lock()
+
+# 라벨 메타데이터 (수동/자동 구분, main()에서 생성)
 LABEL_META_FILE = LABELS_DIR / '_metadata.json'
+label_meta = None
 
-def load_label_metadata():
-    if LABEL_META_FILE.exists():
-        with open(LABEL_META_FILE) as f:
-            return json.load(f)
-    return {}
+# 이미지/라벨 카탈로그 (main()에서 재동기화 후 생성)
+CATALOG_DB = LABELS_DIR / '_catalog.db'
+catalog = None
 
-def save_label_metadata(meta):
-    LABELS_DIR.mkdir(exist_ok=True)
-    with open(LABEL_META_FILE, 'w') as f:
-        json.dump(meta, f, indent=2)
+# 썸네일/미리보기 캐시 (main()에서 생성)
+RENDITION_CACHE_DIR = TRAINING_DIR / 'labeling_cache' / 'renditions'
+RENDITION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+renditions = None
+
+# Claude 응답 캐시 (이미지 해시 + 프롬프트 + 모델, main()에서 생성)
+VLM_CACHE_DB = TRAINING_DIR / 'labeling_cache' / 'vlm_responses.db'
+VLM_CACHE_MAX_BYTES = 256 * 1024 * 1024
+vlm_cache = None
+
+# 업로드 제한 (요청 본문은 메모리에 올리지 않고 디스크로 스트리밍)
+UPLOAD_MAX_FILE_BYTES = 50 * 1024 * 1024
+UPLOAD_MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024
 
 # HTML 템플릿
 HTML_TEMPLATE = '''<!DOCTYPE html>
@@ -934,8 +1040,18 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 body: formData
             });
 
+            const result = await response.json();
             if (response.ok) {
+                const saved = result.files.filter(f => f.status === 'saved' || f.status === 'replaced').length;
+                const duplicates = result.files.filter(f => f.status === 'duplicate').length;
+                const rejected = result.files.length - saved - duplicates;
+                let message = `${saved}개 업로드`;
+                if (duplicates) message += `, 중복 ${duplicates}개 건너뜀`;
+                if (rejected) message += `, 제외 ${rejected}개`;
+                showToast('업로드 완료', message);
                 loadImageList();
+            } else {
+                showToast('업로드 실패', result.error || '오류가 발생했습니다.', true);
             }
         }
 
@@ -1011,7 +1127,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                      onclick="${multiSelectMode ? `toggleImageSelection('${img.name}', ${realIndex}, event)` : `selectImage(${realIndex})`}"
                      style="position: relative;">
                     ${checkbox}
-                    <img class="image-thumb" src="/images/${img.name}" alt="">
+                    <img class="image-thumb" src="/images/${encodeURIComponent(img.name)}?size=thumb&v=${img.v}" loading="lazy" alt="">
                     <span class="image-name">${img.name}</span>
                     ${img.labelCount > 0 ? `<span class="label-count">${img.labelCount}</span>${badge}` : ''}
                 </div>
@@ -1043,7 +1159,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 setupCanvas();
                 loadLabels(img.name);
             };
-            currentImage.src = `/images/${img.name}`;
+            currentImage.src = `/images/${encodeURIComponent(img.name)}?v=${img.v}`;
 
             document.getElementById('emptyCanvas').style.display = 'none';
             canvas.style.display = 'block';
@@ -1317,7 +1433,50 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             document.getElementById('exportModal').classList.remove('show');
         }
 
-        let trainingInterval = null;
+        let trainingEvents = null;
+
+        // 작업 진행 상황 SSE 구독: 새 로그만 이어 붙이고 상태는 onStatus로 전달
+        // (연결이 끊기면 브라우저가 마지막 이벤트 id(로그 오프셋)부터 자동 재연결)
+        const MAX_LOG_CHARS = 50000;
+
+        function watchJob(jobId, onStatus) {
+            const source = new EventSource(`/api/events?id=${jobId}`);
+            const logEl = document.getElementById('trainingLog');
+            let logText = '';
+
+            const handle = (e) => {
+                const status = JSON.parse(e.data);
+                logText = status.logReset ? status.log : logText + status.log;
+                if (logText.length > MAX_LOG_CHARS) {
+                    logText = logText.slice(-MAX_LOG_CHARS);
+                }
+                logEl.textContent = logText;
+
+                // Auto-scroll to bottom
+                const logDiv = logEl.parentElement;
+                logDiv.scrollTop = logDiv.scrollHeight;
+
+                if (e.type === 'done') {
+                    source.close();
+                }
+                if (status.status === 'queued') {
+                    document.getElementById('trainingStatus').innerHTML =
+                        '<p>⏳ 대기열에서 앞선 작업이 끝나기를 기다리는 중...</p>';
+                    return;
+                }
+                onStatus(status);
+            };
+            source.addEventListener('progress', handle);
+            source.addEventListener('done', handle);
+            return source;
+        }
+
+        function stopWatching(source) {
+            if (source) {
+                source.close();
+            }
+            return null;
+        }
 
         async function startTraining(freshStart = false) {
             const mode = freshStart ? '새로 학습' : '이어서 학습';
@@ -1356,8 +1515,8 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 const trainResult = await trainRes.json();
 
                 if (trainResult.success) {
-                    // Poll for training status
-                    trainingInterval = setInterval(checkTrainingStatus, 2000);
+                    // Stream training status (다른 학습이 진행 중이면 대기열에서 시작을 기다림)
+                    trainingEvents = watchJob(trainResult.jobId, checkTrainingStatus);
                 } else {
                     document.getElementById('trainingLog').textContent += `\\n오류: ${trainResult.error}`;
                     document.getElementById('stopTrainingBtn').style.display = 'none';
@@ -1368,20 +1527,10 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
         }
 
-        async function checkTrainingStatus() {
+        function checkTrainingStatus(status) {
             try {
-                const res = await fetch('/api/train/status');
-                const status = await res.json();
-
-                document.getElementById('trainingLog').textContent = status.log || '학습 중...';
-
-                // Auto-scroll to bottom
-                const logDiv = document.getElementById('trainingLog').parentElement;
-                logDiv.scrollTop = logDiv.scrollHeight;
-
-                if (status.completed) {
-                    clearInterval(trainingInterval);
-                    trainingInterval = null;
+                if (status.completed && !status.running) {
+                    trainingEvents = stopWatching(trainingEvents);
 
                     if (status.success) {
                         document.getElementById('trainingTitle').textContent = '✅ 학습 완료!';
@@ -1400,10 +1549,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
         }
 
         async function stopTraining() {
-            if (trainingInterval) {
-                clearInterval(trainingInterval);
-                trainingInterval = null;
-            }
+            trainingEvents = stopWatching(trainingEvents);
 
             await fetch('/api/train/stop', { method: 'POST' });
 
@@ -1414,14 +1560,11 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 
         function closeTrainingModal() {
             document.getElementById('trainingModal').classList.remove('show');
-            if (trainingInterval) {
-                clearInterval(trainingInterval);
-                trainingInterval = null;
-            }
+            trainingEvents = stopWatching(trainingEvents);
         }
 
         // Auto-labeling
-        let autoLabelInterval = null;
+        let autoLabelEvents = null;
 
         async function autoLabel() {
             const unlabeledCount = images.filter(img => img.labelCount === 0).length;
@@ -1448,8 +1591,8 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 const result = await response.json();
 
                 if (result.success) {
-                    // Poll for status
-                    autoLabelInterval = setInterval(checkAutoLabelStatus, 1000);
+                    // Stream status
+                    autoLabelEvents = watchJob(result.jobId, checkAutoLabelStatus);
                 } else {
                     document.getElementById('trainingLog').textContent += `\\n오류: ${result.error}`;
                     document.getElementById('stopTrainingBtn').style.display = 'none';
@@ -1461,22 +1604,13 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
         }
 
-        async function checkAutoLabelStatus() {
+        function checkAutoLabelStatus(status) {
             try {
-                const res = await fetch('/api/auto-label/status');
-                const status = await res.json();
-
-                document.getElementById('trainingLog').textContent = status.log || '처리 중...';
                 document.getElementById('trainingStatus').innerHTML =
                     `<p>진행: ${status.processed}/${status.total} (${status.labeled}개 라벨 생성)</p>`;
 
-                // Auto-scroll
-                const logDiv = document.getElementById('trainingLog').parentElement;
-                logDiv.scrollTop = logDiv.scrollHeight;
-
-                if (status.completed) {
-                    clearInterval(autoLabelInterval);
-                    autoLabelInterval = null;
+                if (status.completed && !status.running) {
+                    autoLabelEvents = stopWatching(autoLabelEvents);
 
                     document.getElementById('trainingTitle').textContent = '✅ 자동 라벨링 완료!';
                     document.getElementById('trainingStatus').innerHTML =
@@ -1495,7 +1629,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
         }
 
         // Claude AI Labeling
-        let claudeLabelInterval = null;
+        let claudeLabelEvents = null;
 
         async function claudeLabel() {
             // Check for API key first
@@ -1551,8 +1685,8 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                         loadLabels(images[currentIndex].name);
                         loadImageList();
                     } else {
-                        // Batch - poll for status
-                        claudeLabelInterval = setInterval(checkClaudeLabelStatus, 2000);
+                        // Batch - stream status
+                        claudeLabelEvents = watchJob(result.jobId, checkClaudeLabelStatus);
                     }
                 } else {
                     document.getElementById('trainingLog').textContent = `오류: ${result.error}`;
@@ -1569,21 +1703,13 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
         }
 
-        async function checkClaudeLabelStatus() {
+        function checkClaudeLabelStatus(status) {
             try {
-                const res = await fetch('/api/claude-label/status');
-                const status = await res.json();
-
-                document.getElementById('trainingLog').textContent = status.log || '처리 중...';
                 document.getElementById('trainingStatus').innerHTML =
                     `<p>진행: ${status.processed}/${status.total} (${status.labeled}개 라벨 생성)</p>`;
 
-                const logDiv = document.getElementById('trainingLog').parentElement;
-                logDiv.scrollTop = logDiv.scrollHeight;
-
-                if (status.completed) {
-                    clearInterval(claudeLabelInterval);
-                    claudeLabelInterval = null;
+                if (status.completed && !status.running) {
+                    claudeLabelEvents = stopWatching(claudeLabelEvents);
 
                     document.getElementById('trainingTitle').textContent = '✅ Claude 라벨링 완료!';
                     document.getElementById('trainingStatus').innerHTML =
@@ -1605,6 +1731,13 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 '''
 
 
+class LabelingServer(http.server.ThreadingHTTPServer):
+    """요청마다 스레드를 쓰는 서버 (느린 export/upload가 다른 요청을 막지 않음)"""
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 64
+
+
 class LabelingHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(TRAINING_DIR), **kwargs)
@@ -1627,20 +1760,64 @@ class LabelingHandler(http.server.SimpleHTTPRequestHandler):
             self.send_json(self.get_labels(image_name))
 
         elif path.startswith('/images/'):
-            image_name = path.split('/')[-1]
-            self.serve_image(image_name)
+            image_name = urllib.parse.unquote(path.split('/')[-1])
+            self.serve_image(image_name, urllib.parse.parse_qs(parsed.query))
+
+        elif path.startswith('/videos/'):
+            self.serve_video(urllib.parse.unquote(path.split('/')[-1]))
 
         elif path == '/api/train/status':
-            self.send_json(self.get_training_status())
+            self.send_json(job_status(scheduler.latest('train'), self._log_since(parsed.query)))
 
         elif path == '/api/auto-label/status':
-            self.send_json(self.get_auto_label_status())
+            self.send_json(job_status(scheduler.latest('auto-label'), self._log_since(parsed.query)))
 
         elif path == '/api/claude-label/status':
-            self.send_json(self.get_claude_label_status())
+            self.send_json(job_status(scheduler.latest('claude-label'), self._log_since(parsed.query)))
+
+        elif path == '/api/claude-label/cache':
+            self.send_json(vlm_cache.stats())
+
+        elif path == '/api/models':
+            prefix = urllib.parse.parse_qs(parsed.query).get('prefix', ['barbell'])[0]
+            latest = models.latest(prefix)
+            self.send_json({
+                'runs': models.describe(prefix),
+                'latest': latest.parent.parent.name if latest else None,
+                'cache': models.stats()
+            })
+
+        elif path == '/api/jobs':
+            kind = urllib.parse.parse_qs(parsed.query).get('kind', [None])[0]
+            self.send_json({
+                'jobs': [job_status(job, with_log=False) for job in scheduler.list(kind)],
+                'scheduler': scheduler.stats()
+            })
+
+        elif path.startswith('/api/jobs/'):
+            job = scheduler.get(path.split('/')[-1])
+            if job is None:
+                self.send_json({'success': False, 'error': '작업을 찾을 수 없습니다.'}, 404)
+            else:
+                self.send_json(job_status(job, self._log_since(parsed.query)))
+
+        elif path == '/api/events':
+            self.stream_job_events(urllib.parse.parse_qs(parsed.query))
 
         else:
-            super().do_GET()
+            self.serve_static()
+
+    def do_HEAD(self):
+        parsed = urllib.parse.urlparse(self.path)
+        path = parsed.path
+
+        if path.startswith('/images/'):
+            image_name = urllib.parse.unquote(path.split('/')[-1])
+            self.serve_image(image_name, urllib.parse.parse_qs(parsed.query), head_only=True)
+        elif path.startswith('/videos/'):
+            self.serve_video(urllib.parse.unquote(path.split('/')[-1]), head_only=True)
+        else:
+            self.serve_static(head_only=True)
 
     def do_POST(self):
         parsed = urllib.parse.urlparse(self.path)
@@ -1680,112 +1857,114 @@ class LabelingHandler(http.server.SimpleHTTPRequestHandler):
         elif path == '/api/claude-label/stop':
             self.handle_stop_claude_label()
 
+        elif path == '/api/claude-label/cache/reparse':
+            # 파서가 바뀐 뒤 저장된 응답만으로 박스 재계산 (API 호출 없음)
+            self.send_json({'success': True, **vlm_cache.reparse(parse_boxes)})
+
         elif path == '/api/delete-labels':
             self.handle_delete_labels()
 
+        elif path == '/api/jobs':
+            self.handle_submit_jobs()
+
+        elif path.startswith('/api/jobs/') and path.endswith('/cancel'):
+            self.handle_cancel_job(path.split('/')[-2])
+
         else:
             self.send_error(404)
 
-    def send_json(self, data):
-        self.send_response(200)
+    def send_json(self, data, status=200):
+        self.send_response(status)
         self.send_header('Content-type', 'application/json')
         self.end_headers()
         self.wfile.write(json.dumps(data).encode('utf-8'))
 
     def get_image_list(self):
-        IMAGES_DIR.mkdir(exist_ok=True)
-        LABELS_DIR.mkdir(exist_ok=True)
+        # v: 내용 해시 앞부분 (이미지 URL 버전으로 사용 → 브라우저 캐시 무효화)
+        images = [
+            {'name': name, 'labelCount': label_count, 'labelType': label_type, 'v': (content_hash or '')[:12]}
+            for name, label_count, label_type, content_hash in catalog.list_images()
+        ]
 
-        images = []
-        total_labels = 0
-        labeled_count = 0
-        manual_count = 0
-        auto_count = 0
-        claude_count = 0
-
-        # Load metadata
-        meta = load_label_metadata()
-
-        for f in sorted(IMAGES_DIR.glob('*')):
-            if f.suffix.lower() in ['.jpg', '.jpeg', '.png', '.bmp', '.webp']:
-                label_path = LABELS_DIR / f'{f.stem}.txt'
-                label_count = 0
-                label_type = None  # 'manual', 'auto', or None
-
-                if label_path.exists():
-                    with open(label_path) as lf:
-                        label_count = len([l for l in lf.readlines() if l.strip()])
-
-                    if label_count > 0:
-                        meta_val = meta.get(f.stem, 'manual')
-                        # Handle both string and dict formats
-                        if isinstance(meta_val, dict):
-                            label_type = meta_val.get('type', 'manual')
-                        else:
-                            label_type = meta_val
-
-                images.append({
-                    'name': f.name,
-                    'labelCount': label_count,
-                    'labelType': label_type
-                })
-
-                total_labels += label_count
-                if label_count > 0:
-                    labeled_count += 1
-                    if label_type == 'auto':
-                        auto_count += 1
-                    elif label_type == 'claude':
-                        claude_count += 1
-                    else:
-                        manual_count += 1
-
-        return {
-            'images': images,
-            'total': len(images),
-            'labeled': labeled_count,
-            'manualLabeled': manual_count,
-            'autoLabeled': auto_count,
-            'claudeLabeled': claude_count,
-            'totalLabels': total_labels
-        }
+        return {'images': images, **catalog.counts()}
 
     def get_labels(self, image_name):
         stem = Path(image_name).stem
-        label_path = LABELS_DIR / f'{stem}.txt'
+        rows = yolo_labels.read(LABELS_DIR / f'{stem}.txt')
 
-        labels = []
-        if label_path.exists():
-            with open(label_path) as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) >= 5:
-                        class_id, cx, cy, w, h = parts[:5]
-                        labels.append({
-                            'classId': int(class_id),
-                            'cx': float(cx),
-                            'cy': float(cy),
-                            'w': float(w),
-                            'h': float(h)
-                        })
+        labels = [{'classId': int(class_id), 'cx': cx, 'cy': cy, 'w': w, 'h': h}
+                  for class_id, cx, cy, w, h in yolo_labels.to_list(rows)]
 
         return {'labels': labels}
 
-    def serve_image(self, image_name):
+    def serve_image(self, image_name, query=None, head_only=False):
+        query = query or {}
         image_path = IMAGES_DIR / image_name
 
-        if not image_path.exists():
+        if Path(image_name).name != image_name or not image_path.is_file():
             self.send_error(404)
             return
 
-        content_type = 'image/jpeg'
-        if image_path.suffix.lower() == '.png':
-            content_type = 'image/png'
+        st = image_path.stat()
+        content_hash = catalog.image_hash(image_path, st)
+        size_name = query.get('size', [None])[0]
+        etag = f'"{content_hash}-{size_name}"' if size_name else f'"{content_hash}"'
+        # URL에 버전(v=해시)이 있으면 내용이 바뀔 일이 없으므로 오래 캐시
+        cache_control = 'public, max-age=31536000, immutable' if 'v' in query else 'no-cache'
 
-        self.send_response(200)
-        self.send_header('Content-type', content_type)
-        self.end_headers()
-        self.wfile.write(image_path.read_bytes())
+        original_type = 'image/png' if image_path.suffix.lower() == '.png' else 'image/jpeg'
+        send_path, content_type = image_path, original_type
+
+        # 304로 끝날 요청이면 렌디션 생성 생략
+        if size_name and not static_files.is_not_modified(self.headers, etag, st.st_mtime):
+            rendition = renditions.get(image_path, content_hash, size_name)
+            if rendition is not None:
+                send_path, content_type = rendition, 'image/jpeg'
+
+        try:
+            static_files.send_file(self, send_path, content_type, etag=etag,
+                                   cache_control=cache_control, head_only=head_only)
+            return
+        except FileNotFoundError:
+            if send_path == image_path:
+                self.send_error(404)
+                return
+        # 보내기 직전에 용량 정리로 렌디션이 지워짐 → 한 번 다시 생성, 그래도 없으면 원본 전송
+        renditions.forget(content_hash, size_name)
+        rendition = renditions.get(image_path, content_hash, size_name)
+        for send_path, content_type in ((rendition, 'image/jpeg'), (image_path, original_type)):
+            if send_path is None:
+                continue
+            try:
+                static_files.send_file(self, send_path, content_type, etag=etag,
+                                       cache_control=cache_control, head_only=head_only)
+                return
+            except FileNotFoundError:
+                pass
+        self.send_error(404)
+
+    def serve_video(self, video_name, head_only=False):
+        """크롤링 영상 전송 (Range 지원 → 브라우저에서 프레임 단위 탐색 가능)"""
+        video_path = VIDEOS_DIR / video_name
+
+        if Path(video_name).name != video_name or not video_path.is_file():
+            self.send_error(404)
+            return
+
+        static_files.send_file(self, video_path, head_only=head_only)
+
+    def serve_static(self, head_only=False):
+        """그 밖의 TRAINING_DIR 파일 (export 데이터셋 등)
+
+        파일은 스트리밍 + Range로 전송하고, 디렉토리 목록은 기본 핸들러에 맡김
+        """
+        file_path = Path(self.translate_path(self.path))
+        if file_path.is_file():
+            static_files.send_file(self, file_path, self.guess_type(str(file_path)), head_only=head_only)
+        elif head_only:
+            super().do_HEAD()
+        else:
+            super().do_GET()
 
     def handle_upload(self):
         content_type = self.headers.get('Content-Type', '')
@@ -1794,43 +1973,66 @@ class LabelingHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(400)
             return
 
-        # Parse multipart form data
-        boundary = content_type.split('boundary=')[1].encode()
         content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
+        if content_length > UPLOAD_MAX_TOTAL_BYTES:
+            # 본문을 읽지 않고 거절하므로 연결은 닫음
+            self.close_connection = True
+            self.send_json({'success': False, 'error': '업로드 용량 초과'}, 413)
+            return
 
-        IMAGES_DIR.mkdir(exist_ok=True)
+        try:
+            parser = MultipartStreamParser(self.rfile, parse_boundary(content_type), content_length)
+        except MultipartError as e:
+            self.close_connection = True
+            self.send_json({'success': False, 'error': f'잘못된 업로드 요청: {e}'}, 400)
+            return
 
-        # Simple multipart parser
-        parts = body.split(b'--' + boundary)
+        IMAGES_DIR.mkdir(exist_ok=True)
+        files = []
         count = 0
 
-        for part in parts:
-            if b'filename="' in part:
-                # Extract filename
-                header_end = part.find(b'\r\n\r\n')
-                if header_end == -1:
-                    continue
-
-                header = part[:header_end].decode('utf-8', errors='ignore')
-                filename_start = header.find('filename="') + 10
-                filename_end = header.find('"', filename_start)
-                filename = header[filename_start:filename_end]
-
-                if not filename:
+        try:
+            for part in parser:
+                if not part.filename:
+                    part.drain()
                     continue
+                result = self._save_upload_part(part)
+                files.append(result)
+                if result['status'] in ('saved', 'replaced'):
+                    count += 1
+        except MultipartError as e:
+            parser.discard_rest()
+            self.send_json({'success': False, 'error': f'잘못된 업로드 요청: {e}'}, 400)
+            return
 
-                # Extract file data
-                file_data = part[header_end + 4:]
-                if file_data.endswith(b'\r\n'):
-                    file_data = file_data[:-2]
+        self.send_json({'success': True, 'count': count, 'files': files})
 
-                # Save file
-                save_path = IMAGES_DIR / filename
-                save_path.write_bytes(file_data)
-                count += 1
+    def _save_upload_part(self, part):
+        """파일 파트 하나를 임시 파일로 받은 뒤 해시로 중복 확인 후 저장"""
+        filename = Path(part.filename.replace('\\', '/')).name
+        if not filename or Path(filename).suffix.lower() not in IMAGE_EXTS:
+            part.drain()
+            return {'name': part.filename, 'status': 'skipped'}
 
-        self.send_json({'success': True, 'count': count})
+        tmp_path = IMAGES_DIR / f'.upload-{threading.get_ident()}-{filename}.part'
+        hasher = content_hasher()
+        try:
+            stream_to_file(part, tmp_path, hasher, UPLOAD_MAX_FILE_BYTES)
+        except FileTooLarge:
+            return {'name': filename, 'status': 'too_large'}
+        content_hash = hasher.hexdigest()
+
+        duplicate_of = catalog.find_by_hash(content_hash)
+        if duplicate_of is not None:
+            os.unlink(tmp_path)
+            return {'name': filename, 'status': 'duplicate', 'duplicateOf': duplicate_of}
+
+        save_path = IMAGES_DIR / filename
+        status = 'replaced' if save_path.exists() else 'saved'
+        os.replace(tmp_path, save_path)
+        catalog.add_image(save_path, content_hash=content_hash, meta=label_meta)
+        renditions.warm([(save_path, content_hash)])
+        return {'name': filename, 'status': status}
 
     def handle_load_crawled(self):
         # Load images from crawled_data/frames
@@ -1847,6 +2049,7 @@ class LabelingHandler(http.server.SimpleHTTPRequestHandler):
                         dst = IMAGES_DIR / f.name
                         if not dst.exists():
                             shutil.copy(f, dst)
+                            renditions.warm([(dst, catalog.add_image(dst))])
                             count += 1
 
         self.send_json({'success': True, 'count': count})
@@ -1860,424 +2063,172 @@ class LabelingHandler(http.server.SimpleHTTPRequestHandler):
 
         stem = Path(image_name).stem
         label_path = LABELS_DIR / f'{stem}.txt'
+        labels = data.get('labels', [])
 
-        with open(label_path, 'w') as f:
-            for label in data.get('labels', []):
-                class_id = label.get('classId', 0)  # 기본값: 0 (바벨 끝단)
-                cx = label['cx']
-                cy = label['cy']
-                w = label['w']
-                h = label['h']
-                f.write(f'{class_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n')
+        # classId 기본값: 0 (바벨 끝단)
+        yolo_labels.write(label_path, yolo_labels.from_boxes(
+            [(label['cx'], label['cy'], label['w'], label['h']) for label in labels],
+            [label.get('classId', 0) for label in labels]))
 
         # Mark as manual label
-        meta = load_label_metadata()
-        meta[stem] = 'manual'
-        save_label_metadata(meta)
+        label_meta.set(stem, 'manual')
+        catalog.set_labels(stem, len(labels), 'manual')
 
         self.send_json({'success': True})
 
     def handle_export(self):
-        # Create dataset directory
-        dataset_dir = TRAINING_DIR / 'barbell_plate_dataset_new'
-        train_images = dataset_dir / 'train' / 'images'
-        train_labels = dataset_dir / 'train' / 'labels'
-        valid_images = dataset_dir / 'valid' / 'images'
-        valid_labels = dataset_dir / 'valid' / 'labels'
-
-        # Clear and recreate directories
-        if dataset_dir.exists():
-            shutil.rmtree(dataset_dir)
-
-        for d in [train_images, train_labels, valid_images, valid_labels]:
-            d.mkdir(parents=True, exist_ok=True)
-
-        # Get labeled images
-        labeled_images = []
-        for f in IMAGES_DIR.glob('*'):
-            if f.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                label_path = LABELS_DIR / f'{f.stem}.txt'
-                if label_path.exists():
-                    with open(label_path) as lf:
-                        if any(l.strip() for l in lf.readlines()):
-                            labeled_images.append(f)
-
-        # Split 80/20
-        import random
-        random.shuffle(labeled_images)
-        split_idx = int(len(labeled_images) * 0.8)
-        train_set = labeled_images[:split_idx]
-        valid_set = labeled_images[split_idx:]
-
-        image_count = 0
-        label_count = 0
-
-        # Copy files
-        for img in train_set:
-            shutil.copy(img, train_images / img.name)
-            label_src = LABELS_DIR / f'{img.stem}.txt'
-            shutil.copy(label_src, train_labels / f'{img.stem}.txt')
-            image_count += 1
-            with open(label_src) as f:
-                label_count += len([l for l in f.readlines() if l.strip()])
-
-        for img in valid_set:
-            shutil.copy(img, valid_images / img.name)
-            label_src = LABELS_DIR / f'{img.stem}.txt'
-            shutil.copy(label_src, valid_labels / f'{img.stem}.txt')
-            image_count += 1
-            with open(label_src) as f:
-                label_count += len([l for l in f.readlines() if l.strip()])
-
-        # Create data.yaml
-        yaml_content = f"""# Barbell Dataset (Multi-class)
-# Generated by labeling_server.py
-# Total images: {image_count} (train: {len(train_set)}, valid: {len(valid_set)})
-# Total labels: {label_count}
-
-path: {dataset_dir.absolute()}
-train: train/images
-val: valid/images
-
-names:
-  0: barbell_endpoint
-  1: barbell
+        self.send_json({'success': True, **export_dataset()})
 
-nc: 2
-"""
-        (dataset_dir / 'data.yaml').write_text(yaml_content)
+    def _read_json_body(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        if content_length <= 0:
+            return {}
+        return json.loads(self.rfile.read(content_length).decode('utf-8'))
+
+    def _submit_job(self, kind, params=None):
+        """기존 시작 API용: 작업을 큐에 넣고 jobId 응답 (같은 종류가 실행 중이면 뒤에 대기)"""
+        job = scheduler.submit(kind, params)
+        self.send_json({'success': True, 'jobId': job.id, 'status': job.status})
+
+    def _cancel_kind(self, kind):
+        for job in scheduler.active(kind):
+            scheduler.cancel(job.id)
+        self.send_json({'success': True})
 
-        print(f"Dataset exported: {image_count} images, {label_count} labels")
+    def handle_submit_jobs(self):
+        """작업 제출
 
-        self.send_json({
-            'success': True,
-            'path': str(dataset_dir),
-            'imageCount': image_count,
-            'labelCount': label_count
-        })
+        단일 작업: {"kind": "train", "params": {...}, "priority": 0, "dependsOn": [id]}
+        파이프라인: {"pipeline": ["export", "train", "auto-label"], "priority": 0}
+            (각 단계는 앞 단계가 성공해야 실행, 단계는 {"kind", "params"} dict도 가능)
+        """
+        try:
+            data = self._read_json_body()
+            priority = int(data.get('priority', 0))
+            steps = data.get('pipeline') or [data]
+
+            submitted = []
+            depends_on = list(data.get('dependsOn', [])) if 'pipeline' not in data else []
+            for step in steps:
+                if isinstance(step, str):
+                    step = {'kind': step}
+                job = scheduler.submit(step['kind'], step.get('params'),
+                                       int(step.get('priority', priority)), depends_on)
+                submitted.append(job.id)
+                depends_on = [job.id]
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json({'success': False, 'error': f'잘못된 작업 요청: {e}'}, 400)
+            return
 
-    def handle_start_training(self):
-        global training_state
+        self.send_json({'success': True, 'jobs': submitted})
 
-        if training_state['running']:
-            self.send_json({'success': False, 'error': '이미 학습이 진행 중입니다.'})
+    def handle_cancel_job(self, job_id):
+        if scheduler.get(job_id) is None:
+            self.send_json({'success': False, 'error': '작업을 찾을 수 없습니다.'}, 404)
             return
+        self.send_json({'success': scheduler.cancel(job_id)})
 
+    def handle_start_training(self):
         # Parse request body
         fresh_start = False
+        base_run = None
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            if content_length > 0:
-                post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
-                fresh_start = data.get('fresh', False)
+            data = self._read_json_body()
+            fresh_start = data.get('fresh', False)
+            base_run = data.get('baseRun')
         except:
             pass
 
-        mode_text = "🆕 새로 학습" if fresh_start else "🚀 이어서 학습"
-
-        # Reset state
-        training_state = {
-            'running': True,
-            'process': None,
-            'log': f'{mode_text} 시작 중...\n',
-            'completed': False,
-            'success': False,
-            'model_path': None
-        }
-
-        # Start training in background thread
-        def run_training():
-            global training_state
-            try:
-                dataset_path = TRAINING_DIR / 'barbell_plate_dataset_new' / 'data.yaml'
-
-                if not dataset_path.exists():
-                    training_state['log'] += f'\n오류: 데이터셋을 찾을 수 없습니다: {dataset_path}\n'
-                    training_state['completed'] = True
-                    training_state['running'] = False
-                    return
-
-                training_state['log'] += f'데이터셋: {dataset_path}\n'
-
-                # 모델 선택
-                base_model = "yolov8n.pt"  # 기본값
-
-                if not fresh_start:
-                    # 기존 학습 모델 찾기 (이어서 학습용)
-                    runs_dir = TRAINING_DIR / 'runs' / 'detect'
-                    if runs_dir.exists():
-                        endpoint_dirs = sorted([d for d in runs_dir.iterdir()
-                                              if d.is_dir() and d.name.startswith('barbell_endpoint')],
-                                             key=lambda x: x.stat().st_mtime, reverse=True)
-                        for d in endpoint_dirs:
-                            best_pt = d / 'weights' / 'best.pt'
-                            if best_pt.exists():
-                                base_model = str(best_pt)
-                                break
-
-                if base_model == "yolov8n.pt":
-                    model_msg = "기본 모델(yolov8n.pt)에서 새로 학습"
-                else:
-                    model_msg = f"기존 모델에서 이어서 학습: {Path(base_model).parent.parent.name}"
-                training_state['log'] += f'{model_msg}\n\n'
-
-                cmd = [
-                    'python3', '-c', f'''
-from ultralytics import YOLO
-import sys
-
-model = YOLO("{base_model}")
-print("모델 로드 완료: {base_model}", flush=True)
-print("학습 시작...", flush=True)
+        self._submit_job('train', {'fresh': fresh_start, 'baseRun': base_run})
 
-results = model.train(
-    data="{dataset_path}",
-    epochs=30,
-    imgsz=320,
-    batch=8,
-    name="barbell_endpoint",
-    patience=10,
-    device="mps",
-    workers=2,
-    verbose=True,
-    resume=False
-)
+    @staticmethod
+    def _log_since(query):
+        since = urllib.parse.parse_qs(query).get('since')
+        try:
+            return int(since[0]) if since else None
+        except ValueError:
+            return None
+
+    def stream_job_events(self, query):
+        """작업 진행 상황 SSE 스트림 (/api/events?id=<jobId> 또는 ?job=train&since=<오프셋>)
+
+        상태나 로그가 바뀔 때마다 progress 이벤트로 진행 카운터와 새 로그만 전송하고,
+        작업이 끝나면 done 이벤트를 보내고 연결을 닫음.
+        이벤트 id가 로그 오프셋이므로 재연결 시 Last-Event-ID부터 이어서 받음
+        """
+        if 'id' in query:
+            job = scheduler.get(query['id'][0])
+        else:
+            job = scheduler.latest(query.get('job', [''])[0])
+        if job is None:
+            self.send_error(404)
+            return
 
-print("\\n학습 완료!", flush=True)
-print(f"Best model: {{results.save_dir}}/weights/best.pt", flush=True)
-'''
-                ]
-
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    cwd=str(TRAINING_DIR)
-                )
-
-                training_state['process'] = process
-
-                # Read output in real-time
-                for line in iter(process.stdout.readline, ''):
-                    if not training_state['running']:
-                        process.terminate()
-                        break
-                    training_state['log'] += line
-                    # Keep log size manageable
-                    if len(training_state['log']) > 50000:
-                        training_state['log'] = training_state['log'][-40000:]
-
-                process.wait()
-
-                if process.returncode == 0:
-                    # 최신 학습 모델 찾기
-                    latest_model = None
-                    runs_dir = TRAINING_DIR / 'runs' / 'detect'
-                    if runs_dir.exists():
-                        endpoint_dirs = sorted([d for d in runs_dir.iterdir()
-                                              if d.is_dir() and d.name.startswith('barbell_endpoint')],
-                                             key=lambda x: x.stat().st_mtime, reverse=True)
-                        for d in endpoint_dirs:
-                            best_pt = d / 'weights' / 'best.pt'
-                            if best_pt.exists():
-                                latest_model = best_pt
-                                break
-
-                    training_state['success'] = True
-                    training_state['model_path'] = str(latest_model) if latest_model else None
-                    training_state['log'] += '\n\n✅ 학습이 성공적으로 완료되었습니다!\n'
-
-                    # CoreML 변환 및 iOS 앱에 복사
-                    if latest_model:
-                        training_state['log'] += '\n📱 CoreML 변환 중...\n'
-                        try:
-                            from ultralytics import YOLO
-                            model = YOLO(str(latest_model))
-                            export_path = model.export(format='coreml', nms=True)
-                            training_state['log'] += f'CoreML 변환 완료: {export_path}\n'
-
-                            # iOS 앱에 복사
-                            ios_model_path = TRAINING_DIR.parent / 'example' / 'ios' / 'Runner' / 'barbell_endpoint.mlpackage'
-                            if Path(export_path).exists():
-                                import shutil
-                                if ios_model_path.exists():
-                                    shutil.rmtree(ios_model_path)
-                                shutil.copytree(export_path, ios_model_path)
-                                training_state['log'] += f'✅ iOS 앱에 모델 복사 완료!\n'
-                                training_state['log'] += f'   경로: {ios_model_path}\n'
-                                training_state['log'] += f'\n⚠️ 앱을 다시 빌드해야 새 모델이 적용됩니다.\n'
-                        except Exception as e:
-                            training_state['log'] += f'CoreML 변환 실패: {str(e)}\n'
-                else:
-                    training_state['log'] += f'\n\n❌ 학습 실패 (exit code: {process.returncode})\n'
-
-            except Exception as e:
-                training_state['log'] += f'\n\n오류: {str(e)}\n'
-                training_state['success'] = False
-
-            finally:
-                training_state['running'] = False
-                training_state['completed'] = True
-                training_state['process'] = None
-
-        thread = threading.Thread(target=run_training)
-        thread.daemon = True
-        thread.start()
+        since = self.headers.get('Last-Event-ID') or query.get('since', [None])[0]
+        try:
+            since = int(since) if since is not None else None
+        except ValueError:
+            since = None
 
-        self.send_json({'success': True})
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        self.close_connection = True
 
-    def get_training_status(self):
-        global training_state
-        return {
-            'running': training_state['running'],
-            'completed': training_state['completed'],
-            'success': training_state['success'],
-            'log': training_state['log'],
-            'modelPath': training_state['model_path']
-        }
+        log = job.state['log']
+        version = None
+        try:
+            while True:
+                current = log.wait(version, EVENT_HEARTBEAT_SEC) if version is not None else log.version
+                if current == version:
+                    self.wfile.write(b': keep-alive\n\n')
+                    self.wfile.flush()
+                    continue
+                version = current
+
+                status = job_status(job, since)
+                since = status['logOffset']
+                event = 'done' if status['completed'] and not status['running'] else 'progress'
+                payload = json.dumps(status, ensure_ascii=False)
+                self.wfile.write(f'id: {since}\nevent: {event}\ndata: {payload}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+                if event == 'done':
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            pass
 
     def handle_stop_training(self):
-        global training_state
-
-        training_state['running'] = False
-
-        if training_state['process']:
-            try:
-                training_state['process'].terminate()
-            except:
-                pass
-
-        training_state['log'] += '\n\n⏹ 사용자에 의해 학습이 중지되었습니다.\n'
-        training_state['completed'] = True
-
-        self.send_json({'success': True})
+        self._cancel_kind('train')
 
     def handle_start_auto_label(self):
-        global auto_label_state
-
-        if auto_label_state['running']:
-            self.send_json({'success': False, 'error': '이미 자동 라벨링이 진행 중입니다.'})
-            return
-
-        # Find latest trained model
-        model_path = None
-        runs_dir = TRAINING_DIR / 'runs' / 'detect'
-        if runs_dir.exists():
-            # barbell 관련 폴더 중 가장 최근 것 찾기 (barbell_endpoint, barbell_augmented 등)
-            barbell_dirs = sorted([d for d in runs_dir.iterdir()
-                                  if d.is_dir() and d.name.startswith('barbell')],
-                                 key=lambda x: x.stat().st_mtime, reverse=True)
-            for d in barbell_dirs:
-                best_pt = d / 'weights' / 'best.pt'
-                if best_pt.exists():
-                    model_path = best_pt
-                    break
-
-        if not model_path:
-            self.send_json({'success': False, 'error': '학습된 모델이 없습니다. 먼저 학습을 진행하세요.'})
-            return
-
-        # Get unlabeled images
-        unlabeled = []
-        for f in IMAGES_DIR.glob('*'):
-            if f.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                label_path = LABELS_DIR / f'{f.stem}.txt'
-                if not label_path.exists():
-                    unlabeled.append(f)
-
-        if not unlabeled:
-            self.send_json({'success': False, 'error': '라벨링되지 않은 이미지가 없습니다.'})
+        # 앞에 학습 작업이 없으면 바로 실행할 수 없는 요청은 즉시 알려줌
+        if not scheduler.active('train'):
+            if models.latest('barbell') is None:
+                self.send_json({'success': False, 'error': '학습된 모델이 없습니다. 먼저 학습을 진행하세요.'})
+                return
+            if not catalog.unlabeled_images():
+                self.send_json({'success': False, 'error': '라벨링되지 않은 이미지가 없습니다.'})
+                return
+
+        # 선택: {"run": "barbell_endpoint3", "batchSize": 16, "decodeWorkers": 4}
+        params = {}
+        try:
+            data = self._read_json_body()
+            params = {k: int(data[k]) for k in ('batchSize', 'decodeWorkers') if k in data}
+            if data.get('run'):
+                params['run'] = models.resolve(data['run']).parent.parent.name
+        except (ValueError, TypeError):
+            pass
+        except FileNotFoundError as e:
+            self.send_json({'success': False, 'error': str(e)})
             return
 
-        # Reset state
-        auto_label_state = {
-            'running': True,
-            'completed': False,
-            'total': len(unlabeled),
-            'processed': 0,
-            'labeled': 0,
-            'log': f'모델: {model_path.name}\n총 {len(unlabeled)}개 이미지 처리 예정\n\n'
-        }
-
-        # Run in background thread
-        def run_auto_label():
-            global auto_label_state
-            try:
-                from ultralytics import YOLO
-                model = YOLO(str(model_path))
-                auto_label_state['log'] += '모델 로드 완료\n\n'
-
-                LABELS_DIR.mkdir(exist_ok=True)
-
-                for i, img_path in enumerate(unlabeled):
-                    if not auto_label_state['running']:
-                        auto_label_state['log'] += '\n⏹ 사용자에 의해 중지됨\n'
-                        break
-
-                    # Predict
-                    results = model(str(img_path), verbose=False, conf=0.3)
-
-                    # Save labels
-                    label_path = LABELS_DIR / f'{img_path.stem}.txt'
-                    label_count = 0
-
-                    with open(label_path, 'w') as f:
-                        for result in results:
-                            if result.boxes is not None:
-                                for box in result.boxes:
-                                    # Get normalized coordinates
-                                    x1, y1, x2, y2 = box.xyxyn[0].tolist()
-                                    cx = (x1 + x2) / 2
-                                    cy = (y1 + y2) / 2
-                                    w = x2 - x1
-                                    h = y2 - y1
-                                    conf = box.conf[0].item()
-
-                                    f.write(f'0 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n')
-                                    label_count += 1
-                                    auto_label_state['labeled'] += 1
-
-                    # Mark as auto label
-                    if label_count > 0:
-                        meta = load_label_metadata()
-                        meta[img_path.stem] = 'auto'
-                        save_label_metadata(meta)
-
-                    auto_label_state['processed'] = i + 1
-                    auto_label_state['log'] += f'[{i+1}/{len(unlabeled)}] {img_path.name}: {label_count}개 감지\n'
-
-                auto_label_state['log'] += f'\n\n✅ 완료! {auto_label_state["labeled"]}개 라벨 생성\n'
-
-            except Exception as e:
-                auto_label_state['log'] += f'\n\n❌ 오류: {str(e)}\n'
-
-            finally:
-                auto_label_state['running'] = False
-                auto_label_state['completed'] = True
-
-        thread = threading.Thread(target=run_auto_label)
-        thread.daemon = True
-        thread.start()
-
-        self.send_json({'success': True})
-
-    def get_auto_label_status(self):
-        global auto_label_state
-        return {
-            'running': auto_label_state['running'],
-            'completed': auto_label_state['completed'],
-            'total': auto_label_state['total'],
-            'processed': auto_label_state['processed'],
-            'labeled': auto_label_state['labeled'],
-            'log': auto_label_state['log']
-        }
+        self._submit_job('auto-label', params)
 
     def handle_stop_auto_label(self):
-        global auto_label_state
-        auto_label_state['running'] = False
-        self.send_json({'success': True})
+        self._cancel_kind('auto-label')
 
     def handle_claude_label_single(self):
         """Claude API로 단일 이미지 라벨링"""
@@ -2298,272 +2249,56 @@ print(f"Best model: {{results.save_dir}}/weights/best.pt", flush=True)
             self.send_json({'success': False, 'error': f'이미지를 찾을 수 없습니다: {image_name}'})
             return
 
-        try:
-            import anthropic
-            import base64
-
-            # Read and encode image
-            with open(image_path, 'rb') as f:
-                image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-
-            # Determine media type
-            suffix = image_path.suffix.lower()
-            media_type = 'image/jpeg' if suffix in ['.jpg', '.jpeg'] else 'image/png'
-
-            # Call Claude API
-            client = anthropic.Anthropic(api_key=api_key)
-
-            message = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1024,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": image_data
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": """이 이미지에서 바벨(barbell) 플레이트의 끝단(옆면, 원형 부분)을 찾아주세요.
-
-바벨 플레이트 끝단은 바벨의 양쪽 끝에 있는 원형 무게판의 옆면입니다.
-
-각 끝단에 대해 바운딩 박스 좌표를 다음 형식으로 반환해주세요:
-- cx: 중심 x좌표 (0~1, 이미지 너비 기준)
-- cy: 중심 y좌표 (0~1, 이미지 높이 기준)
-- w: 너비 (0~1)
-- h: 높이 (0~1)
-
-JSON 형식으로만 응답해주세요:
-{"labels": [{"cx": 0.2, "cy": 0.5, "w": 0.1, "h": 0.15}, ...]}
-
-바벨이 보이지 않으면: {"labels": []}"""
-                        }
-                    ]
-                }]
-            )
-
-            # Parse response
-            response_text = message.content[0].text
-            log = f"Claude 응답:\n{response_text}\n"
-
-            # Extract JSON from response
-            import re
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-
-            if json_match:
-                result = json.loads(json_match.group())
-                labels = result.get('labels', [])
-
-                # Save labels
-                LABELS_DIR.mkdir(exist_ok=True)
-                stem = image_path.stem
-                label_path = LABELS_DIR / f'{stem}.txt'
-
-                with open(label_path, 'w') as f:
-                    for label in labels:
-                        cx = label.get('cx', 0)
-                        cy = label.get('cy', 0)
-                        w = label.get('w', 0.05)
-                        h = label.get('h', 0.05)
-                        f.write(f'0 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n')
-
-                # Mark as claude label
-                meta = load_label_metadata()
-                meta[stem] = 'claude'
-                save_label_metadata(meta)
-
-                log += f"\n✅ {len(labels)}개 라벨 저장됨"
-
-                self.send_json({
-                    'success': True,
-                    'labelCount': len(labels),
-                    'log': log
-                })
-            else:
-                self.send_json({
-                    'success': False,
-                    'error': 'Claude 응답에서 JSON을 파싱할 수 없습니다.',
-                    'log': log
-                })
+        engine = ClaudeLabelEngine(api_key, CLAUDE_BASE_URL, max_tokens=1024, cache=vlm_cache,
+                                   prep=ImagePrep(CLAUDE_IMAGE_MAX_EDGE, CLAUDE_IMAGE_QUALITY))
+        result = engine.label_one(image_path, CLAUDE_SINGLE_PROMPT)
+        if result.error:
+            self.send_json({'success': False, 'error': result.error})
+            return
 
-        except ImportError:
-            self.send_json({
-                'success': False,
-                'error': 'anthropic 패키지가 설치되지 않았습니다. pip install anthropic'
-            })
-        except Exception as e:
+        log = f"Claude 응답{' (캐시)' if result.cached else ''}:\n{result.text}\n"
+        if result.boxes is None:
             self.send_json({
                 'success': False,
-                'error': str(e)
+                'error': 'Claude 응답에서 JSON을 파싱할 수 없습니다.',
+                'log': log
             })
+            return
 
-    def handle_claude_label_batch(self):
-        """Claude API로 여러 이미지 일괄 라벨링"""
-        global claude_label_state
+        # Save labels
+        LABELS_DIR.mkdir(exist_ok=True)
+        stem = image_path.stem
+        label_path = LABELS_DIR / f'{stem}.txt'
+        yolo_labels.write(label_path, yolo_labels.from_boxes(result.boxes))
 
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
-        data = json.loads(body)
+        # Mark as claude label
+        label_meta.set(stem, 'claude')
+        catalog.set_labels(stem, len(result.boxes), 'claude')
+
+        log += f"\n✅ {len(result.boxes)}개 라벨 저장됨"
+        self.send_json({
+            'success': True,
+            'labelCount': len(result.boxes),
+            'log': log
+        })
 
+    def handle_claude_label_batch(self):
+        """Claude API로 여러 이미지 일괄 라벨링 (network 작업으로 큐에 추가)"""
+        data = self._read_json_body()
         api_key = data.get('apiKey')
 
         if not api_key:
             self.send_json({'success': False, 'error': 'API 키가 필요합니다.'})
             return
 
-        if claude_label_state['running']:
-            self.send_json({'success': False, 'error': '이미 Claude 라벨링이 진행 중입니다.'})
-            return
-
-        # Get unlabeled images
-        unlabeled = []
-        for f in IMAGES_DIR.glob('*'):
-            if f.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                label_path = LABELS_DIR / f'{f.stem}.txt'
-                if not label_path.exists():
-                    unlabeled.append(f)
-
-        if not unlabeled:
+        if not catalog.unlabeled_images():
             self.send_json({'success': False, 'error': '라벨링되지 않은 이미지가 없습니다.'})
             return
 
-        # Limit to prevent API overuse
-        max_images = min(len(unlabeled), 50)
-        unlabeled = unlabeled[:max_images]
-
-        # Reset state
-        claude_label_state = {
-            'running': True,
-            'completed': False,
-            'total': len(unlabeled),
-            'processed': 0,
-            'labeled': 0,
-            'log': f'Claude AI 라벨링 시작\n총 {len(unlabeled)}개 이미지 (최대 50개)\n\n'
-        }
-
-        # Run in background
-        def run_claude_label():
-            global claude_label_state
-            try:
-                import anthropic
-                import base64
-
-                client = anthropic.Anthropic(api_key=api_key)
-                claude_label_state['log'] += 'API 연결 성공\n\n'
-
-                LABELS_DIR.mkdir(exist_ok=True)
-
-                for i, img_path in enumerate(unlabeled):
-                    if not claude_label_state['running']:
-                        claude_label_state['log'] += '\n⏹ 사용자에 의해 중지됨\n'
-                        break
-
-                    try:
-                        # Read and encode image
-                        with open(img_path, 'rb') as f:
-                            image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-
-                        suffix = img_path.suffix.lower()
-                        media_type = 'image/jpeg' if suffix in ['.jpg', '.jpeg'] else 'image/png'
-
-                        # Call Claude
-                        message = client.messages.create(
-                            model="claude-sonnet-4-20250514",
-                            max_tokens=512,
-                            messages=[{
-                                "role": "user",
-                                "content": [
-                                    {
-                                        "type": "image",
-                                        "source": {
-                                            "type": "base64",
-                                            "media_type": media_type,
-                                            "data": image_data
-                                        }
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": """바벨 플레이트 끝단(원형 옆면)의 바운딩 박스 좌표를 JSON으로 반환하세요.
-형식: {"labels": [{"cx": 0.2, "cy": 0.5, "w": 0.1, "h": 0.15}]}
-바벨이 없으면: {"labels": []}
-JSON만 응답하세요."""
-                                    }
-                                ]
-                            }]
-                        )
-
-                        response_text = message.content[0].text
-
-                        # Parse JSON
-                        import re
-                        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-
-                        label_count = 0
-                        if json_match:
-                            result = json.loads(json_match.group())
-                            labels = result.get('labels', [])
-
-                            # Save labels
-                            label_path = LABELS_DIR / f'{img_path.stem}.txt'
-                            with open(label_path, 'w') as f:
-                                for label in labels:
-                                    cx = label.get('cx', 0)
-                                    cy = label.get('cy', 0)
-                                    w = label.get('w', 0.05)
-                                    h = label.get('h', 0.05)
-                                    f.write(f'0 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n')
-                                    label_count += 1
-                                    claude_label_state['labeled'] += 1
-
-                            # Mark as claude
-                            if label_count > 0:
-                                meta = load_label_metadata()
-                                meta[img_path.stem] = 'claude'
-                                save_label_metadata(meta)
-
-                        claude_label_state['processed'] = i + 1
-                        claude_label_state['log'] += f'[{i+1}/{len(unlabeled)}] {img_path.name}: {label_count}개\n'
-
-                    except Exception as e:
-                        claude_label_state['log'] += f'[{i+1}/{len(unlabeled)}] {img_path.name}: 오류 - {str(e)[:50]}\n'
-                        claude_label_state['processed'] = i + 1
-
-                claude_label_state['log'] += f'\n\n✅ 완료! {claude_label_state["labeled"]}개 라벨 생성\n'
-
-            except Exception as e:
-                claude_label_state['log'] += f'\n\n❌ 오류: {str(e)}\n'
-
-            finally:
-                claude_label_state['running'] = False
-                claude_label_state['completed'] = True
-
-        thread = threading.Thread(target=run_claude_label)
-        thread.daemon = True
-        thread.start()
-
-        self.send_json({'success': True})
-
-    def get_claude_label_status(self):
-        global claude_label_state
-        return {
-            'running': claude_label_state['running'],
-            'completed': claude_label_state['completed'],
-            'total': claude_label_state['total'],
-            'processed': claude_label_state['processed'],
-            'labeled': claude_label_state['labeled'],
-            'log': claude_label_state['log']
-        }
+        self._submit_job('claude-label', {'apiKey': api_key})
 
     def handle_stop_claude_label(self):
-        global claude_label_state
-        claude_label_state['running'] = False
-        self.send_json({'success': True})
+        self._cancel_kind('claude-label')
 
     def handle_delete_labels(self):
         """다중 라벨 삭제"""
@@ -2573,21 +2308,21 @@ JSON만 응답하세요."""
             data = json.loads(post_data.decode('utf-8'))
 
             image_names = data.get('images', [])
-            meta = load_label_metadata()
 
             deleted = 0
+            stems = []
             for name in image_names:
                 # 확장자 제거
                 stem = Path(name).stem if '.' in name else name
+                stems.append(stem)
                 label_path = LABELS_DIR / f'{stem}.txt'
                 if label_path.exists():
                     label_path.unlink()
                     deleted += 1
-                # 메타데이터에서도 삭제
-                if stem in meta:
-                    del meta[stem]
 
-            save_label_metadata(meta)
+            # 메타데이터에서도 삭제
+            label_meta.delete_many([stem for stem in stems if label_meta.get(stem) is not None])
+            catalog.clear_labels(stems)
 
             self.send_json({'success': True, 'deleted': deleted})
 
@@ -2599,8 +2334,449 @@ JSON만 응답하세요."""
         pass
 
 
+# ---------- 백그라운드 작업 ----------
+
+def export_dataset(shards=False):
+    # export는 데이터셋 폴더 내용을 바꾸기 때문에 순서대로 처리
+    with export_lock:
+        return _export_dataset(shards)
+
+
+def _export_dataset(shards=False):
+    # 이전 export와 비교해서 바뀐 파일만 링크/복사 (dataset_materializer)
+    # shards: 폴더 대신 {dataset_dir}/shards/에 train/valid 샤드 (dataset_shards, 매번 새로 씀)
+    dataset_dir = TRAINING_DIR / 'barbell_plate_dataset_new'
+
+    # Get labeled images (라벨 수는 yolo_labels 폴더 캐시에서 - 바뀐 라벨 파일만 다시 읽음)
+    labels = yolo_labels.load_dir(LABELS_DIR)
+    labeled_images = []
+    label_counts = {}
+    for f in IMAGES_DIR.glob('*'):
+        if f.suffix.lower() in ['.jpg', '.jpeg', '.png']:
+            count = len(labels.get(f.stem))
+            if count:
+                labeled_images.append(f)
+                label_counts[f] = count
+
+    # Split 80/20 (그룹 단위 고정 분할 - 같은 영상/원본의 이미지는 같은 쪽, 다시 export해도 그대로)
+    train_set, valid_set = SplitIndex().partition(labeled_images, val_ratio=0.2)
+    image_count = len(labeled_images)
+    label_count = sum(label_counts.values())
+
+    if shards:
+        shard_dir = dataset_dir / 'shards'
+        stats = write_split_shards(shard_dir, {
+            split: [(img, LABELS_DIR / f'{img.stem}.txt') for img in images]
+            for split, images in (('train', train_set), ('valid', valid_set))})
+        write_if_changed(shard_dir / 'data.yaml',
+                         shard_yaml(shard_dir, ['barbell_endpoint', 'barbell'], val='valid'))
+        print(f"Dataset exported: {image_count} images, {label_count} labels ({format_shard_stats(stats)})")
+        return {
+            'path': str(shard_dir),
+            'imageCount': image_count,
+            'labelCount': label_count,
+            'shards': stats
+        }
+
+    files = {}
+    for split, images in (('train', train_set), ('valid', valid_set)):
+        for img in images:
+            files[f'{split}/images/{img.name}'] = img
+            files[f'{split}/labels/{img.stem}.txt'] = LABELS_DIR / f'{img.stem}.txt'
+    sync = materialize(dataset_dir, files,
+                       dirs=('train/images', 'train/labels', 'valid/images', 'valid/labels'))
+
+    # Create data.yaml
+    yaml_content = f"""# Barbell Dataset (Multi-class)
+# Generated by labeling_server.py
+# Total images: {image_count} (train: {len(train_set)}, valid: {len(valid_set)})
+# Total labels: {label_count}
+
+path: {dataset_dir.absolute()}
+train: train/images
+val: valid/images
+
+names:
+  0: barbell_endpoint
+  1: barbell
+
+nc: 2
+"""
+    write_if_changed(dataset_dir / 'data.yaml', yaml_content)
+
+    print(f"Dataset exported: {image_count} images, {label_count} labels ({format_sync_stats(sync)})")
+
+    return {
+        'path': str(dataset_dir),
+        'imageCount': image_count,
+        'labelCount': label_count,
+        'sync': sync
+    }
+
+
+def run_export_job(job):
+    append_log(job.state, '데이터셋 export 중...\n')
+    result = export_dataset(bool(job.params.get('shards')))
+    stats = format_shard_stats(result['shards']) if 'shards' in result else format_sync_stats(result['sync'])
+    append_log(job.state, f"✅ {result['imageCount']}개 이미지, {result['labelCount']}개 라벨 → {result['path']}\n"
+                          f"   {stats}\n")
+    return result
+
+
+def run_training_job(job):
+    state = job.state
+    fresh_start = job.params.get('fresh', False)
+    mode_text = "🆕 새로 학습" if fresh_start else "🚀 이어서 학습"
+
+    # 작업마다 고정된 run 이름 → 서버가 재시작되면 같은 폴더의 last.pt로 이어서 학습
+    run_name = f'barbell_endpoint_{job.id}'
+    run_dir = models.runs_dir / run_name
+    last_pt = run_dir / 'weights' / 'last.pt'
+    resume = job.resumed and last_pt.exists()
+
+    # shards: export(shards)가 만든 샤드로 학습 (augment_dataset.augmentation_trainer)
+    shards = bool(job.params.get('shards'))
+    dataset_path = TRAINING_DIR / 'barbell_plate_dataset_new' / ('shards' if shards else '') / 'data.yaml'
+    if not dataset_path.exists():
+        raise FileNotFoundError(f'데이터셋을 찾을 수 없습니다: {dataset_path}')
+
+    append_log(state, f'{mode_text} 시작 중...\n')
+    append_log(state, f'데이터셋: {dataset_path}\n')
+
+    # cache: 320 레터박스 캐시 (letterbox_cache, 바뀐 이미지만 새로 디코드) → 학습은 캐시에서 읽음
+    imgsz = 320
+    cache = bool(job.params.get('cache'))
+    if cache:
+        cache_stats = {}
+        dataset_path = build_cache(dataset_path, imgsz, verbose=False, stats=cache_stats)
+        append_log(state, f'레터박스 캐시: {format_cache_stats(cache_stats)}\n')
+    custom_trainer = shards or cache
+
+    if resume:
+        append_log(state, f'중단된 학습을 이어서 진행: {last_pt}\n\n')
+        train_code = f'''
+model = YOLO("{last_pt}")
+print("모델 로드 완료: {last_pt}", flush=True)
+print("학습 재개...", flush=True)
+
+results = model.train(resume=True, trainer={'augmentation_trainer(None)' if custom_trainer else 'None'})
+'''
+    else:
+        # 모델 선택
+        base_model = "yolov8n.pt"  # 기본값
+        if not fresh_start:
+            # 기존 학습 모델 찾기 (이어서 학습용, baseRun으로 특정 run 선택 가능)
+            best_pt = models.resolve(job.params.get('baseRun'), 'barbell_endpoint')
+            if best_pt is not None:
+                base_model = str(best_pt)
+
+        if base_model == "yolov8n.pt":
+            model_msg = "기본 모델(yolov8n.pt)에서 새로 학습"
+        else:
+            model_msg = f"기존 모델에서 이어서 학습: {Path(base_model).parent.parent.name}"
+        append_log(state, f'{model_msg}\n\n')
+
+        train_code = f'''
+model = YOLO("{base_model}")
+print("모델 로드 완료: {base_model}", flush=True)
+print("학습 시작...", flush=True)
+
+results = model.train(
+    trainer={'augmentation_trainer(None)' if custom_trainer else 'None'},
+    data="{dataset_path}",
+    epochs=30,
+    imgsz={imgsz},
+    batch=8,
+    name="{run_name}",
+    exist_ok=True,
+    patience=10,
+    device="mps",
+    workers=2,
+    verbose=True,
+    resume=False
+)
+'''
+
+    cmd = [
+        'python3', '-c', f'''
+from ultralytics import YOLO
+import sys
+{'from augment_dataset import augmentation_trainer' if custom_trainer else ''}
+{train_code}
+print("\\n학습 완료!", flush=True)
+print(f"Best model: {{results.save_dir}}/weights/best.pt", flush=True)
+'''
+    ]
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        cwd=str(TRAINING_DIR)
+    )
+
+    update_state(state, process=process)
+    try:
+        # Read output in real-time
+        for line in iter(process.stdout.readline, ''):
+            if not state['running']:
+                process.terminate()
+                break
+            append_log(state, line)
+
+        process.wait()
+    finally:
+        update_state(state, process=None)
+
+    if not state['running']:
+        return None
+    if process.returncode != 0:
+        raise RuntimeError(f'학습 실패 (exit code: {process.returncode})')
+
+    models.invalidate()
+    best_pt = run_dir / 'weights' / 'best.pt'
+    latest_model = best_pt if best_pt.exists() else models.latest('barbell_endpoint')
+
+    update_state(state, success=True)
+    update_state(state, model_path=str(latest_model) if latest_model else None)
+    append_log(state, '\n\n✅ 학습이 성공적으로 완료되었습니다!\n')
+
+    # CoreML 변환 및 iOS 앱에 복사
+    if latest_model:
+        append_log(state, '\n📱 CoreML 변환 중...\n')
+        try:
+            model = models.load(latest_model)
+            export_path = model.export(format='coreml', nms=True)
+            append_log(state, f'CoreML 변환 완료: {export_path}\n')
+
+            # iOS 앱에 복사
+            ios_model_path = TRAINING_DIR.parent / 'example' / 'ios' / 'Runner' / 'barbell_endpoint.mlpackage'
+            if Path(export_path).exists():
+                if ios_model_path.exists():
+                    shutil.rmtree(ios_model_path)
+                shutil.copytree(export_path, ios_model_path)
+                append_log(state, f'✅ iOS 앱에 모델 복사 완료!\n')
+                append_log(state, f'   경로: {ios_model_path}\n')
+                append_log(state, f'\n⚠️ 앱을 다시 빌드해야 새 모델이 적용됩니다.\n')
+        except Exception as e:
+            append_log(state, f'CoreML 변환 실패: {str(e)}\n')
+
+    return {'modelPath': state['model_path']}
+
+
+def cancel_training_job(job):
+    process = job.state.get('process')
+    if process:
+        try:
+            process.terminate()
+        except:
+            pass
+    append_log(job.state, '\n\n⏹ 사용자에 의해 학습이 중지되었습니다.\n')
+
+
+def run_auto_label_job(job):
+    state = job.state
+
+    # 지정한 run 또는 최근 학습 모델 (barbell_endpoint, barbell_augmented 등)
+    model_path = models.resolve(job.params.get('run'), 'barbell')
+    if not model_path:
+        raise RuntimeError('학습된 모델이 없습니다. 먼저 학습을 진행하세요.')
+
+    # 라벨 파일이 없는 이미지만 대상 → 재시작 후에는 남은 이미지부터 이어서 처리
+    unlabeled = [IMAGES_DIR / name for name in catalog.unlabeled_images()]
+    done = state['processed'] if job.resumed else 0
+    update_state(state, total=done + len(unlabeled), processed=done,
+                 labeled=state['labeled'] if job.resumed else 0)
+    append_log(state, f'모델: {model_path.parent.parent.name}/{model_path.name}\n총 {len(unlabeled)}개 이미지 처리 예정\n\n')
+
+    if not unlabeled:
+        append_log(state, '라벨링되지 않은 이미지가 없습니다.\n')
+        return None
+
+    batch_size = int(job.params.get('batchSize', AUTO_LABEL_BATCH_SIZE))
+    decode_workers = int(job.params.get('decodeWorkers', AUTO_LABEL_DECODE_WORKERS))
+
+    # 같은 가중치는 캐시된 모델 재사용 (파일이 바뀌면 새로 로드)
+    model = models.load(model_path)
+    append_log(state, f'모델 로드 완료 (배치 {batch_size}, 디코딩 스레드 {decode_workers})\n\n')
+
+    processed = [done]
+
+    def on_image(img_path, label_count):
+        processed[0] += 1
+        incr_state(state, 'labeled', label_count)
+        update_state(state, processed=processed[0])
+        append_log(state, f'[{processed[0]}/{state["total"]}] {img_path.name}: {label_count}개 감지\n')
+        job.checkpoint(last_image=img_path.name)
+
+    # 디코딩(스레드 풀) → 배치 추론 → 라벨/메타데이터 일괄 쓰기
+    writer = YoloLabelWriter(LABELS_DIR, label_meta, catalog, 'auto')
+    pipeline = AutoLabelPipeline(model, batch_size, decode_workers)
+    stats = pipeline.run(unlabeled, writer, on_image, should_stop=lambda: not state['running'])
+
+    if stats['stopped']:
+        append_log(state, '\n⏹ 사용자에 의해 중지됨\n')
+    else:
+        append_log(state, f'\n\n✅ 완료! {state["labeled"]}개 라벨 생성\n')
+    append_log(state, f"처리 속도: {stats['imagesPerSec']:.2f} img/s "
+                      f"({stats['images']}장 / {stats['seconds']:.1f}s, 추론 {stats['inferSeconds']:.1f}s)\n")
+    update_state(state, images_per_sec=stats['imagesPerSec'])
+
+    return {'labeled': state['labeled'], **stats}
+
+
+def detect_claude_rois(job, paths):
+    """Claude에 보낼 크롭 영역 (학습된 YOLO 모델의 검출 박스, 검출 없으면 전체 이미지)"""
+    try:
+        weights = models.resolve(job.params.get('run'))
+    except FileNotFoundError as e:
+        append_log(job.state, f'⚠️ ROI 크롭 생략: {e}\n')
+        return {}
+    if weights is None:
+        append_log(job.state, '⚠️ ROI 크롭 생략: 학습된 모델이 없습니다.\n')
+        return {}
+
+    # 자동 라벨링(cpu 작업)과 동시에 실행될 수 있으므로 캐시된 모델을 공유하지 않음
+    rois = detect_rois(models.loader(weights), paths)
+    append_log(job.state, f'ROI 크롭: {len(rois)}/{len(paths)}개 이미지 ({weights.parent.parent.name})\n')
+    return rois
+
+
+def run_claude_label_job(job):
+    state = job.state
+
+    # API 키는 작업 기록에 저장하지 않으므로 재시작 후에는 환경 변수 사용
+    api_key = job.params.get('apiKey') or os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise RuntimeError('API 키가 필요합니다. (서버 재시작 후에는 ANTHROPIC_API_KEY 필요)')
+
+    # Limit to prevent API overuse (재시작 전 처리한 수 포함)
+    bulk = job.params.get('mode') == 'batch'
+    max_images = CLAUDE_BULK_MAX_IMAGES if bulk else CLAUDE_BATCH_MAX_IMAGES
+    done = state['processed'] if job.resumed else 0
+    unlabeled = [IMAGES_DIR / name for name in catalog.unlabeled_images()]
+    unlabeled = unlabeled[:max(0, max_images - done)]
+    update_state(state, total=done + len(unlabeled), processed=done,
+                 labeled=state['labeled'] if job.resumed else 0)
+    append_log(state, f'Claude AI 라벨링 시작{" (Message Batches)" if bulk else ""}\n'
+                      f'총 {len(unlabeled)}개 이미지 (최대 {max_images}개)\n\n')
+
+    if not unlabeled:
+        append_log(state, '라벨링되지 않은 이미지가 없습니다.\n')
+        return None
+
+    # 완료한 이미지 기록 (재시작 시 라벨 0개로 끝난 이미지도 다시 요청하지 않음)
+    checkpoint_path = CLAUDE_CHECKPOINT_DIR / f'{job.id}.jsonl'
+    prep = ImagePrep(int(job.params.get('maxEdge', CLAUDE_IMAGE_MAX_EDGE)),
+                     int(job.params.get('quality', CLAUDE_IMAGE_QUALITY)))
+    context = build_claude_context(job, prep)
+    engine = ClaudeLabelEngine(
+        api_key, CLAUDE_BASE_URL,
+        concurrency=int(job.params.get('concurrency', CLAUDE_CONCURRENCY)),
+        rate=float(job.params.get('rate', CLAUDE_RATE)),
+        checkpoint_path=checkpoint_path,
+        cache=vlm_cache,
+        prep=prep,
+        context=context,
+    )
+    rois = detect_claude_rois(job, unlabeled) if job.params.get('roi') else {}
+    LABELS_DIR.mkdir(exist_ok=True)
+    meta_batch = label_meta.batch(flush_every=10)
+
+    def on_result(result):
+        img_path = result.image_path
+        if result.error:
+            message = f'오류 - {result.error[:50]}'
+        elif result.boxes is None:
+            message = 'JSON 파싱 실패'
+        else:
+            label_path = LABELS_DIR / f'{img_path.stem}.txt'
+            yolo_labels.write(label_path, yolo_labels.from_boxes(result.boxes))
+            if result.boxes:
+                meta_batch.set(img_path.stem, 'claude')
+                incr_state(state, 'labeled', len(result.boxes))
+            catalog.set_labels(img_path.stem, len(result.boxes), 'claude')
+            message = f'{len(result.boxes)}개'
+
+        incr_state(state, 'processed')
+        append_log(state, f'[{state["processed"]}/{state["total"]}] {img_path.name}: {message}\n')
+        job.checkpoint(last_image=img_path.name)
+
+    items = [(path.name, path, rois.get(path)) for path in unlabeled]
+    should_stop = lambda: not state['running']
+    result = {}
+    try:
+        if bulk:
+            stopped = not run_claude_batches(job, engine, items, on_result, meta_batch.flush)
+        else:
+            stats = engine.run(items, CLAUDE_BATCH_PROMPT, on_result, should_stop)
+            append_log(state, f'\n{format_stats(stats)}\n')
+            stopped = stats['stopped']
+            result['rateLimited'] = stats['rateLimited']
+    finally:
+        meta_batch.flush()
+
+    if stopped:
+        append_log(state, '\n⏹ 사용자에 의해 중지됨\n')
+    else:
+        append_log(state, f'\n\n✅ 완료! {state["labeled"]}개 라벨 생성\n')
+        checkpoint_path.unlink(missing_ok=True)
+
+    return {'labeled': state['labeled'], **result}
+
+
+def build_claude_context(job, prep):
+    """수동 라벨 이미지 few-shot 예시 (없거나 fewShot=0이면 None)"""
+    count = int(job.params.get('fewShot', CLAUDE_FEW_SHOT_EXAMPLES))
+    if count <= 0:
+        return None
+    names = [name for name, label_count, label_type, _ in catalog.list_images()
+             if label_count > 0 and label_type not in ('auto', 'claude')]
+    paths = [IMAGES_DIR / name for name in pick_examples(names, count)]
+    if not paths:
+        return None
+    context = FewShotContext.from_labels(paths, LABELS_DIR, CLAUDE_FEW_SHOT_TEXT, prep, answer_key='labels')
+    append_log(job.state, f'few-shot 예시: {", ".join(path.name for path in paths)}\n\n')
+    return context
+
+
+def run_claude_batches(job, engine, items, on_result, flush):
+    """Message Batches로 제출 후 끝날 때까지 조회 → 끝까지 반영했으면 True
+
+    배치 ID는 작업별 상태 파일에 저장되므로 서버가 재시작돼도 다시 제출하지 않고 이어서 조회
+    """
+    state = job.state
+    should_stop = lambda: not state['running']
+    labeler = MessageBatchLabeler(engine, CLAUDE_CHECKPOINT_DIR / f'{job.id}.batches.json',
+                                  log=lambda text: append_log(state, text + '\n'))
+    labeler.submit(items, CLAUDE_BATCH_PROMPT, on_result, should_stop)
+    if labeler.wait(on_result, flush, CLAUDE_BULK_POLL_SEC, should_stop):
+        append_log(state, f'\n배치 결과: {labeler.summary()}\n')
+        labeler.state_path.unlink(missing_ok=True)
+        return True
+
+    # 중지: 아직 처리 중인 요청은 취소 (이미 끝난 결과는 비용이 나갔으므로 반영)
+    labeler.cancel()
+    labeler.refresh()
+    labeler.ingest(on_result, flush)
+    return False
+
+
+def create_scheduler():
+    """작업 종류 등록 (자원 종류: export/자동 라벨링=cpu, 학습=subprocess, Claude=network)"""
+    jobs = JobScheduler(JOBS_FILE, JOB_CONCURRENCY, state_lock=state_lock)
+    jobs.register('export', run_export_job, 'cpu')
+    jobs.register('train', run_training_job, 'subprocess', TRAIN_DEFAULTS,
+                  on_cancel=cancel_training_job)
+    jobs.register('auto-label', run_auto_label_job, 'cpu', AUTO_LABEL_DEFAULTS)
+    jobs.register('claude-label', run_claude_label_job, 'network', LABEL_JOB_DEFAULTS,
+                  secret_params=('apiKey',))
+    return jobs
+
+
 def main():
-    global PORT
+    global PORT, catalog, label_meta, renditions, scheduler, models, vlm_cache
 
     if len(sys.argv) > 1:
         PORT = int(sys.argv[1])
@@ -2608,6 +2784,30 @@ def main():
     IMAGES_DIR.mkdir(exist_ok=True)
     LABELS_DIR.mkdir(exist_ok=True)
 
+    # 메타데이터 저널 재적용 후 스냅샷 갱신
+    label_meta = LabelMetadataStore(LABEL_META_FILE)
+    label_meta.compact()
+
+    # 카탈로그 재동기화 (mtime 변경분만)
+    catalog = LabelCatalog(CATALOG_DB, IMAGES_DIR, LABELS_DIR)
+    sync = catalog.reconcile(label_meta.snapshot())
+    print(f"카탈로그 동기화: 추가 {sync['added']}, 변경 {sync['updated']}, "
+          f"삭제 {sync['removed']}, 라벨 갱신 {sync['relabeled']}")
+
+    renditions = RenditionCache(RENDITION_CACHE_DIR, RENDITION_CACHE_MAX_BYTES)
+    if not renditions.enabled:
+        print('⚠️ Pillow가 없어 썸네일 대신 원본 이미지를 제공합니다. (pip install pillow)')
+
+    models = ModelRegistry(RUNS_DIR, MODEL_CACHE_MAX_BYTES)
+    vlm_cache = ResponseCache(VLM_CACHE_DB, VLM_CACHE_MAX_BYTES)
+
+    # 작업 기록 복구 (재시작 전 대기/실행 중이던 작업은 이어서 실행)
+    scheduler = create_scheduler()
+    resumed = scheduler.load()
+    if resumed:
+        print(f'대기 중인 작업 {resumed}개를 이어서 실행합니다.')
+    scheduler.start()
+
     print(f'''
 {'='*60}
 🏋️ 바벨 끝단 웹 라벨링 서버
@@ -2634,11 +2834,16 @@ Ctrl+C로 서버 종료
 {'='*60}
 ''')
 
-    with socketserver.TCPServer(('', PORT), LabelingHandler) as httpd:
+    with LabelingServer(('', PORT), LabelingHandler) as httpd:
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print('\n서버 종료')
+        finally:
+            scheduler.shutdown()
+            renditions.shutdown()
+            vlm_cache.close()
+            label_meta.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+학습 해상도 레터박스 이미지 캐시
+- 이미지를 한 번만 디코드해서 imgsz×imgsz로 레터박스(비율 유지 축소 + 회색 여백)한 uint8 배열을
+  letterbox_cache/{imgsz}/images.u8 (memmap, 슬롯 = 이미지 하나)에 저장
+  → 에포크마다 1280px JPEG 디코드 + resize를 하지 않음
+- 슬롯 키는 원본 내용 해시 (같은 해상도면 데이터셋끼리 공유, 다른 해상도는 다른 폴더)
+  원본 해시는 (경로, 크기, mtime)으로 기억해서 바뀐 파일만 다시 읽음
+  → 다시 빌드하면 새/바뀐 이미지만 디코드, 어떤 목록에서도 안 쓰는 슬롯은 재사용
+- 데이터셋(data.yaml)마다 {imgsz}/{이름}/에 split별 목록(*.cache.json, 슬롯 + 레터박스 좌표로 바꾼 라벨)과
+  data.yaml을 만듦 → augment_dataset.augmentation_trainer()가 LetterboxCacheDataset으로 읽음
+
+원본 split은 이미지 폴더(ultralytics 규칙: /images/ → /labels/) 또는 샤드 인덱스(dataset_shards.py)
+
+사용법:
+    data_yaml, trainer = cached_training_args('barbell_plate_dataset_new/data.yaml', 320)
+    model.train(data=str(data_yaml), trainer=trainer, imgsz=320, ...)
+    python3 letterbox_cache.py build barbell_plate_dataset_new/data.yaml --imgsz 320
+    python3 letterbox_cache.py stats --imgsz 320
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import yolo_labels
+from dataset_shards import IMAGE_SUFFIXES, ShardReader, is_shard_index
+from label_catalog import content_hasher
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+CACHE_DIR = Path(__file__).parent / 'letterbox_cache'
+CACHE_SUFFIX = '.cache.json'
+STORE_NAME = 'images.u8'
+ENTRIES_NAME = 'entries.json'
+PAD_VALUE = 114         # ultralytics LetterBox 여백 색
+GROW_SLOTS = 256        # memmap을 늘릴 때 최소 슬롯 수
+
+
+def is_cache_index(path):
+    return isinstance(path, (str, Path)) and str(path).endswith(CACHE_SUFFIX)
+
+
+def letterbox(img, imgsz):
+    """비율 유지 축소/확대 → (크기 조정된 이미지, (scale, left, top, h0, w0))"""
+    h0, w0 = img.shape[:2]
+    scale = min(imgsz / h0, imgsz / w0)
+    w, h = min(round(w0 * scale), imgsz), min(round(h0 * scale), imgsz)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(img, (w, h), interpolation=interpolation) if (w, h) != (w0, h0) else img
+    return resized, (scale, (imgsz - w) // 2, (imgsz - h) // 2, h0, w0)
+
+
+def letterbox_labels(rows, params, imgsz):
+    """원본 기준 정규화 xywh (N, 5) → 레터박스 이미지 기준 정규화 xywh"""
+    scale, left, top, h0, w0 = params
+    return yolo_labels.scale(rows, w0 * scale / imgsz, h0 * scale / imgsz, left / imgsz, top / imgsz)
+
+
+def _decode_letterbox(data, imgsz):
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return (None, None) if img is None else letterbox(img, imgsz)
+
+
+class LetterboxStore:
+    """imgsz 하나의 슬롯 저장소 (images.u8 + entries.json: 해시 → [슬롯, scale, left, top, h0, w0])"""
+
+    def __init__(self, imgsz, root=CACHE_DIR):
+        self.imgsz = imgsz
+        self.dir = Path(root) / str(imgsz)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.dir / ENTRIES_NAME, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.entries = data.get('entries', {})
+        self.sources = data.get('sources', {})     # 원본 키 → [서명(크기, mtime 또는 샤드 위치)..., 해시]
+        self.capacity = data.get('capacity', 0)
+        used = {entry[0] for entry in self.entries.values()}
+        self.free = sorted(set(range(self.capacity)) - used, reverse=True)
+        self.images = self._open() if self.capacity else None
+
+    @property
+    def slot_shape(self):
+        return (self.imgsz, self.imgsz, 3)
+
+    def _open(self):
+        return np.memmap(self.dir / STORE_NAME, np.uint8, 'r+', shape=(self.capacity, *self.slot_shape))
+
+    def reserve(self, count):
+        """빈 슬롯이 count개 이상 되게 파일을 늘림"""
+        if len(self.free) >= count:
+            return
+        old = self.capacity
+        self.capacity = old + max(count - len(self.free), GROW_SLOTS, old // 2)
+        if self.images is not None:
+            self.images.flush()
+        with open(self.dir / STORE_NAME, 'ab') as f:
+            f.truncate(self.capacity * int(np.prod(self.slot_shape)))
+        self.images = self._open()
+        self.free = sorted(self.free + list(range(old, self.capacity)), reverse=True)
+
+    def put(self, key, resized, params):
+        slot = self.free.pop()
+        _, left, top, _, _ = params
+        h, w = resized.shape[:2]
+        target = self.images[slot]
+        target[:] = PAD_VALUE
+        target[top:top + h, left:left + w] = resized
+        self.entries[key] = [slot, *params]
+
+    def collect(self, referenced):
+        """referenced(해시 집합)에 없는 슬롯 반환 → 반환한 수"""
+        stale = [key for key in self.entries if key not in referenced]
+        for key in stale:
+            self.free.append(self.entries.pop(key)[0])
+        self.free.sort(reverse=True)
+        return len(stale)
+
+    def save(self):
+        if self.images is not None:
+            self.images.flush()
+        tmp = self.dir / (ENTRIES_NAME + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'imgsz': self.imgsz, 'capacity': self.capacity,
+                       'entries': self.entries, 'sources': self.sources}, f)
+        os.replace(tmp, self.dir / ENTRIES_NAME)
+
+
+def _label_path(img_path):
+    """ultralytics와 같은 규칙 (.../images/x.jpg → .../labels/x.txt)"""
+    sa, sb = f'{os.sep}images{os.sep}', f'{os.sep}labels{os.sep}'
+    return Path(sb.join(str(img_path).rsplit(sa, 1))).with_suffix('.txt')
+
+
+class _FolderSource:
+    def __init__(self, images_dir):
+        self.items = sorted(p for p in Path(images_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        self.names = [p.name for p in self.items]
+        self.label_set = yolo_labels.load_dir(_label_path(Path(images_dir) / 'x.jpg').parent)
+
+    def key(self, i):
+        st = self.items[i].stat()
+        return str(self.items[i].resolve()), [st.st_size, st.st_mtime_ns]
+
+    def read(self, i):
+        return self.items[i].read_bytes()
+
+    def labels(self, i):
+        return self.label_set.get(self.items[i].stem)
+
+
+class _ShardSource:
+    def __init__(self, index_path):
+        self.reader = ShardReader(index_path)
+        self.names = self.reader.names
+
+    def key(self, i):
+        _, shard, offset, image_len, _, _, _ = self.reader.records[i]
+        return f'{self.reader.path.resolve()}#{self.names[i]}', [self.reader.shards[shard], offset, image_len]
+
+    def read(self, i):
+        return bytes(self.reader.image_bytes(i))
+
+    def labels(self, i):
+        return yolo_labels.parse(self.reader.label_text(i))
+
+
+def _open_source(path):
+    return _ShardSource(path) if is_shard_index(path) else _FolderSource(path)
+
+
+def _dataset_id(data_yaml):
+    data_yaml = Path(data_yaml).resolve()
+    digest = hashlib.blake2b(str(data_yaml).encode('utf-8'), digest_size=4).hexdigest()
+    return f'{data_yaml.parent.name}-{digest}'
+
+
+def load_data_yaml(data_yaml):
+    if yaml is None:
+        raise RuntimeError('data.yaml을 읽으려면 PyYAML이 필요합니다. (pip install pyyaml)')
+    with open(data_yaml, encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def build_cache(data_yaml, imgsz, root=CACHE_DIR, workers=None, verbose=True, stats=None):
+    """data.yaml의 train/val을 imgsz 레터박스 캐시로 → 캐시용 data.yaml 경로
+
+    새로 디코드하는 건 캐시에 없는 원본(내용 해시 기준)뿐, 다른 데이터셋이 쓰는 슬롯은 유지
+    stats: 넘기면 이 dict에 통계를 채움 (format_stats)
+    """
+    start = time.perf_counter()
+    data_yaml = Path(data_yaml)
+    data = load_data_yaml(data_yaml)
+    base = Path(data.get('path') or data_yaml.parent)
+    if not base.is_absolute():
+        base = (data_yaml.parent / base).resolve()
+
+    store = LetterboxStore(imgsz, root)
+    out_dir = store.dir / _dataset_id(data_yaml)
+    out_dir.mkdir(exist_ok=True)
+    stats = stats if stats is not None else {}
+    stats.update(images=0, decoded=0, hashed=0, failed=0)
+
+    cached = dict(data)
+    cached['path'] = str(out_dir)
+    lists = {}
+    for split in ('train', 'val'):
+        if not data.get(split):
+            continue
+        source = _open_source(base / data[split])
+
+        # 원본 해시 (크기/mtime 또는 샤드 위치가 그대로면 기억해 둔 해시)
+        keys = []
+        for i in range(len(source.names)):
+            source_key, signature = source.key(i)
+            known = store.sources.get(source_key)
+            if known is None or known[:-1] != signature:
+                h = content_hasher()
+                h.update(source.read(i))
+                known = store.sources[source_key] = [*signature, h.hexdigest()]
+                stats['hashed'] += 1
+            keys.append(known[-1])
+
+        missing = sorted({key: i for i, key in enumerate(keys) if key not in store.entries}.items())
+        store.reserve(len(missing))
+        with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+            # imdecode/resize는 GIL을 놓으므로 스레드로 충분, memmap 쓰기는 이 스레드에서만
+            decoded = pool.map(lambda item: (item[0], *_decode_letterbox(source.read(item[1]), imgsz)), missing)
+            for key, resized, params in decoded:
+                if resized is None:
+                    stats['failed'] += 1
+                    continue
+                store.put(key, resized, params)
+                stats['decoded'] += 1
+
+        records = []
+        for i, key in enumerate(keys):
+            entry = store.entries.get(key)
+            if entry is None:
+                continue
+            rows = letterbox_labels(source.labels(i), entry[1:], imgsz)
+            records.append([source.names[i], entry[0], key, np.round(rows, 6).tolist()])
+        stats['images'] += len(records)
+        lists[split] = records
+        cached[split] = f'{split}{CACHE_SUFFIX}'
+
+    for split, records in lists.items():
+        tmp = out_dir / f'{split}{CACHE_SUFFIX}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'imgsz': imgsz, 'store': f'../{STORE_NAME}', 'records': records}, f)
+        os.replace(tmp, out_dir / f'{split}{CACHE_SUFFIX}')
+
+    # 이 imgsz의 모든 목록에서 안 쓰는 슬롯 정리 (다른 데이터셋 목록도 포함)
+    referenced = set()
+    for list_path in store.dir.glob(f'*/*{CACHE_SUFFIX}'):
+        with open(list_path, encoding='utf-8') as f:
+            referenced.update(record[2] for record in json.load(f)['records'])
+    stats['released'] = store.collect(referenced)
+    store.sources = {k: v for k, v in store.sources.items() if v[-1] in referenced}
+    store.save()
+
+    with open(out_dir / 'data.yaml', 'w', encoding='utf-8') as f:
+        yaml.safe_dump(cached, f, allow_unicode=True, sort_keys=False)
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    if verbose:
+        print(f'레터박스 캐시 ({imgsz}): {format_stats(stats)} → {out_dir / "data.yaml"}')
+    return out_dir / 'data.yaml'
+
+
+def cached_training_args(data_yaml, imgsz, cache=True, recipe=None, shards=False):
+    """학습 스크립트 공통: model.train()에 넘길 (data.yaml, trainer)
+
+    cache: imgsz 레터박스 캐시를 갱신하고 캐시용 data.yaml로 바꿈 (바뀐 이미지만 새로 디코드)
+    recipe(학습 중 레시피 변형)/shards(샤드 인덱스)/cache 중 하나라도 있으면
+    augment_dataset.augmentation_trainer(recipe), 아니면 trainer는 None (ultralytics 기본)
+    """
+    if cache:
+        data_yaml = build_cache(data_yaml, imgsz)
+    trainer = None
+    if cache or recipe or shards:
+        # ultralytics 학습 내부 클래스를 쓰는 모듈이라 필요할 때만 import
+        from augment_dataset import augmentation_trainer
+        trainer = augmentation_trainer(recipe)
+    return data_yaml, trainer
+
+
+def format_stats(stats):
+    return (f"이미지 {stats['images']}개, 새로 디코드 {stats['decoded']}개, 해시 {stats['hashed']}개, "
+            f"정리한 슬롯 {stats['released']}개, 실패 {stats['failed']}개 ({stats['seconds']}s)")
+
+
+class CacheReader:
+    """*.cache.json 목록 → 슬롯 배열 읽기 (memmap 읽기 전용, DataLoader 워커에서 다시 매핑)"""
+
+    def __init__(self, list_path):
+        self.path = Path(list_path)
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.imgsz = data['imgsz']
+        self.store_path = (self.path.parent / data['store']).resolve()
+        self.records = data['records']
+        self.names = [record[0] for record in self.records]
+        self._images = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    @property
+    def images(self):
+        if self._images is None:
+            self._images = np.memmap(self.store_path, np.uint8, 'r').reshape(-1, self.imgsz, self.imgsz, 3)
+        return self._images
+
+    def image(self, index):
+        """슬롯 복사본 (학습 변환이 제자리에서 바꿔도 캐시는 그대로)"""
+        return np.array(self.images[self.records[index][1]])
+
+    def labels(self, index):
+        return np.array(self.records[index][3], np.float32).reshape(-1, 5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='학습 해상도 레터박스 이미지 캐시')
+    sub = parser.add_subparsers(dest='command')
+    build = sub.add_parser('build', help='data.yaml → 캐시 + 캐시용 data.yaml')
+    build.add_argument('data')
+    build.add_argument('--imgsz', type=int, default=320)
+    build.add_argument('--workers', type=int, default=None)
+    stats = sub.add_parser('stats', help='imgsz별 슬롯 사용량')
+    stats.add_argument('--imgsz', type=int, default=320)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_cache(args.data, args.imgsz, workers=args.workers)
+    elif args.command == 'stats':
+        store = LetterboxStore(args.imgsz)
+        size = store.capacity * int(np.prod(store.slot_shape))
+        print(f'{store.dir}: 슬롯 {len(store.entries)}/{store.capacity}개 사용, {size / 1024 / 1024:.0f}MB, '
+              f'데이터셋 {len(list(store.dir.glob("*/data.yaml")))}개')
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Claude Messages API 모의 서버 (오프라인 테스트 / 처리량·백오프 측정용)
+- POST /v1/messages: 이미지 내용 해시로 정해지는 고정 박스 응답
+- 분당 요청 한도(--rpm)를 넘거나 무작위(--fail-rate)로 429 + retry-after 반환
+- 응답 지연(--latency ± --jitter)과 업로드 대역폭(--upload-mbps, 요청 크기에 비례한 지연) 흉내
+- Message Batches: POST /v1/messages/batches, GET .../{id}, GET .../{id}/results, POST .../{id}/cancel
+  (--batch-delay초 뒤에 끝나고, --batch-error-rate 비율로 errored 결과)
+- prompt caching: cache_control이 붙은 블록까지 같은 앞부분이면 5분 동안 cache_read_input_tokens로 계산
+- GET /stats: 요청/429 횟수
+
+사용법:
+    python3 mock_label_server.py --port 8090 --rpm 60 --latency 0.8
+    ANTHROPIC_BASE_URL=http://localhost:8090 python3 claude_batch_label.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PROMPT_CACHE_TTL = 300
+
+
+def image_data_of(params):
+    """요청 본문의 마지막 user 메시지의 마지막 base64 이미지 (few-shot 예시 뒤의 대상 이미지)"""
+    try:
+        content = params['messages'][-1]['content']
+        return [block['source']['data'] for block in content if block.get('type') == 'image'][-1]
+    except (KeyError, TypeError, IndexError):
+        raise ValueError('messages[-1] must contain an image block')
+
+
+def cached_prefix(params):
+    """cache_control이 붙은 마지막 블록까지의 앞부분 → (해시, 추정 토큰 수), 없으면 None"""
+    content = params['messages'][-1]['content']
+    marked = [i for i, block in enumerate(content) if 'cache_control' in block]
+    if not marked:
+        return None
+    prefix = content[:marked[-1] + 1]
+    tokens = sum(1200 + len(block['source']['data']) // 1000 if block.get('type') == 'image'
+                 else len(block.get('text', '')) // 3 for block in prefix)
+    digest = hashlib.blake2b(json.dumps(prefix, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+    return digest, tokens
+
+
+def canned_response(image_data, model):
+    """이미지 데이터 해시로 결정되는 응답 (같은 이미지 → 항상 같은 박스)"""
+    digest = hashlib.blake2b(image_data.encode('ascii'), digest_size=8).digest()
+    rng = random.Random(digest)
+    count = rng.choice([0, 1, 1, 2])
+    boxes = [{
+        'cx': round(rng.uniform(0.1, 0.9), 4),
+        'cy': round(rng.uniform(0.2, 0.8), 4),
+        'w': round(rng.uniform(0.02, 0.08), 4),
+        'h': round(rng.uniform(0.04, 0.15), 4),
+    } for _ in range(count)]
+    text = json.dumps({'found': bool(boxes), 'boxes': boxes})
+    return {
+        'id': f'msg_mock_{digest.hex()}',
+        'type': 'message',
+        'role': 'assistant',
+        'model': model,
+        'content': [{'type': 'text', 'text': text}],
+        'stop_reason': 'end_turn',
+        'usage': {'input_tokens': 1200 + len(image_data) // 1000, 'output_tokens': len(text) // 3},
+    }
+
+
+class MockLabelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, rpm=0, fail_rate=0.0, latency=0.0, jitter=0.0, retry_after=2.0,
+                 upload_mbps=0.0, batch_delay=5.0, batch_error_rate=0.0):
+        super().__init__(address, MockLabelHandler)
+        self.rpm = rpm
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.upload_mbps = upload_mbps
+        self.batch_delay = batch_delay
+        self.batch_error_rate = batch_error_rate
+        self.batches = {}           # id -> {'created', 'requests', 'canceled', 'results'}
+        self.prompt_cache = {}      # 앞부분 해시 -> 만료 시각
+        self.lock = threading.RLock()       # batch_results → respond 중첩 호출
+        self.window = deque()       # 최근 60초 안의 허용된 요청 시각
+        self.stats = {'requests': 0, 'ok': 0, 'rateLimited': 0, 'badRequest': 0,
+                      'batches': 0, 'batchRequests': 0, 'promptCacheReads': 0, 'promptCacheWrites': 0}
+
+    def admit(self):
+        """요청 허용 여부, 거절 시 retry-after 초"""
+        with self.lock:
+            self.stats['requests'] += 1
+            now = time.monotonic()
+            while self.window and now - self.window[0] >= 60:
+                self.window.popleft()
+
+            if self.rpm and len(self.window) >= self.rpm:
+                self.stats['rateLimited'] += 1
+                return max(1, int(60 - (now - self.window[0])) + 1)
+            if self.fail_rate and random.random() < self.fail_rate:
+                self.stats['rateLimited'] += 1
+                return self.retry_after
+
+            self.window.append(now)
+            return None
+
+    def respond(self, params):
+        """고정 응답 + prompt cache 토큰 계산 (응답이 끝난 뒤에야 다음 요청이 캐시를 읽을 수 있음)"""
+        response = canned_response(image_data_of(params), params.get('model', 'mock'))
+        prefix = cached_prefix(params)
+        if prefix is None:
+            return response
+
+        digest, tokens = prefix
+        now = time.monotonic()
+        with self.lock:
+            hit = self.prompt_cache.get(digest, 0) > now
+            self.prompt_cache[digest] = now + PROMPT_CACHE_TTL
+            self.stats['promptCacheReads' if hit else 'promptCacheWrites'] += 1
+        usage = response['usage']
+        usage['cache_read_input_tokens'] = tokens if hit else 0
+        usage['cache_creation_input_tokens'] = 0 if hit else tokens
+        return response
+
+    # ---------- Message Batches ----------
+
+    def create_batch(self, requests):
+        with self.lock:
+            batch_id = f'msgbatch_mock_{len(self.batches) + 1:06d}'
+            self.batches[batch_id] = {'created': time.time(), 'requests': requests,
+                                      'canceled': False, 'results': None}
+            self.stats['batches'] += 1
+            self.stats['batchRequests'] += len(requests)
+            return batch_id
+
+    def batch_results(self, batch):
+        """끝난 배치의 결과 (한 번 계산해서 보관 - 여러 번 조회해도 같은 결과)"""
+        if batch['results'] is None:
+            results = []
+            for request in batch['requests']:
+                if batch['canceled']:
+                    result = {'type': 'canceled'}
+                elif random.random() < self.batch_error_rate:
+                    result = {'type': 'errored', 'error': {'type': 'api_error', 'message': 'mock error'}}
+                else:
+                    result = {'type': 'succeeded', 'message': self.respond(request['params'])}
+                results.append({'custom_id': request['custom_id'], 'result': result})
+            batch['results'] = results
+        return batch['results']
+
+    def describe_batch(self, batch_id, host):
+        with self.lock:
+            batch = self.batches[batch_id]
+            ended = batch['canceled'] or time.time() - batch['created'] >= self.batch_delay
+            counts = {'processing': 0, 'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+            if ended:
+                for item in self.batch_results(batch):
+                    counts[item['result']['type']] += 1
+            else:
+                counts['processing'] = len(batch['requests'])
+            return {
+                'id': batch_id,
+                'type': 'message_batch',
+                'processing_status': 'ended' if ended else 'in_progress',
+                'request_counts': counts,
+                'created_at': batch['created'],
+                'results_url': f'http://{host}/v1/messages/batches/{batch_id}/results' if ended else None,
+            }
+
+
+class MockLabelHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, error_type, message, headers=None):
+        self.send_json({'type': 'error', 'error': {'type': error_type, 'message': message}},
+                       status, headers)
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if self.path == '/stats':
+            with self.server.lock:
+                self.send_json(dict(self.server.stats))
+        elif parts[:3] == ['v1', 'messages', 'batches'] and len(parts) in (4, 5):
+            batch_id = parts[3]
+            if batch_id not in self.server.batches:
+                self.send_error_json(404, 'not_found_error', f'batch {batch_id} not found')
+                return
+            info = self.server.describe_batch(batch_id, self.headers.get('Host', 'localhost'))
+            if len(parts) == 4:
+                self.send_json(info)
+            elif info['processing_status'] != 'ended':
+                self.send_error_json(400, 'invalid_request_error', 'batch has not ended')
+            else:
+                with self.server.lock:
+                    results = self.server.batch_results(self.server.batches[batch_id])
+                body = ''.join(json.dumps(item) + '\n' for item in results).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/binary')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        else:
+            self.send_error_json(404, 'not_found_error', 'Not found')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        if self.path.startswith('/v1/messages/batches'):
+            self.handle_batches(raw)
+            return
+        if self.path != '/v1/messages':
+            self.send_error_json(404, 'not_found_error', 'Not found')
+            return
+
+        retry_after = self.server.admit()
+        if retry_after is not None:
+            self.send_error_json(429, 'rate_limit_error', 'Number of requests has exceeded your rate limit',
+                                 {'retry-after': str(retry_after)})
+            return
+
+        try:
+            payload = json.loads(raw)
+            image_data_of(payload)
+        except ValueError as e:
+            with self.server.lock:
+                self.server.stats['badRequest'] += 1
+            self.send_error_json(400, 'invalid_request_error', str(e))
+            return
+
+        delay = self.server.latency + random.uniform(-self.server.jitter, self.server.jitter)
+        if self.server.upload_mbps:
+            delay += len(raw) * 8 / (self.server.upload_mbps * 1_000_000)
+        if delay > 0:
+            time.sleep(delay)
+
+        response = self.server.respond(payload)
+        with self.server.lock:
+            self.server.stats['ok'] += 1
+        self.send_json(response)
+
+    def handle_batches(self, raw):
+        parts = self.path.strip('/').split('/')
+        host = self.headers.get('Host', 'localhost')
+
+        if len(parts) == 3:
+            # 배치 생성
+            try:
+                requests = json.loads(raw)['requests']
+                ids = set()
+                for request in requests:
+                    image_data_of(request['params'])
+                    ids.add(request['custom_id'])
+                if not requests or len(ids) != len(requests):
+                    raise ValueError('requests must be non-empty with unique custom_id values')
+            except (ValueError, KeyError, TypeError) as e:
+                with self.server.lock:
+                    self.server.stats['badRequest'] += 1
+                self.send_error_json(400, 'invalid_request_error', str(e))
+                return
+            batch_id = self.server.create_batch(requests)
+            self.send_json(self.server.describe_batch(batch_id, host))
+
+        elif len(parts) == 5 and parts[4] == 'cancel' and parts[3] in self.server.batches:
+            with self.server.lock:
+                batch = self.server.batches[parts[3]]
+                if batch['results'] is None:
+                    batch['canceled'] = True
+            self.send_json(self.server.describe_batch(parts[3], host))
+
+        else:
+            self.send_error_json(404, 'not_found_error', 'Not found')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Claude Messages API 모의 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--rpm', type=int, default=0, help='분당 요청 한도 (0: 무제한)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='무작위 429 비율 (0~1)')
+    parser.add_argument('--retry-after', type=float, default=2.0, help='무작위 429의 retry-after (초)')
+    parser.add_argument('--latency', type=float, default=0.5, help='응답 지연 (초)')
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--upload-mbps', type=float, default=0.0, help='업로드 대역폭 (Mbps, 0: 무제한)')
+    parser.add_argument('--batch-delay', type=float, default=5.0, help='배치가 끝나기까지 걸리는 시간 (초)')
+    parser.add_argument('--batch-error-rate', type=float, default=0.0, help='배치 결과 중 errored 비율')
+    args = parser.parse_args()
+
+    server = MockLabelServer((args.host, args.port), args.rpm, args.fail_rate,
+                             args.latency, args.jitter, args.retry_after, args.upload_mbps,
+                             args.batch_delay, args.batch_error_rate)
+    print(f'Mock Claude API: http://{args.host}:{args.port} (rpm={args.rpm or "∞"}, '
+          f'429 비율={args.fail_rate}, 지연={args.latency}s)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+학습된 YOLO 모델 색인 + 로드된 모델 캐시
+- runs/detect 아래 학습 결과(run)를 한 번 색인하고, 폴더가 바뀌었을 때만 다시 스캔
+- run 이름으로 특정 모델 선택 가능 (기본은 가장 최근 run의 best.pt)
+- 로드한 모델은 (경로, mtime) 키로 메모리에 유지 (LRU, 가중치 파일 크기 합계 상한)
+  → 같은 가중치를 다시 쓰면 ultralytics import / .pt 로드 생략, 파일이 바뀌면 자동으로 새로 로드
+
+로드된 모델 객체는 공유되므로 동시에 여러 스레드에서 추론하지 않도록
+호출하는 쪽에서 순서를 보장해야 합니다 (labeling_server는 cpu 작업 1개씩 실행).
+
+사용법:
+    python3 model_registry.py              # run 목록 출력
+    python3 model_registry.py barbell_aug  # prefix로 필터
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# 색인을 다시 확인하는 최소 간격 (초) - 학습 중 best.pt가 갱신되는 경우 반영
+INDEX_TTL_SEC = 30
+MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+MODEL_CACHE_MAX_MODELS = 3
+
+
+def _load_yolo(path):
+    from ultralytics import YOLO
+    return YOLO(str(path))
+
+
+class ModelRegistry:
+    """runs/detect 색인 + 로드된 모델 LRU"""
+
+    def __init__(self, runs_dir, max_bytes=MODEL_CACHE_MAX_BYTES, max_models=MODEL_CACHE_MAX_MODELS,
+                 loader=_load_yolo):
+        self.runs_dir = Path(runs_dir)
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self.loader = loader
+
+        self._lock = threading.RLock()
+        self._runs = []                 # 최근 run부터
+        self._dir_mtime = None
+        self._indexed_at = 0.0
+
+        self._models = OrderedDict()    # (경로, mtime_ns) -> (모델, 바이트)
+        self._model_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 색인 ----------
+
+    def _scan(self):
+        runs = []
+        with os.scandir(self.runs_dir) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                weights = Path(entry.path) / 'weights'
+                best_pt = weights / 'best.pt'
+                last_pt = weights / 'last.pt'
+                try:
+                    best_st = best_pt.stat()
+                except FileNotFoundError:
+                    best_st = None
+                runs.append({
+                    'name': entry.name,
+                    'path': Path(entry.path),
+                    'mtime': entry.stat().st_mtime,
+                    'best': best_pt if best_st else None,
+                    'bestMtime': best_st.st_mtime if best_st else None,
+                    'bestBytes': best_st.st_size if best_st else 0,
+                    'hasLast': last_pt.exists(),
+                })
+        runs.sort(key=lambda run: run['mtime'], reverse=True)
+        return runs
+
+    def refresh(self, force=False):
+        """runs 폴더가 바뀌었거나 TTL이 지났으면 다시 색인"""
+        with self._lock:
+            try:
+                dir_mtime = self.runs_dir.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._runs, self._dir_mtime = [], None
+                return self._runs
+
+            stale = time.monotonic() - self._indexed_at > INDEX_TTL_SEC
+            if force or stale or dir_mtime != self._dir_mtime:
+                self._runs = self._scan()
+                self._dir_mtime = dir_mtime
+                self._indexed_at = time.monotonic()
+            return self._runs
+
+    def invalidate(self):
+        """학습이 끝난 직후 등 다음 조회에서 다시 색인하도록 표시"""
+        with self._lock:
+            self._indexed_at = 0.0
+
+    def runs(self, prefix='barbell'):
+        """prefix로 시작하는 run 목록 (최근 순)"""
+        return [run for run in self.refresh() if run['name'].startswith(prefix)]
+
+    def latest(self, prefix='barbell'):
+        """best.pt가 있는 가장 최근 run의 best.pt"""
+        for run in self.runs(prefix):
+            if run['best'] is not None:
+                return run['best']
+        return None
+
+    def resolve(self, run=None, prefix='barbell'):
+        """run 이름 (또는 .pt 경로)으로 가중치 찾기, 없으면 최근 모델
+
+        Raises:
+            FileNotFoundError: 지정한 run에 best.pt가 없음
+        """
+        if not run:
+            return self.latest(prefix)
+
+        path = Path(run)
+        if path.suffix == '.pt':
+            if not path.is_absolute():
+                path = self.runs_dir / path
+            if path.exists():
+                return path
+            raise FileNotFoundError(f'모델 파일이 없습니다: {run}')
+
+        for entry in self.refresh(force=True):
+            if entry['name'] == run and entry['best'] is not None:
+                return entry['best']
+        raise FileNotFoundError(f'학습 결과를 찾을 수 없습니다: {run}')
+
+    # ---------- 로드된 모델 캐시 ----------
+
+    def load(self, path):
+        """가중치 로드 (같은 경로+mtime이면 캐시된 모델 반환)"""
+        path = Path(path)
+        st = path.stat()
+        key = (str(path.resolve()), st.st_mtime_ns)
+
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+
+            self.misses += 1
+            # 같은 파일의 이전 버전은 더 이상 쓰지 않음
+            for old_key in [k for k in self._models if k[0] == key[0]]:
+                self._drop(old_key)
+
+            model = self.loader(path)
+            self._models[key] = (model, st.st_size)
+            self._model_bytes += st.st_size
+            self._evict()
+            return model
+
+    def _drop(self, key):
+        _, size = self._models.pop(key)
+        self._model_bytes -= size
+
+    def _evict(self):
+        while len(self._models) > 1 and (
+                self._model_bytes > self.max_bytes or len(self._models) > self.max_models):
+            self._drop(next(iter(self._models)))
+
+    def loaded(self):
+        with self._lock:
+            return [path for path, _ in self._models]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': len(self._models),
+                'loadedBytes': self._model_bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def describe(self, prefix='barbell'):
+        """API 응답용 run 목록"""
+        loaded = set(self.loaded())
+        return [{
+            'name': run['name'],
+            'mtime': run['mtime'],
+            'bestPt': str(run['best']) if run['best'] else None,
+            'bestMtime': run['bestMtime'],
+            'bestBytes': run['bestBytes'],
+            'hasLast': run['hasLast'],
+            'loaded': bool(run['best']) and str(run['best'].resolve()) in loaded,
+        } for run in self.runs(prefix)]
+
+
+def main():
+    runs_dir = Path(__file__).parent / 'runs' / 'detect'
+    prefix = sys.argv[1] if len(sys.argv) > 1 else 'barbell'
+    registry = ModelRegistry(runs_dir)
+
+    runs = registry.runs(prefix)
+    if not runs:
+        print(f'{runs_dir} 에 {prefix}* 학습 결과가 없습니다.')
+        return
+
+    latest = registry.latest(prefix)
+    for run in runs:
+        mark = '*' if run['best'] is not None and run['best'] == latest else ' '
+        best = f"best.pt {run['bestBytes'] / 1024 / 1024:.1f}MB" if run['best'] else 'best.pt 없음'
+        print(f"{mark} {run['name']:<40} {time.strftime('%Y-%m-%d %H:%M', time.localtime(run['mtime']))}  {best}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+스트리밍 multipart/form-data 파서
+- 요청 본문 전체를 메모리에 올리지 않고 청크 단위로 읽으면서 파트를 나눔
+- 파일 파트는 도착하는 대로 디스크에 쓰고, 동시에 내용 해시 계산
+- 파일당/전체 용량 제한
+
+사용법:
+    parser = MultipartStreamParser(self.rfile, boundary, content_length)
+    for part in parser:
+        if part.filename:
+            for chunk in part:
+                f.write(chunk)
+"""
+
+import os
+import re
+
+CHUNK_SIZE = 256 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class MultipartError(ValueError):
+    pass
+
+
+class FileTooLarge(MultipartError):
+    pass
+
+
+def parse_boundary(content_type):
+    """Content-Type 헤더에서 boundary 추출"""
+    match = re.search(r'boundary=(?:"([^"]+)"|([^;\s]+))', content_type or '')
+    if not match:
+        raise MultipartError('boundary 없음')
+    return (match.group(1) or match.group(2)).encode('latin-1')
+
+
+def _parse_part_headers(raw):
+    headers = {}
+    for line in raw.decode('utf-8', errors='replace').split('\r\n'):
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+    disposition = headers.get('content-disposition', '')
+    params = dict(re.findall(r';\s*([\w*]+)="?([^";]*)"?', disposition))
+    return headers, params.get('name'), params.get('filename')
+
+
+class Part:
+    """multipart 파트 하나 (반복하면 본문 청크를 순서대로 반환)"""
+
+    def __init__(self, parser, headers, name, filename):
+        self._parser = parser
+        self.headers = headers
+        self.name = name
+        self.filename = filename
+        self.size = 0
+        self._done = False
+
+    def __iter__(self):
+        while not self._done:
+            chunk, self._done = self._parser._read_body_chunk()
+            if chunk:
+                self.size += len(chunk)
+                yield chunk
+
+    def drain(self):
+        for _ in self:
+            pass
+
+
+class MultipartStreamParser:
+    """rfile에서 Content-Length 만큼만 읽는 스트리밍 파서"""
+
+    def __init__(self, rfile, boundary, content_length, chunk_size=CHUNK_SIZE):
+        self.rfile = rfile
+        self.remaining = content_length
+        self.chunk_size = chunk_size
+        self.delimiter = b'\r\n--' + boundary
+        self._finished = False
+        self._current = None
+
+        # 첫 boundary 앞에 CRLF가 없으므로 붙여서 같은 구분자로 처리
+        self._buf = b'\r\n'
+        self._skip_preamble()
+
+    def _fill(self):
+        """버퍼에 한 청크 더 읽기 (더 읽을 게 없으면 False)"""
+        if self.remaining <= 0:
+            return False
+        data = self.rfile.read(min(self.chunk_size, self.remaining))
+        if not data:
+            self.remaining = 0
+            return False
+        self.remaining -= len(data)
+        self._buf += data
+        return True
+
+    def _skip_preamble(self):
+        while True:
+            idx = self._buf.find(self.delimiter)
+            if idx != -1:
+                self._buf = self._buf[idx + len(self.delimiter):]
+                return
+            self._buf = self._buf[-len(self.delimiter):]
+            if not self._fill():
+                raise MultipartError('boundary를 찾을 수 없음')
+
+    def _after_delimiter(self):
+        """구분자 뒤: '--'면 종료, CRLF면 다음 파트"""
+        while len(self._buf) < 2:
+            if not self._fill():
+                raise MultipartError('본문이 중간에 끝남')
+        if self._buf.startswith(b'--'):
+            self._finished = True
+            self._buf = b''
+            # 남은 epilogue는 읽어서 버림 (keep-alive 연결 보호)
+            while self._fill():
+                self._buf = b''
+            return False
+        if not self._buf.startswith(b'\r\n'):
+            raise MultipartError('잘못된 boundary 형식')
+        self._buf = self._buf[2:]
+        return True
+
+    def _read_headers(self):
+        while True:
+            idx = self._buf.find(b'\r\n\r\n')
+            if idx != -1:
+                raw, self._buf = self._buf[:idx], self._buf[idx + 4:]
+                return _parse_part_headers(raw)
+            if len(self._buf) > MAX_HEADER_BYTES:
+                raise MultipartError('파트 헤더가 너무 큼')
+            if not self._fill():
+                raise MultipartError('본문이 중간에 끝남')
+
+    def _read_body_chunk(self):
+        """현재 파트 본문의 다음 청크 → (data, 파트 끝 여부)"""
+        while True:
+            idx = self._buf.find(self.delimiter)
+            if idx != -1:
+                data, self._buf = self._buf[:idx], self._buf[idx + len(self.delimiter):]
+                return data, True
+
+            # 구분자가 청크 경계에 걸칠 수 있으므로 끝부분은 남겨둠
+            keep = len(self.delimiter) - 1
+            if len(self._buf) > keep + self.chunk_size // 2:
+                data, self._buf = self._buf[:-keep], self._buf[-keep:]
+                return data, False
+            if not self._fill():
+                raise MultipartError('본문이 중간에 끝남')
+
+    def __iter__(self):
+        while not self._finished:
+            if self._current is not None:
+                self._current.drain()
+            if not self._after_delimiter():
+                return
+            headers, name, filename = self._read_headers()
+            self._current = Part(self, headers, name, filename)
+            yield self._current
+
+    def discard_rest(self):
+        """남은 본문을 읽어서 버림 (중간에 거절한 경우)"""
+        while self.remaining > 0:
+            data = self.rfile.read(min(self.chunk_size, self.remaining))
+            if not data:
+                break
+            self.remaining -= len(data)
+        self._buf = b''
+        self._finished = True
+
+
+def stream_to_file(part, dest_path, hasher, max_bytes):
+    """파트 본문을 dest_path에 쓰면서 해시 계산
+
+    Returns:
+        int: 쓴 바이트 수
+
+    Raises:
+        FileTooLarge: max_bytes 초과 (쓰던 파일은 삭제, 파트는 끝까지 읽음)
+    """
+    written = 0
+    try:
+        with open(dest_path, 'wb') as f:
+            for chunk in part:
+                written += len(chunk)
+                if written > max_bytes:
+                    raise FileTooLarge(part.filename)
+                hasher.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        part.drain()
+        try:
+            os.unlink(dest_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return written
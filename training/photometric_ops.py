@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+증강용 밝기/색상/노이즈/가림 연산 (augment_data.py)
+- 밝기/대비: convertScaleAbs 그대로 (uint8 → uint8 SIMD 한 번이라 LUT보다 빠름, 벤치마크 참고)
+  LUT(brightness_lut)는 다른 표와 합칠 때만 사용
+- 색상 변화: uint8 HSV에 채널별 LUT (3채널 LUT 하나) → float32 HSV 배열을 만들지 않음
+- 노이즈/가림: 재사용 float32 버퍼에 바로 생성해서 더하거나 복사 (새로 만드는 배열은 결과 하나)
+- 난수는 워커마다 Generator 하나 (augment_data가 노드마다 reseed로 상태를 맞춤)
+
+사용법 (기존 구현 대비 처리량 / 임시 메모리):
+    python3 photometric_ops.py --widths 640 1280 --repeat 20
+"""
+
+import argparse
+import time
+import tracemalloc
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+_rng = np.random.Generator(np.random.PCG64(0))
+
+
+def rng():
+    """이 프로세스의 난수 생성기"""
+    return _rng
+
+
+def reseed(seed):
+    """같은 Generator 객체의 상태만 seed로 다시 설정 (워커 안에서 노드마다 호출)"""
+    _rng.bit_generator.state = np.random.PCG64(seed).state
+
+
+@lru_cache(maxsize=256)
+def brightness_lut(alpha, beta):
+    """saturate(|alpha * x + beta|) 표 (convertScaleAbs와 같은 반올림)"""
+    lut = cv2.convertScaleAbs(np.arange(256, dtype=np.uint8).reshape(1, 256), alpha=alpha, beta=beta)
+    lut.setflags(write=False)
+    return lut
+
+
+def brightness_contrast(img, alpha=1.0, beta=0):
+    return cv2.convertScaleAbs(img, alpha=alpha, beta=beta)
+
+
+def hsv_lut(hue_shift, sat_scale, val_scale):
+    """HSV 채널별 표 (기존 float32 계산 + 자르기 + uint8 버림과 같은 값)"""
+    x = np.arange(256, dtype=np.float32)
+    lut = np.empty((1, 256, 3), np.uint8)
+    lut[0, :, 0] = np.clip(x + np.float32(hue_shift), 0, 179)
+    lut[0, :, 1] = np.clip(x * np.float32(sat_scale), 0, 255)
+    lut[0, :, 2] = np.clip(x * np.float32(val_scale), 0, 255)
+    return lut
+
+
+def color_jitter(img, hue=10, sat=0.2, val=0.2, generator=None):
+    """색조 ±hue, 채도/명도 ×(1±sat/val)"""
+    generator = generator or _rng
+    lut = hsv_lut(generator.uniform(-hue, hue), generator.uniform(1 - sat, 1 + sat),
+                  generator.uniform(1 - val, 1 + val))
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    cv2.LUT(hsv, lut, dst=hsv)
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=hsv)
+
+
+_scratch = {}
+
+
+def _buffer(shape):
+    buf = _scratch.get(shape)
+    if buf is None:
+        _scratch.clear()        # 크기가 바뀌면 이전 버퍼는 버림 (프로세스당 하나)
+        buf = _scratch[shape] = np.empty(shape, np.float32)
+    return buf
+
+
+def gaussian_noise(img, var=10, generator=None):
+    """가우시안 노이즈 (표준편차 var)"""
+    generator = generator or _rng
+    noise = _buffer(img.shape)
+    generator.standard_normal(dtype=np.float32, out=noise)
+    noise *= var
+    noise += img
+    np.clip(noise, 0, 255, out=noise)
+    return noise.astype(np.uint8)
+
+
+def cutout(img, num_holes=2, max_size=50, generator=None):
+    """무작위 위치/크기 영역을 무작위 값으로 가림 (구멍 크기 [20, max_size))"""
+    generator = generator or _rng
+    h, w = img.shape[:2]
+    result = img.copy()
+    flat = _buffer(img.shape).reshape(-1)
+    for _ in range(num_holes):
+        hole_h = int(generator.integers(20, max_size))
+        hole_w = int(generator.integers(20, max_size))
+        y = int(generator.integers(0, h - hole_h))
+        x = int(generator.integers(0, w - hole_w))
+        # 재사용 버퍼 앞부분에 [0, 255) 값을 만들어 구멍에 복사 (구멍마다 새 배열을 만들지 않음)
+        fill = flat[:hole_h * hole_w * 3].reshape(hole_h, hole_w, 3)
+        generator.random(dtype=np.float32, out=fill)
+        fill *= 255
+        result[y:y + hole_h, x:x + hole_w] = fill
+    return result
+
+
+# ---------- 벤치마크 ----------
+
+def _lut_brightness_contrast(img, alpha=1.2, beta=20):
+    return cv2.LUT(img, brightness_lut(alpha, beta))
+
+
+def _reference_color_jitter(img):
+    """기존 augment_data.apply_color_jitter"""
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
+    hsv[:, :, 0] += np.random.uniform(-10, 10)
+    hsv[:, :, 0] = np.clip(hsv[:, :, 0], 0, 179)
+    hsv[:, :, 1] *= np.random.uniform(0.8, 1.2)
+    hsv[:, :, 1] = np.clip(hsv[:, :, 1], 0, 255)
+    hsv[:, :, 2] *= np.random.uniform(0.8, 1.2)
+    hsv[:, :, 2] = np.clip(hsv[:, :, 2], 0, 255)
+    return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
+
+
+def _reference_gaussian_noise(img, var=15):
+    """기존 augment_data.apply_gaussian_noise"""
+    noise = np.random.normal(0, var, img.shape).astype(np.float32)
+    noisy = img.astype(np.float32) + noise
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def _reference_cutout(img, num_holes=2, max_size=60):
+    """기존 augment_data.apply_cutout"""
+    h, w = img.shape[:2]
+    result = img.copy()
+    for _ in range(num_holes):
+        hole_h = np.random.randint(20, max_size)
+        hole_w = np.random.randint(20, max_size)
+        y = np.random.randint(0, h - hole_h)
+        x = np.random.randint(0, w - hole_w)
+        result[y:y+hole_h, x:x+hole_w] = np.random.randint(0, 255, (hole_h, hole_w, 3))
+    return result
+
+
+BENCH_CASES = [
+    ('brightness LUT', lambda img: brightness_contrast(img, 1.2, 20), _lut_brightness_contrast),
+    ('color jitter', _reference_color_jitter, color_jitter),
+    ('gaussian noise 15', _reference_gaussian_noise, lambda img: gaussian_noise(img, 15)),
+    ('cutout 2x60', _reference_cutout, lambda img: cutout(img, 2, 60)),
+]
+
+
+def _measure(fn, img, repeat):
+    """(초/호출, 호출당 최대 임시 메모리 - 이미지 크기 배수)"""
+    fn(img)     # 워밍업 (LUT/버퍼 캐시)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(img)
+    seconds = (time.perf_counter() - start) / repeat
+
+    # numpy 배열 할당은 tracemalloc에 잡힘 (결과 이미지 1개 = 1.0)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn(img)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return seconds, peak / img.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='밝기/색상/노이즈 연산 처리량 (기존 구현 대비)')
+    parser.add_argument('--widths', type=int, nargs='+', default=[640, 1280])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=1, help='OpenCV 스레드 수 (증강 워커와 같은 1이 기본)')
+    args = parser.parse_args()
+
+    cv2.setNumThreads(args.threads)
+    print(f"{'width':>6}  {'op':<20}{'기존 ops/s':>11}{'새 ops/s':>10}{'배속':>7}"
+          f"{'기존 메모리':>11}{'새 메모리':>10}")
+    for width in args.widths:
+        height = width * 9 // 16
+        img = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+        for name, reference, optimized in BENCH_CASES:
+            old, old_mem = _measure(reference, img, args.repeat)
+            new, new_mem = _measure(optimized, img, args.repeat)
+            print(f'{width:>6}  {name:<20}{1 / old:>11.0f}{1 / new:>10.0f}{old / new:>6.1f}x'
+                  f'{old_mem:>10.1f}x{new_mem:>9.1f}x')
+    print('메모리: 호출 한 번의 최대 임시 할당량 (입력 이미지 크기 배수, 결과 이미지 포함)')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@
 """
 
 import os
+import sys
 import shutil
 from pathlib import Path
 import urllib.request
@@ -80,9 +81,9 @@ def create_synthetic_negatives():
     print(f"  기존 이미지: {len(existing_images)}개")
     print("  (추가 synthetic negative 생성은 수동으로 진행 권장)")
 
-def train_model():
+def train_model(cache=False):
     """
-    YOLOv8 모델 재학습
+    YOLOv8 모델 재학습 (cache: 레터박스 캐시에서 읽음)
     """
     print("\n=== YOLOv8 모델 학습 시작 ===")
 
@@ -98,11 +99,15 @@ def train_model():
         print(f"data.yaml 파일 없음: {data_yaml}")
         return None
 
+    from letterbox_cache import cached_training_args
+    data_yaml, trainer = cached_training_args(data_yaml, 320, cache)
+
     # YOLOv8 nano 모델 로드
     model = YOLO("yolov8n.pt")
 
     # 학습 실행
     results = model.train(
+        trainer=trainer,
         data=str(data_yaml),
         epochs=100,          # 에포크 수 증가
         imgsz=320,           # 모바일용 이미지 크기
@@ -208,7 +213,7 @@ def main():
     print(f"\n현재 학습 이미지 수: {len(train_images)}")
 
     # 4. 모델 학습
-    model = train_model()
+    model = train_model(cache='--cache' in sys.argv)
 
     # 5. 모델 Export
     export_models(model)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+라벨링 서버용 정적 파일 전송
+- 파일 전체를 메모리에 올리지 않고 socket.sendfile(os.sendfile)로 전송
+- Range 요청(단일 구간) 지원: 206 Partial Content / 416
+- ETag / Last-Modified 조건부 요청(304), If-Range 지원
+
+이미지, 크롤링 영상(crawled_data/videos), export된 데이터셋 파일 전송에 공통 사용
+"""
+
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+
+def guess_content_type(path):
+    content_type, _ = mimetypes.guess_type(str(path))
+    return content_type or 'application/octet-stream'
+
+
+def parse_byte_range(header, size):
+    """Range 헤더를 (start, end) 로 변환 (end 포함)
+
+    Returns:
+        (start, end): 유효한 단일 구간
+        None: Range 없음 또는 지원하지 않는 형식 (전체 전송)
+
+    Raises:
+        ValueError: 만족할 수 없는 구간 (416)
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        # 다중 구간은 지원하지 않음 → 전체 전송 (RFC 7233 허용)
+        return None
+
+    start_s, sep, end_s = spec.partition('-')
+    if not sep:
+        return None
+    try:
+        if start_s == '':
+            # bytes=-N : 마지막 N바이트
+            suffix = int(end_s)
+            if suffix <= 0:
+                raise ValueError(header)
+            return max(0, size - suffix), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError(header)
+
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def is_not_modified(headers, etag, mtime):
+    """If-None-Match / If-Modified-Since 확인"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        tags = [t.strip().removeprefix('W/') for t in if_none_match.split(',')]
+        return etag in tags or '*' in tags
+
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return False
+
+
+def send_file(handler, path, content_type=None, etag=None, cache_control='no-cache',
+              head_only=False):
+    """파일을 스트리밍 전송 (Range/조건부 요청 처리 포함)
+
+    Args:
+        handler: BaseHTTPRequestHandler
+        path: 전송할 파일
+        etag: 따옴표 포함 ETag (없으면 크기+mtime으로 생성)
+
+    Raises:
+        FileNotFoundError: 열기 전에 파일이 없어진 경우 (응답은 아직 보내지 않음)
+            파일을 먼저 열고 보내므로 연 뒤에 삭제돼도(렌디션 캐시 정리 등) 끝까지 전송됨
+    """
+    with open(path, 'rb') as f:
+        _send_open_file(handler, f, path, content_type, etag, cache_control, head_only)
+
+
+def _send_open_file(handler, f, path, content_type, etag, cache_control, head_only):
+    st = os.fstat(f.fileno())
+    size = st.st_size
+    etag = etag or f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+    content_type = content_type or guess_content_type(path)
+
+    def common_headers():
+        handler.send_header('ETag', etag)
+        handler.send_header('Last-Modified', formatdate(st.st_mtime, usegmt=True))
+        handler.send_header('Cache-Control', cache_control)
+        handler.send_header('Accept-Ranges', 'bytes')
+
+    if is_not_modified(handler.headers, etag, st.st_mtime):
+        handler.send_response(304)
+        common_headers()
+        handler.end_headers()
+        return
+
+    # If-Range가 현재 ETag와 다르면 Range 무시하고 전체 전송
+    range_header = handler.headers.get('Range')
+    if_range = handler.headers.get('If-Range')
+    if range_header and if_range and if_range.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_byte_range(range_header, size)
+    except ValueError:
+        handler.send_response(416)
+        handler.send_header('Content-Range', f'bytes */{size}')
+        common_headers()
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+        return
+
+    if byte_range is None:
+        start, end = 0, size - 1
+        handler.send_response(200)
+    else:
+        start, end = byte_range
+        handler.send_response(206)
+        handler.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+
+    length = end - start + 1 if size else 0
+    common_headers()
+    handler.send_header('Content-type', content_type)
+    handler.send_header('Content-Length', str(length))
+    handler.end_headers()
+
+    if head_only or length == 0:
+        return
+
+    try:
+        # 커널에서 바로 소켓으로 복사 (지원 안 되면 내부적으로 read/send 반복)
+        handler.wfile.flush()
+        handler.connection.sendfile(f, offset=start, count=length)
+    except (BrokenPipeError, ConnectionResetError):
+        # 빠르게 넘기는 중 브라우저가 요청을 취소한 경우
+        pass
@@ -0,0 +1,110 @@
+"""
+MessageBatchLabeler ↔ mock_label_server 왕복 테스트
+- 제출 → 조회 → 결과 반영이 mock의 고정 응답과 같은 박스를 돌려주는지
+- 다시 실행해도 같은 이미지를 다시 제출하거나 결과를 두 번 반영하지 않는지
+
+사용법:
+    python3 -m unittest discover training/tests
+"""
+
+import base64
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from claude_label_engine import ClaudeLabelEngine, parse_boxes  # noqa: E402
+from claude_message_batches import BATCH_PROMPT, MessageBatchLabeler  # noqa: E402
+from mock_label_server import MockLabelServer, canned_response  # noqa: E402
+
+IMAGE_COUNT = 5
+
+
+class MessageBatchLabelerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLabelServer(('127.0.0.1', 0), batch_delay=0.0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.addCleanup(self.thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.images = []
+        for i in range(IMAGE_COUNT):
+            path = self.root / f'img_{i:03d}.jpg'
+            path.write_bytes(b'\xff\xd8\xff\xe0' + bytes([i]) * 64)
+            self.images.append((path.stem, path))
+
+        base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.engine = ClaudeLabelEngine('test', base_url, max_retries=0)
+        self.state_path = self.root / 'batches.json'
+
+    def labeler(self):
+        return MessageBatchLabeler(self.engine, self.state_path, max_requests=2, log=lambda message: None)
+
+    def expected_boxes(self, path):
+        data = base64.standard_b64encode(path.read_bytes()).decode('utf-8')
+        response = canned_response(data, self.engine.model)
+        return parse_boxes(response['content'][0]['text'])
+
+    def test_submit_wait_ingest(self):
+        results = {}
+        labeler = self.labeler()
+        batch_ids = labeler.submit(self.images, BATCH_PROMPT, results.__setitem__)
+        self.assertEqual(len(batch_ids), 3)        # 요청 2개씩 → 배치 3개
+        self.assertEqual(results, {})
+
+        def on_result(result):
+            self.assertNotIn(result.key, results)
+            results[result.key] = result
+
+        self.assertTrue(labeler.wait(on_result, poll_interval=0.01))
+        self.assertEqual(sorted(results), [key for key, _ in self.images])
+        for key, path in self.images:
+            self.assertTrue(results[key].ok, results[key].error)
+            self.assertEqual(results[key].boxes, self.expected_boxes(path))
+        self.assertEqual(labeler.summary()['ingested'], IMAGE_COUNT)
+        self.assertEqual(labeler.summary()['failed'], 0)
+
+    def test_resubmit_is_idempotent(self):
+        labeler = self.labeler()
+        labeler.submit(self.images, BATCH_PROMPT)
+        labeler.wait(lambda result: None, poll_interval=0.01)
+        stats = dict(self.server.stats)
+
+        # 상태 파일에서 다시 시작: 제출할 것도, 반영할 것도 없어야 함
+        again = []
+        labeler = self.labeler()
+        self.assertEqual(labeler.submit(self.images, BATCH_PROMPT, again.append), [])
+        labeler.refresh()
+        self.assertEqual(labeler.ingest(again.append), 0)
+        self.assertEqual(again, [])
+        self.assertEqual(self.server.stats['batches'], stats['batches'])
+        self.assertEqual(self.server.stats['batchRequests'], IMAGE_COUNT)
+
+        state = json.loads(self.state_path.read_text())
+        self.assertTrue(all(batch['ingestedAll'] for batch in state['batches']))
+
+    def test_partial_ingest_resumes(self):
+        labeler = self.labeler()
+        labeler.submit(self.images[:3], BATCH_PROMPT)
+        # 앞 이미지만 제출한 뒤 전체를 다시 제출 → 새 이미지만 새 배치로
+        labeler = self.labeler()
+        labeler.submit(self.images, BATCH_PROMPT)
+        self.assertEqual(self.server.stats['batchRequests'], IMAGE_COUNT)
+
+        keys = []
+        labeler.wait(lambda result: keys.append(result.key), poll_interval=0.01)
+        self.assertEqual(sorted(keys), [key for key, _ in self.images])
+
+
+if __name__ == '__main__':
+    unittest.main()
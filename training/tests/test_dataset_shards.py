@@ -0,0 +1,79 @@
+"""
+ShardWriter 다시 쓰기 ↔ 이전 인덱스를 가진 ShardReader
+- 같은 prefix를 다시 써도 이미 만든 reader와 그 피클(DataLoader 워커)이 계속 읽히는지
+- 전전 세대 샤드는 지워지는지
+
+사용법:
+    python3 -m unittest discover training/tests
+"""
+
+import pickle
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dataset_shards import SHARD_SUFFIX, ShardReader, ShardWriter  # noqa: E402
+
+IMAGE_COUNT = 4
+
+
+def jpeg(value):
+    ok, data = cv2.imencode('.jpg', np.full((16, 24, 3), value, np.uint8))
+    return data.tobytes()
+
+
+class ShardRewriteTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def write(self, value):
+        # 샤드 하나에 레코드 하나 → 샤드 여러 개
+        with ShardWriter(self.root, 'train', shard_bytes=1) as writer:
+            for i in range(IMAGE_COUNT):
+                writer.add(f'img_{i}.jpg', jpeg(value), f'0 0.5 0.5 0.1 0.{i + 1}\n')
+        return self.root / 'train.index.json'
+
+    def shard_files(self):
+        return sorted(path.name for path in self.root.glob(f'train-*{SHARD_SUFFIX}'))
+
+    def test_reader_survives_rewrite(self):
+        index = self.write(50)
+        reader = ShardReader(index)
+        state = pickle.dumps(reader)        # 다시 쓰기 전에 워커로 넘긴 reader
+
+        self.write(200)
+        self.assertEqual(int(reader.read_image(0).mean()), 50)
+        self.assertEqual(reader.label_text(3), '0 0.5 0.5 0.1 0.4\n')
+
+        # 다시 쓴 뒤에 워커에서 풀어도 이전 세대 샤드가 남아 있음
+        worker = pickle.loads(state)
+        self.assertEqual([int(worker.read_image(i).mean()) for i in range(IMAGE_COUNT)], [50] * IMAGE_COUNT)
+        self.assertEqual(int(ShardReader(index).read_image(0).mean()), 200)
+        reader.close()
+        worker.close()
+
+    def test_keeps_only_previous_generation(self):
+        first = ShardReader(self.write(10)).shards
+        second = ShardReader(self.write(20)).shards
+        self.assertEqual(self.shard_files(), sorted(first + second))
+
+        mapped = ShardReader(self.root / 'train.index.json')
+        third = ShardReader(self.write(30)).shards
+        self.assertEqual(self.shard_files(), sorted(second + third))
+        # 지워진 세대를 매핑해 둔 reader도 끝까지 읽힘
+        self.write(40)
+        self.assertEqual(int(mapped.read_image(IMAGE_COUNT - 1).mean()), 20)
+        mapped.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,13 +5,16 @@
 
 from pathlib import Path
 import shutil
+import sys
 
 TRAINING_DIR = Path(__file__).parent
 
-def train():
+def train(cache=False):
     from ultralytics import YOLO
 
     data_yaml = TRAINING_DIR / "barbell_plate_dataset" / "data.yaml"
+    from letterbox_cache import cached_training_args
+    data_yaml, trainer = cached_training_args(data_yaml, 320, cache)
 
     print("=== YOLOv8 바벨 플레이트 감지 모델 학습 ===")
     print(f"데이터셋: {data_yaml}")
@@ -19,6 +22,7 @@ def train():
     model = YOLO("yolov8n.pt")
 
     results = model.train(
+        trainer=trainer,
         data=str(data_yaml),
         epochs=100,
         imgsz=320,
@@ -81,5 +85,5 @@ def export_and_copy(model):
     print("\n=== Export 완료 ===")
 
 if __name__ == "__main__":
-    model = train()
+    model = train(cache='--cache' in sys.argv)
     export_and_copy(model)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Claude 라벨링 요청 전 이미지 축소/재인코딩/ROI 크롭
+- 긴 변을 max_edge 이하로 줄이고 JPEG quality로 다시 인코딩
+  (crawl_hq_barbell.py 프레임은 1280px, quality 95 → 요청 크기/지연/토큰 비용 절감)
+- roi(이전 YOLO 검출 박스)가 있으면 그 주변만 잘라서 전송
+- 응답의 정규화 좌표를 원본 프레임 좌표로 되돌림 (ImageTransform.to_original)
+
+축소는 이미지 전체를 같은 비율로 줄이므로 정규화 좌표가 그대로 유지되고,
+크롭만 정수 픽셀 박스 기준으로 되돌리면 되므로 좌표 변환은 정확합니다.
+Pillow가 없으면 원본을 그대로 보냅니다.
+
+사용법 (바이트/지연 측정):
+    python3 vlm_image_prep.py --images labeling_images --max-edge 768 1024 --quality 80 90
+    python3 mock_label_server.py --port 8090 --upload-mbps 10 &
+    python3 vlm_image_prep.py --base-url http://localhost:8090   # mock 서버 왕복 시간 포함
+"""
+
+import argparse
+import base64
+import io
+import math
+import time
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+MAX_EDGE = 1024
+QUALITY = 85
+ROI_MARGIN = 0.5        # ROI 박스 크기 대비 여백 (양쪽 각각)
+ROI_MIN_SIZE = 0.25     # 크롭 영역 최소 크기 (원본 대비 비율)
+
+
+class ImageTransform:
+    """원본 프레임 → 전송 이미지 변환 정보 (크롭 박스는 원본 픽셀 좌표)"""
+
+    def __init__(self, width, height, crop=None, size=None):
+        self.width = width
+        self.height = height
+        self.crop = crop or (0, 0, width, height)
+        self.size = size or (self.crop[2] - self.crop[0], self.crop[3] - self.crop[1])
+
+    @property
+    def identity(self):
+        return self.crop == (0, 0, self.width, self.height) and self.size == (self.width, self.height)
+
+    def to_record(self):
+        return {'width': self.width, 'height': self.height, 'crop': list(self.crop), 'size': list(self.size)}
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record['width'], record['height'], tuple(record['crop']), tuple(record['size']))
+
+    def signature(self):
+        """캐시 키용 문자열 (같은 변환이면 같은 값)"""
+        return 'crop=%d,%d,%d,%d;size=%dx%d' % (*self.crop, *self.size)
+
+    def to_original(self, boxes):
+        """전송 이미지 기준 정규화 (cx, cy, w, h) → 원본 프레임 기준 정규화 좌표"""
+        left, top, right, bottom = self.crop
+        crop_w, crop_h = right - left, bottom - top
+        mapped = []
+        for cx, cy, w, h in boxes:
+            mapped.append(((left + cx * crop_w) / self.width,
+                           (top + cy * crop_h) / self.height,
+                           w * crop_w / self.width,
+                           h * crop_h / self.height))
+        return mapped
+
+
+def roi_crop_box(width, height, roi, margin=ROI_MARGIN, min_size=ROI_MIN_SIZE):
+    """정규화 박스 목록(roi)을 감싸는 원본 픽셀 크롭 박스 (left, top, right, bottom)"""
+    x0 = min(cx - w / 2 for cx, cy, w, h in roi)
+    y0 = min(cy - h / 2 for cx, cy, w, h in roi)
+    x1 = max(cx + w / 2 for cx, cy, w, h in roi)
+    y1 = max(cy + h / 2 for cx, cy, w, h in roi)
+
+    # 여백 + 최소 크기 (주변 맥락이 있어야 끝단 위치를 제대로 찾음)
+    bw = max((x1 - x0) * (1 + 2 * margin), min_size)
+    bh = max((y1 - y0) * (1 + 2 * margin), min_size)
+    mx, my = (x0 + x1) / 2, (y0 + y1) / 2
+
+    left = max(0, int((mx - bw / 2) * width))
+    top = max(0, int((my - bh / 2) * height))
+    right = min(width, int(round((mx + bw / 2) * width)))
+    bottom = min(height, int(round((my + bh / 2) * height)))
+    if right - left < 2 or bottom - top < 2:
+        return (0, 0, width, height)
+    return (left, top, right, bottom)
+
+
+def _target_size(crop, max_edge):
+    crop_w, crop_h = crop[2] - crop[0], crop[3] - crop[1]
+    scale = min(1.0, max_edge / max(crop_w, crop_h)) if max_edge else 1.0
+    return max(1, round(crop_w * scale)), max(1, round(crop_h * scale))
+
+
+class ImagePrep:
+    """전송용 이미지 준비 (max_edge=None이면 축소 안 함)"""
+
+    def __init__(self, max_edge=MAX_EDGE, quality=QUALITY, roi_margin=ROI_MARGIN):
+        self.max_edge = max_edge
+        self.quality = quality
+        self.roi_margin = roi_margin
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def plan(self, path, roi=None):
+        """이미지 헤더만 읽어서 변환 정보 계산 (디코딩 없음)"""
+        if Image is None:
+            return None
+        with Image.open(path) as img:
+            width, height = img.size
+        crop = roi_crop_box(width, height, roi, self.roi_margin) if roi else (0, 0, width, height)
+        return ImageTransform(width, height, crop, _target_size(crop, self.max_edge))
+
+    def signature(self, transform):
+        """캐시 키 구분용 (변환 + 인코딩 설정)"""
+        if transform is None or transform.identity:
+            return ''
+        return f'{transform.signature()};q={self.quality}'
+
+    def render(self, path, transform, data=None):
+        """변환 적용 → (바이트, media_type)
+
+        변환이 없고 재인코딩해도 작아지지 않으면 원본 바이트를 그대로 사용
+        """
+        if data is None:
+            data = Path(path).read_bytes()
+        if transform is None:
+            return data, None
+
+        left, top, right, bottom = transform.crop
+        out_w, out_h = transform.size
+        with Image.open(io.BytesIO(data)) as img:
+            # JPEG는 디코딩 단계에서 1/2, 1/4, 1/8 축소 (크롭 영역이 out 크기 이상 남는 만큼만)
+            need = (math.ceil(out_w * transform.width / (right - left)),
+                    math.ceil(out_h * transform.height / (bottom - top)))
+            drafted = img.draft('RGB', need)
+            # draft 축소 비율은 정확히 1/scale (반환 box = 원본 크기 / scale)
+            factor = drafted[1][2] / transform.width if drafted else 1.0
+            img = img.convert('RGB')
+
+            box = (left * factor, top * factor, right * factor, bottom * factor)
+            if box != (0, 0, *img.size) or img.size != transform.size:
+                img = img.resize(transform.size, Image.BILINEAR, box=box)
+
+            out = io.BytesIO()
+            img.save(out, 'JPEG', quality=self.quality)
+
+        encoded = out.getvalue()
+        if transform.identity and len(encoded) >= len(data):
+            return data, None
+        return encoded, 'image/jpeg'
+
+
+def detect_rois(model, paths, conf=0.25, batch_size=8):
+    """YOLO 검출 박스 → {경로: [(cx, cy, w, h)]} (검출이 없는 이미지는 제외)"""
+    from auto_label_pipeline import result_boxes
+
+    rois = {}
+    paths = list(paths)
+    for i in range(0, len(paths), batch_size):
+        batch = paths[i:i + batch_size]
+        results = model([str(p) for p in batch], verbose=False, conf=conf)
+        for path, result in zip(batch, results):
+            boxes = result_boxes(result)
+            if boxes:
+                rois[path] = [tuple(box) for box in boxes]
+    return rois
+
+
+def _round_trip(base_url, data, media_type):
+    """mock/실제 API 한 번 왕복 시간 (초)"""
+    from claude_label_engine import ClaudeLabelEngine
+
+    engine = ClaudeLabelEngine('bench', base_url, max_retries=0)
+    payload = {
+        'model': engine.model,
+        'max_tokens': 64,
+        'messages': [{'role': 'user', 'content': [
+            {'type': 'image', 'source': {'type': 'base64', 'media_type': media_type,
+                                         'data': base64.b64encode(data).decode()}},
+            {'type': 'text', 'text': 'bench'},
+        ]}],
+    }
+    start = time.perf_counter()
+    engine._post(payload)
+    return time.perf_counter() - start
+
+
+def estimate_image_tokens(width, height):
+    """이미지 입력 토큰 추정 (긴 변 1568px로 줄인 뒤 픽셀 수 / 750)"""
+    scale = min(1.0, 1568 / max(width, height))
+    return int(width * scale * height * scale / 750)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Claude 전송 이미지 축소/재인코딩 효과 측정')
+    parser.add_argument('--images', default=str(Path(__file__).parent / 'labeling_images'))
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--max-edge', type=int, nargs='+', default=[768, MAX_EDGE])
+    parser.add_argument('--quality', type=int, nargs='+', default=[80, QUALITY])
+    parser.add_argument('--base-url', help='지정하면 원본/변환 이미지 왕복 시간도 측정')
+    args = parser.parse_args()
+
+    if Image is None:
+        print('Pillow가 필요합니다. (pip install pillow)')
+        return
+
+    paths = sorted(p for p in Path(args.images).iterdir()
+                   if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:args.limit]
+    if not paths:
+        print(f'이미지가 없습니다: {args.images}')
+        return
+
+    originals = [p.read_bytes() for p in paths]
+    orig_bytes = sum(len(d) for d in originals)
+    orig_tokens = 0
+    for p in paths:
+        with Image.open(p) as img:
+            orig_tokens += estimate_image_tokens(*img.size)
+
+    orig_rtt = None
+    if args.base_url:
+        orig_rtt = sum(_round_trip(args.base_url, d, 'image/jpeg') for d in originals) / len(paths)
+
+    print(f'원본 {len(paths)}장: 평균 {orig_bytes / len(paths) / 1024:.1f}KB, '
+          f'추정 토큰 {orig_tokens / len(paths):.0f}'
+          + (f', 왕복 {orig_rtt * 1000:.0f}ms' if orig_rtt else ''))
+    print(f"{'edge':>6}{'q':>5}{'KB/img':>9}{'bytes%':>8}{'tokens':>8}{'prep ms':>9}"
+          + (f"{'rtt ms':>9}{'saved ms':>10}" if orig_rtt else ''))
+
+    for max_edge in args.max_edge:
+        for quality in args.quality:
+            prep = ImagePrep(max_edge, quality)
+            total, tokens, prep_sec, rtt = 0, 0, 0.0, 0.0
+            for path, data in zip(paths, originals):
+                t0 = time.perf_counter()
+                transform = prep.plan(path)
+                encoded, media_type = prep.render(path, transform, data)
+                prep_sec += time.perf_counter() - t0
+                total += len(encoded)
+                tokens += estimate_image_tokens(*transform.size)
+                if orig_rtt:
+                    rtt += _round_trip(args.base_url, encoded, media_type or 'image/jpeg')
+
+            n = len(paths)
+            line = (f'{max_edge:>6}{quality:>5}{total / n / 1024:>9.1f}{total / orig_bytes * 100:>7.0f}%'
+                    f'{tokens / n:>8.0f}{prep_sec / n * 1000:>9.1f}')
+            if orig_rtt:
+                line += f'{rtt / n * 1000:>9.0f}{(orig_rtt - rtt / n - prep_sec / n) * 1000:>10.0f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
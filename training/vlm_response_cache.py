@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+VLM(Claude) 라벨링 응답 캐시 (SQLite)
+- 키: 이미지 내용 해시 + 프롬프트 해시 + 모델 ID
+  → 같은 프레임을 다시 라벨링하거나 다른 크롤에서 중복된 프레임은 API를 호출하지 않음
+- 원본 응답 텍스트와 파싱된 박스를 함께 저장
+- 전체 용량 상한을 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+- 파서가 바뀌면 저장된 원본 응답으로 박스만 다시 계산 (네트워크 호출 없음)
+
+사용법:
+    python3 vlm_response_cache.py stats
+    python3 vlm_response_cache.py reparse   # claude_label_engine.parse_boxes로 다시 파싱
+    python3 vlm_response_cache.py clear
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+CACHE_DB = Path(__file__).parent / 'labeling_cache' / 'vlm_responses.db'
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    image_hash TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    raw TEXT NOT NULL,
+    boxes TEXT,
+    usage TEXT,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+CREATE INDEX IF NOT EXISTS idx_responses_image ON responses(image_hash);
+'''
+
+
+def prompt_hash(prompt):
+    return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def cache_key(image_hash, prompt, model, variant=''):
+    """variant: 같은 원본이라도 전송 이미지가 다르면 (축소/크롭 설정) 다른 키"""
+    text = f'{image_hash}:{prompt_hash(prompt)}:{model}'
+    if variant:
+        text += f':{variant}'
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """(이미지 해시, 프롬프트, 모델) → (원본 응답, 박스) 캐시 (스레드 안전)"""
+
+    def __init__(self, db_path=CACHE_DB, max_bytes=CACHE_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._total = self._conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM responses').fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, image_hash, prompt, model, variant=''):
+        """캐시된 응답 {'raw', 'boxes', 'usage'} (없으면 None)"""
+        key = cache_key(image_hash, prompt, model, variant)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT raw, boxes, usage FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+
+        raw, boxes, usage = row
+        return {
+            'raw': raw,
+            'boxes': [tuple(box) for box in json.loads(boxes)] if boxes is not None else None,
+            'usage': json.loads(usage) if usage else {},
+        }
+
+    def put(self, image_hash, prompt, model, raw, boxes, usage=None, variant=''):
+        """응답 저장 (boxes가 None이면 파싱 실패 - reparse로 나중에 다시 계산)
+
+        boxes는 원본 응답과 같은 좌표계 (전송한 이미지 기준)
+        """
+        key = cache_key(image_hash, prompt, model, variant)
+        boxes_json = json.dumps([list(box) for box in boxes]) if boxes is not None else None
+        size = len(raw.encode('utf-8')) + len(boxes_json or '') + 256
+        now = time.time()
+
+        with self._lock, self._conn:
+            old = self._conn.execute('SELECT bytes FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, image_hash, prompt_hash, model, raw, boxes, usage, bytes, created, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, image_hash, prompt_hash(prompt), model, raw, boxes_json,
+                 json.dumps(usage or {}), size, now, now))
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+
+    def _evict(self):
+        """용량 상한까지 오래 안 쓴 항목 삭제 (잠금을 잡은 상태에서 호출)"""
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT key, bytes FROM responses ORDER BY last_used LIMIT 100').fetchall()
+            if not rows:
+                self._total = 0
+                return
+            for key, size in rows:
+                if self._total <= self.max_bytes:
+                    break
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._total -= size
+                self.evictions += 1
+
+    def reparse(self, parser):
+        """저장된 원본 응답을 parser(raw) → 박스 목록(또는 None)으로 다시 파싱
+
+        Returns:
+            dict: entries, changed, failed (파싱 실패 수)
+        """
+        stats = {'entries': 0, 'changed': 0, 'failed': 0}
+        with self._lock:
+            rows = self._conn.execute('SELECT key, raw, boxes FROM responses').fetchall()
+            updates = []
+            for key, raw, old in rows:
+                stats['entries'] += 1
+                boxes = parser(raw)
+                if boxes is None:
+                    stats['failed'] += 1
+                new = json.dumps([list(box) for box in boxes]) if boxes is not None else None
+                if new != old:
+                    updates.append((new, key))
+            with self._conn:
+                self._conn.executemany('UPDATE responses SET boxes = ? WHERE key = ?', updates)
+        stats['changed'] = len(updates)
+        return stats
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM responses')
+            self._total = 0
+
+    def stats(self):
+        with self._lock:
+            entries, parse_failed = self._conn.execute(
+                'SELECT COUNT(*), COUNT(*) - COUNT(boxes) FROM responses').fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'parseFailed': parse_failed,
+                'bytes': self._total,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = ResponseCache()
+
+    if command == 'reparse':
+        from claude_label_engine import parse_boxes
+        print(f'다시 파싱: {cache.reparse(parse_boxes)}')
+    elif command == 'clear':
+        cache.clear()
+        print('캐시를 비웠습니다.')
+    elif command != 'stats':
+        print(__doc__)
+        return
+
+    print(json.dumps(cache.stats(), indent=2, ensure_ascii=False))
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+YOLO 라벨 읽기/쓰기/변환 (한 줄: class cx cy w h, 0~1 정규화)
+- 라벨은 (N, 5) float32 배열 [class, cx, cy, w, h] 하나로 다룸 (줄마다 float()로 바꾸지 않음)
+- 폴더 전체는 LabelSet: 모든 라벨을 이은 rows (N, 5) + 이미지별 offsets
+  → {폴더}.yolo.npz 바이너리 캐시 (파일별 mtime/크기로 확인, 바뀐 파일만 다시 파싱)
+  캐시는 라벨 폴더 밖에 둠 (dataset_materializer가 라벨 폴더의 모르는 파일을 지우므로)
+- 변환(hflip/scale/crop/clip)은 배열 전체에 한 번에 적용, 항상 새 배열을 돌려줌
+
+사용법:
+    rows = read(label_path)                  # (N, 5), 파일 없으면 (0, 5)
+    write(label_path, hflip(rows))
+    write(label_path, from_boxes(boxes))     # VLM/모델이 낸 (cx, cy, w, h) 목록 → 클래스 0
+    labels = load_dir(LABELS_DIR)            # labels.get(stem), labels.counts()
+    python3 yolo_labels.py labeling_labels   # 캐시 갱신 + 통계
+"""
+
+import argparse
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+CACHE_SUFFIX = '.yolo.npz'
+CACHE_VERSION = 1
+LABEL_SUFFIX = '.txt'
+SKIP_STEMS = ('classes',)       # classes.txt는 라벨이 아님
+
+
+def empty():
+    return np.zeros((0, 5), np.float32)
+
+
+def parse(text):
+    """라벨 텍스트(또는 줄 목록) → (N, 5) float32 (5칸 미만 줄은 무시, 6칸 이상은 앞 5칸)"""
+    lines = text.splitlines() if isinstance(text, str) else text
+    fields = [parts[:5] for parts in (line.split() for line in lines) if len(parts) >= 5]
+    return np.array(fields, np.float32).reshape(-1, 5) if fields else empty()
+
+
+def read(label_path):
+    try:
+        return parse(Path(label_path).read_text())
+    except FileNotFoundError:
+        return empty()
+
+
+def from_boxes(boxes, cls=0):
+    """(cx, cy, w, h) 목록 → (N, 5) 라벨 (cls: 클래스 하나 또는 박스별 클래스 목록, 단일 클래스 라벨러는 0)"""
+    boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+    rows = np.empty((len(boxes), 5), np.float32)
+    rows[:, 0] = cls
+    rows[:, 1:] = boxes
+    return rows
+
+
+def to_list(rows):
+    """Python float 목록 (float32 오차 없이 파일의 소수 6자리 값으로 - JSON 응답/prompt용)"""
+    return np.round(np.asarray(rows, np.float64), 6).tolist()
+
+
+def to_lines(rows):
+    return [f'{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}' for c, x, y, w, h in np.asarray(rows).tolist()]
+
+
+def to_text(rows):
+    return ''.join(line + '\n' for line in to_lines(rows))
+
+
+def write(label_path, rows):
+    Path(label_path).write_text(to_text(rows))
+
+
+# ---------- 변환 (정규화 좌표) ----------
+
+def to_xyxy(rows):
+    """[class, cx, cy, w, h] → (N, 4) [x1, y1, x2, y2]"""
+    half = rows[:, 3:5] / 2
+    return np.concatenate([rows[:, 1:3] - half, rows[:, 1:3] + half], axis=1)
+
+
+def from_xyxy(cls, xyxy):
+    """클래스 (N,) + [x1, y1, x2, y2] → [class, cx, cy, w, h]"""
+    out = np.empty((len(xyxy), 5), np.float32)
+    out[:, 0] = cls
+    out[:, 1:3] = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+    out[:, 3:5] = xyxy[:, 2:] - xyxy[:, :2]
+    return out
+
+
+def hflip(rows):
+    """좌우 반전 (cx → 1 - cx)"""
+    out = rows.copy()
+    out[:, 1] = 1 - out[:, 1]
+    return out
+
+
+def scale(rows, sx, sy=None, dx=0.0, dy=0.0):
+    """x' = x * sx + dx, y' = y * sy + dy (크기는 배율만) - 리사이즈/레터박스/이미지 안 위치 이동"""
+    sy = sx if sy is None else sy
+    out = rows.copy()
+    out[:, 1] = out[:, 1] * sx + dx
+    out[:, 2] = out[:, 2] * sy + dy
+    out[:, 3] *= sx
+    out[:, 4] *= sy
+    return out
+
+
+def clip(rows, min_size=0.0):
+    """박스를 이미지(0~1) 안으로 자르고, 잘린 뒤 너비/높이가 min_size 이하인 박스는 뺌"""
+    xyxy = np.clip(to_xyxy(rows), 0, 1)
+    out = from_xyxy(rows[:, 0], xyxy)
+    return out[(out[:, 3] > min_size) & (out[:, 4] > min_size)]
+
+
+def crop(rows, x1, y1, x2, y2, min_size=0.0):
+    """원본 기준 정규화 영역 (x1, y1)~(x2, y2)를 잘라낸 이미지 기준 라벨 (영역 밖 박스는 잘리거나 빠짐)"""
+    w, h = x2 - x1, y2 - y1
+    return clip(scale(rows, 1 / w, 1 / h, -x1 / w, -y1 / h), min_size)
+
+
+# ---------- 폴더 단위 ----------
+
+class LabelSet:
+    """라벨 폴더 전체 (이미지 i의 라벨 = rows[offsets[i]:offsets[i + 1]])"""
+
+    def __init__(self, stems, rows, offsets):
+        self.stems = list(stems)
+        self.rows = rows
+        self.rows.setflags(write=False)
+        self.offsets = offsets
+        self.index = {stem: i for i, stem in enumerate(self.stems)}
+        self.parsed = 0         # 이번에 텍스트에서 다시 읽은 파일 수 (캐시 적중 확인용)
+
+    def __len__(self):
+        return len(self.stems)
+
+    def __contains__(self, stem):
+        return stem in self.index
+
+    def __getitem__(self, i):
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def get(self, stem):
+        """stem의 라벨 (N, 5) - 라벨 파일이 없으면 (0, 5), 읽기 전용 뷰 (변환 함수는 새 배열을 만듦)"""
+        i = self.index.get(stem)
+        return empty() if i is None else self[i]
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+
+def cache_path_for(labels_dir):
+    labels_dir = Path(labels_dir)
+    return labels_dir.parent / f'{labels_dir.name}{CACHE_SUFFIX}'
+
+
+def _scan(labels_dir):
+    """라벨 파일 (stem, mtime_ns, 크기) 목록 - 이름순"""
+    files = []
+    with os.scandir(labels_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(LABEL_SUFFIX) and entry.is_file():
+                stem = entry.name[:-len(LABEL_SUFFIX)]
+                if stem not in SKIP_STEMS:
+                    st = entry.stat()
+                    files.append((stem, st.st_mtime_ns, st.st_size))
+    files.sort()
+    return files
+
+
+def _load_cache(path):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_VERSION:
+                return None
+            return {key: data[key] for key in ('stems', 'mtimes', 'sizes', 'rows', 'offsets')}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_cache(path, stems, mtimes, sizes, rows, offsets):
+    """캐시 쓰기 (프로세스/스레드마다 다른 임시 파일 → 동시에 써도 마지막 것만 남음, 실패해도 계속)"""
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=CACHE_VERSION, stems=np.array(stems, dtype=str), mtimes=mtimes, sizes=sizes,
+                     rows=rows, offsets=offsets)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f'라벨 캐시 저장 실패 ({path}): {e}')
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+
+
+def load_dir(labels_dir, cache=True):
+    """라벨 폴더 → LabelSet (cache: {폴더}.yolo.npz를 쓰고 갱신, mtime/크기가 그대로인 파일은 파싱하지 않음)"""
+    labels_dir = Path(labels_dir)
+    files = _scan(labels_dir) if labels_dir.is_dir() else []
+    path = cache_path_for(labels_dir)
+    old = _load_cache(path) if cache else None
+    known = {}
+    if old is not None:
+        known = {stem: (int(m), int(s), i) for i, (stem, m, s) in
+                 enumerate(zip(old['stems'].tolist(), old['mtimes'], old['sizes']))}
+
+    chunks, parsed = [], 0
+    for stem, mtime, size in files:
+        hit = known.get(stem)
+        if hit is not None and hit[:2] == (mtime, size):
+            i = hit[2]
+            chunks.append(old['rows'][old['offsets'][i]:old['offsets'][i + 1]])
+        else:
+            chunks.append(read(labels_dir / f'{stem}{LABEL_SUFFIX}'))
+            parsed += 1
+
+    stems = [stem for stem, _, _ in files]
+    offsets = np.zeros(len(chunks) + 1, np.int64)
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+    rows = np.concatenate(chunks) if chunks else empty()
+    if cache and (parsed or old is None or len(known) != len(files)):
+        _save_cache(path, stems, np.array([f[1] for f in files], np.int64),
+                    np.array([f[2] for f in files], np.int64), rows, offsets)
+
+    labels = LabelSet(stems, rows, offsets)
+    labels.parsed = parsed
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLO 라벨 폴더 캐시 갱신 + 통계')
+    parser.add_argument('labels_dir')
+    parser.add_argument('--no-cache', action='store_true', help='캐시 없이 전부 파싱 (비교용)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    labels = load_dir(args.labels_dir, cache=not args.no_cache)
+    seconds = time.perf_counter() - start
+    counts = labels.counts()
+    print(f'라벨 파일 {len(labels)}개 (다시 파싱 {labels.parsed}개), 박스 {len(labels.rows)}개, '
+          f'라벨 있는 이미지 {int((counts > 0).sum())}개 ({seconds:.3f}s)')
+    if len(labels.rows):
+        classes, class_counts = np.unique(labels.rows[:, 0].astype(int), return_counts=True)
+        print('클래스별: ' + ', '.join(f'{c}: {n}' for c, n in zip(classes.tolist(), class_counts.tolist())))
+
+
+if __name__ == '__main__':
+    main()